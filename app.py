@@ -1,9 +1,11 @@
-import os
 import time
 import streamlit as st
 from dotenv import load_dotenv
-from supabase import create_client
 
+from auth_guard import forget_role
+from cache_bus import bump
+from db_client import get_supabase, mark_tokens_bound, forget_supabase
+from session_tokens import revoke_session, store_session
 from ui_layout import apply_o2_style, render_hero, card
 
 load_dotenv()
@@ -14,23 +16,7 @@ apply_o2_style()
 # ---------------------
 # Supabase
 # ---------------------
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_ANON_KEY = os.getenv("SUPABASE_ANON_KEY")
-if not SUPABASE_URL or not SUPABASE_ANON_KEY:
-    st.error("Chybí SUPABASE_URL nebo SUPABASE_ANON_KEY v .env / Secrets")
-    st.stop()
-
-supabase = create_client(SUPABASE_URL, SUPABASE_ANON_KEY)
-
-# Pokud už máš tokeny, navážeme session (kvůli RLS)
-if st.session_state.get("access_token") and st.session_state.get("refresh_token"):
-    try:
-        supabase.auth.set_session(
-            st.session_state["access_token"],
-            st.session_state["refresh_token"],
-        )
-    except Exception:
-        pass
+supabase = get_supabase()
 
 
 # ---------------------
@@ -43,19 +29,31 @@ def set_logged_in_session(auth_response):
     if not sess or not usr:
         raise Exception("Chybí session/user v auth response.")
 
-    st.session_state["access_token"] = sess.access_token
-    st.session_state["refresh_token"] = sess.refresh_token
+    store_session(sess)
     st.session_state["user"] = {"id": usr.id, "email": usr.email}
+    forget_role()  # role se načte znovu pro nového uživatele
 
-    supabase.auth.set_session(sess.access_token, sess.refresh_token)
+    # sign_in už token na klienta navázal – další bind netřeba
+    mark_tokens_bound(sess.access_token, sess.refresh_token)
 
 
 def try_ensure_profile_row(user_id: str, email: str):
     try:
-        supabase.table("profiles").upsert(
-            {"user_id": user_id, "email": email},
-            on_conflict="user_id",
-        ).execute()
+        # nový profil insertem; u existujícího se e-mail přepíše jen když se liší –
+        # běžný login tak nic nezapíše a nezvýší verzi profiles (na ní visí snapshot leaderboardu)
+        found = supabase.table("profiles").select("email").eq("user_id", user_id).limit(1).execute().data or []
+        if not found:
+            res = supabase.table("profiles").upsert(
+                {"user_id": user_id, "email": email},
+                on_conflict="user_id",
+                ignore_duplicates=True,
+            ).execute()
+        elif found[0].get("email") != email:
+            res = supabase.table("profiles").update({"email": email}).eq("user_id", user_id).execute()
+        else:
+            return
+        if res.data:
+            bump(supabase, "profiles")
     except Exception:
         pass
 
@@ -93,9 +91,12 @@ if user:
                 st.switch_page("pages/3_Leaderboard.py")
         with col3:
             if st.button("🚪 Odhlásit", type="secondary", use_container_width=True):
+                revoke_session(supabase)
                 for k in ["access_token", "refresh_token", "user"]:
                     if k in st.session_state:
                         del st.session_state[k]
+                forget_supabase()
+                forget_role()
                 st.rerun()
     st.stop()
 
@@ -0,0 +1,76 @@
+# auth_guard.py
+"""
+Společná kontrola přihlášení a admin role pro stránky.
+
+Role (profiles.is_admin) se načte jednou za session a drží se ROLE_TTL sekund,
+takže admin stránky už při každém rerunu nevolají profiles … .single().
+Zároveň nastaví st.session_state["is_admin"] pro horní menu (ui_menu).
+Odhlášení / změna uživatele roli zahodí (forget_role).
+"""
+import time
+
+import streamlit as st
+
+from ui_layout import card
+
+ROLE_KEY = "_auth_role"
+ROLE_TTL = 300  # s – odebrání admin práv se projeví nejpozději po této době
+
+
+def forget_role() -> None:
+    st.session_state.pop(ROLE_KEY, None)
+    st.session_state.pop("is_admin", None)
+
+
+def resolve_role(supabase, user_id: str, force: bool = False) -> dict:
+    """{"user_id", "is_admin", "checked_at"} z cache session, po TTL / jiném uživateli znovu z DB."""
+    role = st.session_state.get(ROLE_KEY)
+    fresh = role is not None and role["user_id"] == user_id and time.time() - role["checked_at"] < ROLE_TTL
+    if fresh and not force:
+        return role
+
+    prof = supabase.table("profiles").select("user_id, is_admin").eq("user_id", user_id).maybe_single().execute()
+    data = getattr(prof, "data", None) or {}
+    role = {"user_id": user_id, "is_admin": bool(data.get("is_admin")), "checked_at": time.time()}
+    st.session_state[ROLE_KEY] = role
+    st.session_state["is_admin"] = role["is_admin"]
+    return role
+
+
+def is_admin(supabase, user: dict | None) -> bool:
+    """Pro menu a běžné stránky: chyba při ověření = není admin (nic se nezastaví)."""
+    if not user:
+        return False
+    try:
+        return resolve_role(supabase, user["id"])["is_admin"]
+    except Exception:
+        return False
+
+
+def require_login(user: dict | None) -> dict:
+    """Nepřihlášený uživatel dostane odkaz na přihlášení a stránka skončí."""
+    if not user:
+        with card("🔐 Nepřihlášen"):
+            st.warning("Nejsi přihlášený.")
+            if st.button("➡️ Přihlášení", type="primary"):
+                st.switch_page("app.py")
+        st.stop()
+
+    if not st.session_state.get("access_token") or not st.session_state.get("refresh_token"):
+        st.error("Chybí session tokeny. Odhlas se a přihlas znovu.")
+        st.stop()
+    return user
+
+
+def require_admin(supabase, user: dict | None) -> dict:
+    """Přihlášený admin, jinak chybová hláška a st.stop()."""
+    require_login(user)
+    try:
+        role = resolve_role(supabase, user["id"])
+    except Exception as e:
+        st.error(f"Nelze ověřit admina: {e}")
+        st.stop()
+    if not role["is_admin"]:
+        st.error("Tato stránka je jen pro admina.")
+        st.stop()
+    return user
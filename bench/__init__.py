@@ -0,0 +1 @@
+# bench/ – výkonnostní měření (spouštět z rootu repa: python -m bench.<modul>)
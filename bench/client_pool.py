@@ -0,0 +1,74 @@
+# bench/client_pool.py
+"""
+Reruny za sekundu: create_client() + set_session() při každém rerunu (původní stav)
+vs. sdílený pool + klient na session (db_client).
+
+    python -m bench.client_pool --reruns 200 --connect-ms 20
+"""
+import argparse
+import time
+
+from supabase import create_client
+
+from bench.stub_backend import StubBackend, fake_jwt
+from db_client import bind_tokens, make_client, new_http_pool
+
+ANON_KEY = "bench-anon-key"
+
+
+def rerun_queries(client) -> None:
+    # typický rerun Zápasů: zápasy + moje tipy
+    client.table("matches").select("*").order("starts_at").execute()
+    client.table("predictions").select("*").eq("user_id", "u-bench").execute()
+
+
+def bench_before(url: str, tokens: tuple[str, str], reruns: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(reruns):
+        client = create_client(url, ANON_KEY)
+        client.auth.set_session(*tokens)
+        rerun_queries(client)
+    return reruns / (time.perf_counter() - t0)
+
+
+def bench_after(url: str, tokens: tuple[str, str], reruns: int) -> float:
+    pool = new_http_pool()
+    client = make_client(url, ANON_KEY, pool)
+    bind_tokens(client, tokens[0])  # jednou za session, bez requestu
+    t0 = time.perf_counter()
+    for _ in range(reruns):
+        rerun_queries(client)
+    rate = reruns / (time.perf_counter() - t0)
+    pool.close()
+    return rate
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--reruns", type=int, default=200)
+    ap.add_argument("--connect-ms", type=float, default=20.0, help="simulovaná cena nového spojení (TLS)")
+    args = ap.parse_args()
+
+    tables = {
+        "matches": [{"id": i, "home_team": "Czechia", "away_team": "Canada", "starts_at": "2026-02-11T12:00:00"} for i in range(30)],
+        "predictions": [{"match_id": i, "home_score": 2, "away_score": 1} for i in range(30)],
+    }
+    backend = StubBackend(tables, connect_delay=args.connect_ms / 1000).start()
+    tokens = (fake_jwt("u-bench"), "r-bench")
+    try:
+        c0 = backend.connections
+        before = bench_before(backend.url, tokens, args.reruns)
+        c1 = backend.connections
+        after = bench_after(backend.url, tokens, args.reruns)
+        c2 = backend.connections
+    finally:
+        backend.stop()
+
+    print(f"reruns: {args.reruns}, simulované navázání spojení: {args.connect_ms:.0f} ms")
+    print(f"před (create_client + set_session): {before:8.1f} rerunů/s, nových spojení: {c1 - c0}")
+    print(f"po   (sdílený pool)               : {after:8.1f} rerunů/s, nových spojení: {c2 - c1}")
+    print(f"zrychlení: {after / before:.1f}×")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+# bench/parallel_reads.py
+"""
+Souběžné načítání nezávislých dotazů (db_read.fetch_parallel) vs. postupně za sebou.
+
+Stub backend s latencí na request (vzdálený Supabase). Měří sadu dotazů stránky Zápasy
+(zápasy + moje tipy + soupisky) a Admin Vyhodnocení (tipy zápasu + scorer_results + e-maily
+tipujících po kusech IN seznamu).
+
+    python -m bench.parallel_reads --latency-ms 40 --users 1000
+"""
+import argparse
+import statistics
+import time
+
+from bench.stub_backend import StubBackend, fake_jwt
+from db_client import bind_tokens, make_client, new_http_pool
+from db_read import IN_CHUNK, fetch_all_in, fetch_parallel, iter_rows_in
+
+ANON_KEY = "bench-anon-key"
+
+
+def zapasy_tasks(client) -> dict:
+    return {
+        "matches": lambda: client.table("matches").select("*").order("starts_at").execute().data,
+        "preds": lambda: client.table("predictions").select("*").eq("user_id", "u-bench").execute().data,
+        "players": lambda: client.table("players").select("*").execute().data,
+    }
+
+
+def admin_tasks(client) -> dict:
+    return {
+        "preds": lambda: client.table("predictions").select("*").eq("match_id", 1).execute().data,
+        "scorer_results": lambda: client.table("scorer_results").select("*").eq("match_id", 1).execute().data,
+    }
+
+
+def _median_ms(fn, repeat: int) -> float:
+    runs = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        runs.append(time.perf_counter() - t0)
+    return statistics.median(runs) * 1000
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--latency-ms", type=float, default=40.0, help="simulovaná latence jednoho requestu")
+    ap.add_argument("--users", type=int, default=1000, help="počet tipujících (e-maily po kusech IN)")
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+
+    tables = {
+        "matches": [{"id": i, "home_team": "Czechia", "away_team": "Canada", "starts_at": "2026-02-11T12:00:00"} for i in range(30)],
+        "predictions": [{"match_id": i, "home_score": 2, "away_score": 1} for i in range(30)],
+        "players": [{"id": i, "team_name": "Czechia", "full_name": f"Hráč {i}", "role": "ATT"} for i in range(300)],
+        "scorer_results": [],
+        "profiles": [],
+    }
+    backend = StubBackend(tables, request_delay=args.latency_ms / 1000).start()
+    pool = new_http_pool()
+    client = make_client(backend.url, ANON_KEY, pool)
+    bind_tokens(client, fake_jwt("u-bench"))
+    uids = [f"u-{i}" for i in range(args.users)]
+
+    def profiles_query():
+        return client.table("profiles").select("user_id, email")
+
+    cases = {
+        "zapasy": (
+            lambda: {k: fn() for k, fn in zapasy_tasks(client).items()},
+            lambda: fetch_parallel(zapasy_tasks(client)),
+        ),
+        "admin_vyhodnoceni": (
+            lambda: ({k: fn() for k, fn in admin_tasks(client).items()}, list(iter_rows_in(profiles_query, "user_id", uids))),
+            lambda: (fetch_parallel(admin_tasks(client)), fetch_all_in(profiles_query, "user_id", uids)),
+        ),
+    }
+    try:
+        fetch_parallel(zapasy_tasks(client))  # zahřátí poolu (spojení, vlákna)
+        print(f"latence {args.latency_ms:.0f} ms/request, tipujících {args.users} ({-(-args.users // IN_CHUNK)} kusů IN)")
+        for name, (seq, par) in cases.items():
+            t_seq = _median_ms(seq, args.repeat)
+            t_par = _median_ms(par, args.repeat)
+            print(f"{name:18s} postupně {t_seq:8.1f} ms   souběžně {t_par:8.1f} ms   zrychlení {t_seq / t_par:.1f}×")
+    finally:
+        pool.close()
+        backend.stop()
+
+
+if __name__ == "__main__":
+    main()
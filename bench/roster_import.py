@@ -0,0 +1,205 @@
+# bench/roster_import.py
+"""
+Benchmark importu soupisek: 12 týmů × 25 hráčů (300 hráčů) nad lokálním backendem (local_db).
+
+Parsování:
+- legacy    – původní parser ze Soupisky Admin (slepení textu + regexy), tým po týmu
+- streaming – roster_import (text po řádcích, předkompilované vzory), text / CSV / JSON celý soubor
+
+Zápis (počet requestů na backend a čas):
+- legacy    – za každý tým delete + insert (jak se ukládalo dřív)
+- batched   – diff všech týmů a dávkový zápis (rosters.apply_roster_diffs)
+pro první import do prázdné tabulky i pro opakovaný import s pár změnami.
+
+    python -m bench.roster_import --repeat 20
+"""
+import argparse
+import csv
+import io
+import json
+import random
+import re
+import statistics
+import sys
+import time
+
+from bench.tournament import CLUBS, FIRST_NAMES, LAST_NAMES, TEAMS
+from local_db import LocalClient, LocalDatabase
+from query_profiler import ProfiledClient, RerunRecord
+from roster_import import iter_csv_players, iter_json_players, iter_text_players, validate_players
+from rosters import apply_roster_diffs, diff_roster, load_players_by_team
+
+PLAYERS_PER_TEAM = 25
+
+
+def generate(seed: int = 2026) -> dict[str, list[dict]]:
+    rng = random.Random(seed)
+    teams = {}
+    for team, country3 in TEAMS:
+        players = []
+        for j in range(PLAYERS_PER_TEAM):
+            club, league3 = rng.choice(CLUBS)
+            players.append(
+                {
+                    "team_name": team,
+                    "full_name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {j + 1}",
+                    "role": "DEF" if j % 3 == 0 else "ATT",
+                    "club_name": club,
+                    "country3": country3,
+                    "league_name": "Liga",
+                    "league_country3": league3,
+                }
+            )
+        teams[team] = players
+    return teams
+
+
+def _team_text(players: list[dict]) -> str:
+    def item(p):
+        return f"{p['full_name']} ({p['club_name']}, {p['country3']}, {p['league_name']}, {p['league_country3']})"
+
+    defs = ", ".join(item(p) for p in players if p["role"] == "DEF")
+    fwds = ", ".join(item(p) for p in players if p["role"] == "ATT")
+    # zalomení uprostřed seznamu jako u textu zkopírovaného z PDF
+    return f"Goalies: A (B, CZE)\nDefenders: {defs}\nForwards: {fwds[: len(fwds) // 2]}\n{fwds[len(fwds) // 2:]}"
+
+
+def as_text(teams: dict[str, list[dict]]) -> str:
+    return "\n".join(f"Team: {t}\n{_team_text(ps)}" for t, ps in teams.items())
+
+
+def as_csv(teams: dict[str, list[dict]]) -> str:
+    buf = io.StringIO()
+    w = csv.DictWriter(buf, fieldnames=list(next(iter(teams.values()))[0]))
+    w.writeheader()
+    for ps in teams.values():
+        w.writerows(ps)
+    return buf.getvalue()
+
+
+def as_json(teams: dict[str, list[dict]]) -> str:
+    return json.dumps(teams, ensure_ascii=False)
+
+
+# =====================
+# Původní parser (Soupisky Admin před roster_import) – pro srovnání
+# =====================
+def _legacy_item(item: str):
+    m = re.match(r"^(.*?)\s*\((.*?)\)\s*$", item.strip())
+    if not m:
+        return None
+    parts = [p.strip() for p in m.group(2).split(",") if p.strip()]
+    codes = [p for p in parts if re.fullmatch(r"[A-Z]{3}", p)]
+    rest = [p for p in parts[1:] if not re.fullmatch(r"[A-Z]{3}", p)]
+    country3 = codes[0] if codes else ""
+    return {
+        "full_name": m.group(1).strip().lstrip(",").strip(),
+        "club_name": parts[0] if parts else "",
+        "country3": country3,
+        "league_name": rest[0] if rest else "",
+        "league_country3": codes[1] if len(codes) >= 2 else country3,
+    }
+
+
+def legacy_parse(text: str) -> list[dict]:
+    t = " ".join(text.replace("\n", " ").split())
+    m_def = re.search(r"Defenders:\s*(.*?)(?:Forwards:|$)", t, flags=re.IGNORECASE)
+    m_fwd = re.search(r"Forwards:\s*(.*)$", t, flags=re.IGNORECASE)
+    out = []
+    for section, role in ((m_def, "DEF"), (m_fwd, "ATT")):
+        if not section:
+            continue
+        for item in section.group(1).strip().replace("),", ")|").split("|"):
+            parsed = _legacy_item(item.strip().strip(","))
+            if parsed:
+                out.append({**parsed, "role": role})
+    return out
+
+
+def legacy_save(client, teams: dict[str, list[dict]]) -> None:
+    for team, players in teams.items():
+        client.table("players").delete().eq("team_name", team).execute()
+        client.table("players").insert([{**p, "team_name": team, "source": "upload_text"} for p in players]).execute()
+
+
+def batched_save(client, teams: dict[str, list[dict]]) -> dict:
+    existing = load_players_by_team(client, list(teams))
+    diffs = [diff_roster(t, existing.get(t, []), ps) for t, ps in teams.items()]
+    return apply_roster_diffs(client, [d for d in diffs if not d.is_empty])
+
+
+def changed_copy(teams: dict[str, list[dict]], seed: int) -> dict[str, list[dict]]:
+    """Opakovaný import: u 3 týmů změna klubu, 1 nový a 1 odebraný hráč."""
+    rng = random.Random(seed)
+    out = {t: [dict(p) for p in ps] for t, ps in teams.items()}
+    for t in rng.sample(list(out), 3):
+        out[t][0]["club_name"] = f"Přestup {seed}"
+        out[t].pop()
+        out[t].append({**out[t][1], "full_name": f"Nováček {seed} {t}"})
+    return out
+
+
+# =====================
+# Měření
+# =====================
+def _ms(runs: list[float]) -> str:
+    return f"median {statistics.median(runs) * 1000:8.2f} ms  min {min(runs) * 1000:8.2f} ms"
+
+
+def _time(fn, repeat: int) -> tuple[list[float], object]:
+    runs, out = [], None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        runs.append(time.perf_counter() - t0)
+    return runs, out
+
+
+def _write_case(name: str, save, teams, reimport, repeat: int) -> None:
+    runs, requests = [], []
+    for i in range(repeat):
+        client = ProfiledClient(LocalClient(LocalDatabase(":memory:")))
+        if reimport:
+            batched_save(client, teams)
+        client.current = RerunRecord(page=name, session="bench", started=time.time())
+        data = changed_copy(teams, seed=i) if reimport else teams
+        t0 = time.perf_counter()
+        save(client, data)
+        runs.append(time.perf_counter() - t0)
+        requests.append(len(client.current.queries))
+    print(f"{name:28s} {_ms(runs)}  requestů {statistics.median(requests):.0f}", file=sys.stderr)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--repeat", type=int, default=20)
+    ap.add_argument("--seed", type=int, default=2026)
+    args = ap.parse_args()
+
+    teams = generate(args.seed)
+    text, raw_csv, raw_json = as_text(teams), as_csv(teams), as_json(teams)
+    per_team = [_team_text(ps) for ps in teams.values()]
+    total = sum(len(ps) for ps in teams.values())
+    print(f"data: {len(teams)} týmů, {total} hráčů (text {len(text) / 1024:.0f} kB)", file=sys.stderr)
+
+    runs, out = _time(lambda: [p for t in per_team for p in legacy_parse(t)], args.repeat)
+    print(f"{'parse legacy (po týmech)':28s} {_ms(runs)}  hráčů {len(out)}", file=sys.stderr)
+    for name, fn in (
+        ("parse text", lambda: validate_players(iter_text_players(io.StringIO(text)))),
+        ("parse csv", lambda: validate_players(iter_csv_players(io.StringIO(raw_csv)))),
+        ("parse json", lambda: validate_players(iter_json_players(raw_json))),
+    ):
+        runs, (parsed, errors) = _time(fn, args.repeat)
+        count = sum(len(ps) for ps in parsed.values())
+        print(f"{name:28s} {_ms(runs)}  hráčů {count}, chyb {len(errors)}", file=sys.stderr)
+        if count != total:
+            raise SystemExit(f"{name}: čekáno {total} hráčů, naparsováno {count}")
+
+    _write_case("save legacy (první import)", legacy_save, teams, False, args.repeat)
+    _write_case("save batched (první import)", batched_save, teams, False, args.repeat)
+    _write_case("save legacy (reimport)", legacy_save, teams, True, args.repeat)
+    _write_case("save batched (reimport)", batched_save, teams, True, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+# bench/scoring_engine.py
+"""
+Vektorové bodování vs. skalární pravidla.
+
+Nejdřív ověří shodu (všechny kombinace skóre 0–12 × střelec ano/ne + náhodný vzorek),
+pak změří výpočet bodů i points_detail pro N tipů.
+
+    python -m bench.scoring_engine --n 1000000
+"""
+import argparse
+import itertools
+import time
+
+import numpy as np
+
+from scoring import DETAIL_KEYS, prediction_points, score_points_vec
+
+MAX_GOALS = 12
+
+
+def check_equivalence(ph, pa, fh, fa, hit) -> int:
+    vec = score_points_vec(ph, pa, fh, fa, hit)
+    points = vec["points"].to_numpy()
+    details = vec[list(DETAIL_KEYS)].to_numpy()
+    for i in range(len(ph)):
+        pred = {"home_score": int(ph[i]), "away_score": int(pa[i]), "scorer_player_id": "p" if hit[i] else None}
+        sp, detail = prediction_points(pred, int(fh[i]), int(fa[i]), {"p": True})
+        if sp != points[i] or [detail[k] for k in DETAIL_KEYS] != details[i].tolist():
+            raise AssertionError(f"neshoda pro tip {ph[i]}:{pa[i]} vs {fh[i]}:{fa[i]} (střelec {hit[i]}): {sp}/{detail} != {points[i]}/{details[i]}")
+    return len(ph)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--n", type=int, default=1_000_000)
+    ap.add_argument("--seed", type=int, default=2026)
+    args = ap.parse_args()
+
+    grid = np.array(list(itertools.product(range(MAX_GOALS + 1), repeat=4)))
+    exhaustive = 0
+    for hit in (False, True):
+        exhaustive += check_equivalence(grid[:, 0], grid[:, 1], grid[:, 2], grid[:, 3], np.full(len(grid), hit))
+
+    rng = np.random.default_rng(args.seed)
+    ph, pa, fh, fa = (rng.poisson(2.6, args.n) for _ in range(4))
+    hit = rng.random(args.n) < 0.2
+    sample = min(args.n, 50_000)
+    check_equivalence(ph[:sample], pa[:sample], fh[:sample], fa[:sample], hit[:sample])
+    print(f"shoda ✅ ({exhaustive} kombinací + {sample} náhodných tipů)")
+
+    t0 = time.perf_counter()
+    for i in range(args.n):
+        prediction_points(
+            {"home_score": int(ph[i]), "away_score": int(pa[i]), "scorer_player_id": "p" if hit[i] else None},
+            int(fh[i]), int(fa[i]), {"p": True},
+        )
+    scalar = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    score_points_vec(ph, pa, fh, fa, hit)
+    vector = time.perf_counter() - t0
+
+    print(f"{args.n:,} tipů: skalárně {scalar:.2f} s, vektorově {vector * 1000:.0f} ms ({scalar / vector:.0f}×)")
+
+
+if __name__ == "__main__":
+    main()
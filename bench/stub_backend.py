@@ -0,0 +1,113 @@
+# bench/stub_backend.py
+"""
+Lokální HTTP náhrada Supabase (PostgREST + auth) pro benchmarky.
+
+Umí jen to, co benchmarky potřebují: GET /rest/v1/<tabulka> vrací uložené řádky,
+GET /auth/v1/user vrací uživatele a POST /auth/v1/token vydá novou session.
+`connect_delay` simuluje cenu navázání spojení (TLS handshake ke vzdálenému Supabase),
+`request_delay` latenci každého requestu (RTT + práce DB).
+"""
+import base64
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def fake_jwt(user_id: str, ttl: int = 3600) -> str:
+    def b64(obj: dict) -> str:
+        raw = json.dumps(obj, separators=(",", ":")).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+    header = b64({"alg": "HS256", "typ": "JWT"})
+    payload = b64({"sub": user_id, "exp": int(time.time()) + ttl, "role": "authenticated"})
+    return f"{header}.{payload}.c2ln"
+
+
+class StubBackend:
+    def __init__(self, tables: dict[str, list[dict]] | None = None, connect_delay: float = 0.0, request_delay: float = 0.0):
+        self.tables = tables or {}
+        self.connect_delay = connect_delay
+        self.request_delay = request_delay
+        self.connections = 0
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._server: ThreadingHTTPServer | None = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "StubBackend":
+        backend = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def setup(self):
+                with backend._lock:
+                    backend.connections += 1
+                if backend.connect_delay:
+                    time.sleep(backend.connect_delay)
+                super().setup()
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status: int, body):
+                raw = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(raw)))
+                self.end_headers()
+                self.wfile.write(raw)
+
+            def _body(self) -> dict:
+                n = int(self.headers.get("Content-Length") or 0)
+                return json.loads(self.rfile.read(n) or b"{}") if n else {}
+
+            def do_GET(self):
+                with backend._lock:
+                    backend.requests += 1
+                if backend.request_delay:
+                    time.sleep(backend.request_delay)
+                path = self.path.split("?", 1)[0]
+                if path.startswith("/auth/v1/user"):
+                    self._send(200, {"id": "u-bench", "aud": "authenticated", "email": "bench@example.com",
+                                     "app_metadata": {}, "user_metadata": {}, "created_at": "2026-01-01T00:00:00Z"})
+                elif path.startswith("/rest/v1/"):
+                    self._send(200, backend.tables.get(path[len("/rest/v1/"):], []))
+                else:
+                    self._send(404, {"message": "not found"})
+
+            def do_POST(self):
+                with backend._lock:
+                    backend.requests += 1
+                if backend.request_delay:
+                    time.sleep(backend.request_delay)
+                body = self._body()
+                if self.path.startswith("/auth/v1/token"):
+                    self._send(200, {
+                        "access_token": fake_jwt("u-bench"),
+                        "refresh_token": body.get("refresh_token") or "r-bench",
+                        "token_type": "bearer",
+                        "expires_in": 3600,
+                        "expires_at": int(time.time()) + 3600,
+                        "user": {"id": "u-bench", "aud": "authenticated", "email": "bench@example.com",
+                                 "app_metadata": {}, "user_metadata": {}, "created_at": "2026-01-01T00:00:00Z"},
+                    })
+                else:
+                    self._send(201, [])
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
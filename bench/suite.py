@@ -0,0 +1,242 @@
+# bench/suite.py
+"""
+End-to-end benchmark nad syntetickým turnajem (bench.tournament) a lokálním backendem (local_db).
+
+Měří hlavní cesty appky:
+- zapasy_page        – stránka Zápasy (načtení zápasů, tipů, soupisek, seskupení do dnů, render)
+- evaluate_matches   – hromadné vyhodnocení odehraných zápasů + úprava profiles.points
+- evaluate_placement – vyhodnocení všech eventů umístění najednou (skupinové zápisy) + úprava bodů
+- points_sync        – rozpad bodů všech uživatelů a porovnání s profiles (Admin Sync bodů)
+- leaderboard_page   – stránka Leaderboard (admin pohled s rozpadem)
+- leaderboard_snapshot – sdílený snapshot leaderboardu: čtení z cache (hit) vs. přestavba po změně bodů
+
+Výsledek je JSON (preset, velikost dat, verze kódu, časy po bězích), aby šly porovnávat buildy.
+
+    python -m bench.suite --preset small --repeat 5 --out bench_small.json
+    python -m bench.suite --preset large --repeat 1 --only evaluate_matches,points_sync
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from bench.tournament import PRESETS, generate, load
+
+ROOT = Path(__file__).resolve().parent.parent
+CASES = ("zapasy_page", "evaluate_matches", "evaluate_placement", "points_sync", "leaderboard_page", "leaderboard_snapshot")
+PAGE_TIMEOUT = 600
+
+
+def _git_rev() -> str | None:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, timeout=10)
+        return out.stdout.strip() or None
+    except Exception:
+        return None
+
+
+def _stats(runs: list[float]) -> dict:
+    ms = [round(r * 1000, 2) for r in runs]
+    return {
+        "runs_ms": ms,
+        "first_ms": ms[0],
+        "min_ms": min(ms),
+        "median_ms": round(statistics.median(ms), 2),
+        "mean_ms": round(statistics.fmean(ms), 2),
+        "max_ms": max(ms),
+    }
+
+
+def _time(fn, repeat: int, setup=None) -> tuple[list[float], object]:
+    runs, out = [], None
+    for i in range(repeat):
+        if setup:
+            setup(i)
+        t0 = time.perf_counter()
+        out = fn(i)
+        runs.append(time.perf_counter() - t0)
+    return runs, out
+
+
+# =====================
+# Případy
+# =====================
+def _page(path: str, user_id: str, email: str):
+    from streamlit.testing.v1 import AppTest
+
+    def run(_i):
+        at = AppTest.from_file(str(ROOT / path), default_timeout=PAGE_TIMEOUT)
+        at.session_state["user"] = {"id": user_id, "email": email}
+        at.session_state["access_token"] = "bench"
+        at.session_state["refresh_token"] = f"{user_id}.bench"
+        at.run()
+        if at.exception:
+            raise RuntimeError(f"{path}: {at.exception[0].message}")
+        return {"elements": len(at.main)}
+
+    return run
+
+
+def case_zapasy_page(client, tables, repeat):
+    user = tables["profiles"][1]
+    return _time(_page("pages/2_Zapasy.py", user["user_id"], user["email"]), repeat)
+
+
+def case_leaderboard_page(client, tables, repeat):
+    admin = tables["profiles"][0]
+    return _time(_page("pages/3_Leaderboard.py", admin["user_id"], admin["email"]), repeat)
+
+
+def case_evaluate_matches(client, tables, repeat):
+    from points import apply_points_deltas, recompute_profiles_points
+    from scoring import evaluate_finished_matches
+
+    user_ids = [p["user_id"] for p in tables["profiles"]]
+
+    def setup(_i):
+        # každý běh vyhodnocuje od nuly (body tipů smazané, součty srovnané)
+        client.db.run("UPDATE predictions SET points_awarded = 0, points_detail = NULL", [])
+        client.db.run("UPDATE matches SET evaluated_at = NULL", [])
+        recompute_profiles_points(client, user_ids)
+
+    def run(_i):
+        res = evaluate_finished_matches(client)
+        applied = apply_points_deltas(client, res["deltas"], part="match")
+        return {k: res[k] for k in ("matches", "predictions", "changed", "write_requests")} | {
+            "updated": applied["updated"],
+            "recomputed": applied["recomputed"],
+        }
+
+    return _time(run, repeat, setup)
+
+
+def case_evaluate_placement(client, tables, repeat):
+    from points import apply_points_deltas
+    from scoring import evaluate_placement_events
+
+    event_ids = [e["id"] for e in tables["placement_events"]]
+
+    def run(i):
+        # jiná správná odpověď v každém běhu → vždy se mění body
+        res = evaluate_placement_events(client, {eid: str(1 + (i + n) % 8) for n, eid in enumerate(event_ids)})
+        applied = apply_points_deltas(client, res["deltas"], part="placement")
+        return {
+            "events": res["events"],
+            "predictions": res["updated"],
+            "write_requests": res["write_requests"],
+            "users_changed": len(res["deltas"]),
+            "recomputed": applied["recomputed"],
+        }
+
+    return _time(run, repeat)
+
+
+def case_points_sync(client, tables, repeat):
+    from db_read import fetch_all
+    from points import sum_points_by_user, total_points
+
+    def run(_i):
+        profiles = fetch_all(lambda: client.table("profiles").select("user_id, email, points"), key="user_id")
+        sums = sum_points_by_user(client, [p["user_id"] for p in profiles])
+        out_of_sync = sum(1 for p in profiles if int(p.get("points") or 0) != total_points(sums[p["user_id"]]))
+        return {"users": len(profiles), "out_of_sync": out_of_sync}
+
+    return _time(run, repeat)
+
+
+def case_leaderboard_snapshot(client, tables, repeat):
+    from leaderboard import LeaderboardCache
+
+    cache = LeaderboardCache()
+    user_ids = [p["user_id"] for p in tables["profiles"]]
+
+    def run(i):
+        # každý 10. request přijde po změně bodů (nová verze) → přestavba, ostatní čtou snapshot
+        snap = cache.get(client, (i // 10,))
+        snap.slice(user_ids[i % len(user_ids)])
+        return cache.stats() | {"built_at": None}
+
+    runs, info = _time(run, max(repeat, 1) * 100)
+    return runs, {k: round(v, 3) if isinstance(v, float) else v for k, v in info.items() if v is not None}
+
+
+CASE_FUNCS = {
+    "zapasy_page": case_zapasy_page,
+    "evaluate_matches": case_evaluate_matches,
+    "evaluate_placement": case_evaluate_placement,
+    "points_sync": case_points_sync,
+    "leaderboard_page": case_leaderboard_page,
+    "leaderboard_snapshot": case_leaderboard_snapshot,
+}
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--preset", choices=sorted(PRESETS), default="small")
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--seed", type=int, default=2026)
+    ap.add_argument("--only", default="", help="čárkou oddělené případy (" + ", ".join(CASES) + ")")
+    ap.add_argument("--db", default=None, help="soubor SQLite (výchozí dočasný)")
+    ap.add_argument("--out", default=None, help="kam zapsat JSON (jinak na stdout)")
+    args = ap.parse_args()
+
+    cases = [c.strip() for c in args.only.split(",") if c.strip()] or list(CASES)
+    unknown = [c for c in cases if c not in CASE_FUNCS]
+    if unknown:
+        raise SystemExit(f"Neznámé případy: {', '.join(unknown)}")
+
+    db_path = args.db or os.path.join(tempfile.mkdtemp(prefix="tipovacka-bench-"), "bench.db")
+    # stránky (AppTest) si klienta berou přes db_client.get_supabase → stejný soubor
+    os.environ["TIPOVACKA_BACKEND"] = "sqlite"
+    os.environ["TIPOVACKA_SQLITE_PATH"] = db_path
+
+    from local_db import connect
+
+    preset = PRESETS[args.preset]
+    t0 = time.perf_counter()
+    tables = generate(preset, seed=args.seed)
+    generate_s = time.perf_counter() - t0
+
+    client = connect(db_path)
+    t0 = time.perf_counter()
+    counts = load(client.db, tables)
+    load_s = time.perf_counter() - t0
+    print(f"data: {', '.join(f'{t} {n:,}' for t, n in counts.items())} (generování {generate_s:.1f} s, zápis {load_s:.1f} s)", file=sys.stderr)
+
+    results = {}
+    for name in cases:
+        runs, info = CASE_FUNCS[name](client, tables, args.repeat)
+        results[name] = _stats(runs) | {"info": info}
+        print(f"{name:20s} median {results[name]['median_ms']:10.1f} ms  (první {results[name]['first_ms']:.1f} ms)  {info}", file=sys.stderr)
+
+    report = {
+        "preset": args.preset,
+        "params": preset.__dict__,
+        "seed": args.seed,
+        "repeat": args.repeat,
+        "rows": counts,
+        "generate_s": round(generate_s, 2),
+        "load_s": round(load_s, 2),
+        "git_rev": _git_rev(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "results": results,
+    }
+    raw = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.out:
+        Path(args.out).write_text(raw + "\n", encoding="utf-8")
+        print(f"zapsáno: {args.out}", file=sys.stderr)
+    else:
+        print(raw)
+
+
+if __name__ == "__main__":
+    main()
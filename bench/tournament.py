@@ -0,0 +1,249 @@
+# bench/tournament.py
+"""
+Syntetický turnaj pro benchmarky a offline běh appky (local_db).
+
+Uživatelé, zápasy rozložené do dnů (polovina odehraná – s výsledkem a rozhodnutím o střelcích),
+soupisky ~25 hráčů na tým, tipy včetně střelců, eventy umístění s tipy a manuální body.
+
+    python -m bench.tournament --preset small --db tipovacka.db
+    TIPOVACKA_BACKEND=sqlite TIPOVACKA_SQLITE_PATH=tipovacka.db streamlit run app.py
+"""
+import argparse
+import random
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+
+from local_db import LocalDatabase, hash_password
+
+TEAMS = (
+    ("Czechia", "CZE"), ("Slovakia", "SVK"), ("Canada", "CAN"), ("USA", "USA"),
+    ("Sweden", "SWE"), ("Finland", "FIN"), ("Switzerland", "SUI"), ("Germany", "GER"),
+    ("Latvia", "LAT"), ("Denmark", "DEN"), ("France", "FRA"), ("Italy", "ITA"),
+)
+FIRST_NAMES = ("Jan", "Petr", "Martin", "David", "Tomáš", "Jakub", "Erik", "Lukas", "Mikko", "Nils", "Connor", "Jack", "Leon", "Nico", "Roman")
+LAST_NAMES = ("Novák", "Svoboda", "Pastrňák", "Červenka", "Kubalík", "Koivu", "Granlund", "Nylander", "Forsberg", "Draisaitl", "McDavid", "Eichel", "Hischier", "Meier", "Bondra")
+CLUBS = (("HC Sparta Praha", "CZE"), ("Frölunda HC", "SWE"), ("Tappara", "FIN"), ("EV Zug", "SUI"), ("Toronto Maple Leafs", "CAN"), ("Boston Bruins", "USA"))
+PLACEMENT_TITLES = ("Hokej – vítěz turnaje", "Biatlon – sprint žen", "Běh na lyžích – 50 km", "Rychlobruslení – 5000 m", "Skoky – velký můstek")
+
+PASSWORD = "bench123"  # heslo všech vygenerovaných uživatelů (lokální přihlášení)
+
+
+@dataclass(frozen=True)
+class Preset:
+    users: int
+    matches: int
+    players_per_team: int = 25
+    placement_events: int = 10
+    prediction_rate: float = 0.85
+    scorer_rate: float = 0.6
+    manual_rate: float = 0.1
+    matches_per_day: int = 4
+
+
+PRESETS = {
+    "small": Preset(users=60, matches=30),
+    "medium": Preset(users=1_000, matches=48),
+    "large": Preset(users=20_000, matches=60),
+}
+
+
+def _uid(rng: random.Random) -> str:
+    return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+
+def _iso(dt: datetime) -> str:
+    return dt.isoformat()
+
+
+def generate(preset: Preset, seed: int = 2026, now: datetime | None = None) -> dict[str, list[dict]]:
+    """Řádky všech tabulek jako {tabulka: [řádek, ...]} (stejné sloupce jako local_db.SCHEMA)."""
+    rng = random.Random(seed)
+    now = (now or datetime.now(timezone.utc)).replace(second=0, microsecond=0)
+
+    users = [_uid(rng) for _ in range(preset.users)]
+    admin = users[0]
+    profiles = [
+        {"user_id": uid, "email": f"user{i:05d}@bench.cz", "points": 0, "is_admin": uid == admin}
+        for i, uid in enumerate(users)
+    ]
+
+    players = []
+    roster: dict[str, list[dict]] = {}
+    for team, country3 in TEAMS:
+        for j in range(preset.players_per_team):
+            club, league3 = rng.choice(CLUBS)
+            p = {
+                "id": _uid(rng),
+                "team_name": team,
+                "full_name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {j + 1}",
+                "role": "DEF" if j % 3 == 0 else "ATT",
+                "club_name": club,
+                "country3": country3,
+                "league_name": None,
+                "league_country3": league3,
+                "source": "bench",
+                "created_by": admin,
+            }
+            players.append(p)
+            roster.setdefault(team, []).append(p)
+
+    # polovina dnů v minulosti (odehrané), zbytek v budoucnosti
+    days = -(-preset.matches // preset.matches_per_day)
+    first_day = now.replace(hour=0) - timedelta(days=days // 2)
+    matches = []
+    scorer_hits: dict[int, set[str]] = {}
+    for i in range(preset.matches):
+        home, away = rng.sample(TEAMS, 2)
+        starts = first_day + timedelta(days=i // preset.matches_per_day, hours=12 + 3 * (i % preset.matches_per_day))
+        m = {
+            "id": i + 1,
+            "home_team": home[0],
+            "away_team": away[0],
+            "starts_at": _iso(starts),
+            "final_home_score": None,
+            "final_away_score": None,
+            "evaluated_at": None,
+        }
+        if starts < now - timedelta(hours=3):
+            m["final_home_score"] = rng.choice((0, 1, 2, 2, 3, 3, 4, 5))
+            m["final_away_score"] = rng.choice((0, 1, 1, 2, 2, 3, 4))
+            pool = roster[home[0]] + roster[away[0]]
+            scorer_hits[m["id"]] = {p["id"] for p in rng.sample(pool, min(len(pool), m["final_home_score"] + m["final_away_score"]))}
+        matches.append(m)
+
+    predictions = []
+    picked: dict[int, dict[str, dict]] = {}
+    for m in matches:
+        pool = roster[m["home_team"]] + roster[m["away_team"]]
+        for uid in users:
+            if rng.random() > preset.prediction_rate:
+                continue
+            row = {
+                "user_id": uid,
+                "match_id": m["id"],
+                "home_score": rng.choice((0, 1, 2, 2, 3, 3, 4)),
+                "away_score": rng.choice((0, 1, 1, 2, 2, 3)),
+                "scorer_player_id": None,
+                "scorer_name": None,
+                "scorer_flag": None,
+                "scorer_team": None,
+                "points_awarded": 0,
+                "points_detail": None,
+            }
+            if rng.random() < preset.scorer_rate:
+                p = rng.choice(pool)
+                row.update(scorer_player_id=p["id"], scorer_name=p["full_name"], scorer_team=p["team_name"])
+                picked.setdefault(m["id"], {})[p["id"]] = p
+            predictions.append(row)
+
+    scorer_results = [
+        {
+            "match_id": mid,
+            "scorer_player_id": pid,
+            "scorer_name": p["full_name"],
+            "scorer_team": p["team_name"],
+            "did_score": pid in scorer_hits[mid],
+        }
+        for mid, by_player in picked.items()
+        if mid in scorer_hits
+        for pid, p in by_player.items()
+    ]
+
+    placement_events = []
+    placement_predictions = []
+    for i in range(preset.placement_events):
+        event_date = first_day + timedelta(days=i % max(days, 1), hours=10)
+        ev = {
+            "id": i + 1,
+            "title": f"{PLACEMENT_TITLES[i % len(PLACEMENT_TITLES)]} #{i + 1}",
+            "category": "bench",
+            "event_date": _iso(event_date),
+            "lock_at": _iso(event_date - timedelta(hours=1)),
+            "correct_value": None,
+            "evaluated_at": None,
+        }
+        placement_events.append(ev)
+        for uid in users:
+            if rng.random() < preset.prediction_rate:
+                placement_predictions.append(
+                    {"user_id": uid, "event_id": ev["id"], "predicted_value": str(rng.randint(1, 8)), "points_awarded": 0}
+                )
+
+    manual_points_log = []
+    for uid in rng.sample(users, int(len(users) * preset.manual_rate)):
+        change = rng.choice((-2, 1, 2, 3, 5))
+        manual_points_log.append(
+            {
+                "created_at": _iso(now - timedelta(minutes=rng.randint(1, 10_000))),
+                "admin_user_id": admin,
+                "target_user_id": uid,
+                "change_amount": change,
+                "old_points": 0,
+                "new_points": max(0, change),
+                "reason": "bench",
+            }
+        )
+
+    # profiles.points odpovídá manuálním bodům (zápasy a umístění ještě nejsou vyhodnocené)
+    manual_by_user: dict[str, int] = {}
+    for r in manual_points_log:
+        manual_by_user[r["target_user_id"]] = manual_by_user.get(r["target_user_id"], 0) + r["change_amount"]
+    for prof in profiles:
+        prof["points"] = max(0, manual_by_user.get(prof["user_id"], 0))
+
+    return {
+        "profiles": profiles,
+        "players": players,
+        "matches": matches,
+        "predictions": predictions,
+        "scorer_results": scorer_results,
+        "placement_events": placement_events,
+        "placement_predictions": placement_predictions,
+        "manual_points_log": manual_points_log,
+    }
+
+
+def load(db: LocalDatabase, tables: dict[str, list[dict]], with_logins: bool = False) -> dict[str, int]:
+    """Hromadně vloží vygenerované řádky (executemany v jedné transakci). Vrací počty řádků."""
+    counts = {}
+    with db.transaction():
+        for table, rows in tables.items():
+            if not rows:
+                counts[table] = 0
+                continue
+            cols = list(rows[0])
+            sql = (
+                f'INSERT OR REPLACE INTO "{table}" ({", ".join(chr(34) + c + chr(34) for c in cols)}) '
+                f'VALUES ({", ".join("?" * len(cols))})'
+            )
+            db.conn.executemany(sql, ([db.encode(table, c, r.get(c)) for c in cols] for r in rows))
+            counts[table] = len(rows)
+
+        if with_logins:
+            # jedno heslo pro všechny (hash je drahý – spočítá se jednou)
+            pw = hash_password(PASSWORD)
+            db.conn.executemany(
+                "INSERT OR REPLACE INTO auth_users (id, email, password_hash) VALUES (?, ?, ?)",
+                ((p["user_id"], p["email"], pw) for p in tables.get("profiles", [])),
+            )
+    return counts
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--preset", choices=sorted(PRESETS), default="small")
+    ap.add_argument("--db", default="tipovacka.db")
+    ap.add_argument("--seed", type=int, default=2026)
+    args = ap.parse_args()
+
+    t0 = time.perf_counter()
+    tables = generate(PRESETS[args.preset], seed=args.seed)
+    counts = load(LocalDatabase(args.db), tables, with_logins=True)
+    print(f"{args.db}: " + ", ".join(f"{t} {n:,}" for t, n in counts.items()) + f" ({time.perf_counter() - t0:.1f} s)")
+    print(f"přihlášení: user00000@bench.cz (admin) … heslo {PASSWORD}")
+
+
+if __name__ == "__main__":
+    main()
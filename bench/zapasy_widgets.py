@@ -0,0 +1,110 @@
+# bench/zapasy_widgets.py
+"""
+Kolik widgetů a kolik bajtů deltas pošle stránka Zápasy při jednom rerunu:
+všechny dny ve expanderech (TIPOVACKA_LAZY_DAYS=0) vs. lazy – jen otevřený den.
+
+    python -m bench.zapasy_widgets --days 8 --per-day 4
+"""
+import argparse
+import os
+from datetime import date, timedelta
+from pathlib import Path
+
+import streamlit.testing.v1.local_script_runner as lsr
+from streamlit.testing.v1 import AppTest
+
+from bench.stub_backend import StubBackend, fake_jwt
+
+PAGE = str(Path(__file__).resolve().parent.parent / "pages" / "2_Zapasy.py")
+TEAMS = ["Czechia", "Canada", "Sweden", "Finland", "Slovakia", "Switzerland",
+         "Germany", "Latvia", "Denmark", "Italy", "France", "United States"]
+WIDGETS = {"button", "number_input", "text_input", "checkbox", "selectbox", "text_area", "toggle"}
+
+
+def make_tables(days: int, per_day: int, players_per_team: int) -> dict[str, list[dict]]:
+    start = date.today() + timedelta(days=1)
+    matches = []
+    for d in range(days):
+        day = start + timedelta(days=d)
+        for k in range(per_day):
+            home, away = TEAMS[(2 * k + d) % len(TEAMS)], TEAMS[(2 * k + 1 + d) % len(TEAMS)]
+            matches.append({
+                "id": len(matches) + 1, "home_team": home, "away_team": away,
+                "starts_at": f"{day.isoformat()}T{12 + 2 * k:02d}:00:00",
+                "final_home_score": None, "final_away_score": None, "evaluated_at": None,
+            })
+    players = [
+        {"id": f"{t[:3]}-{i}", "team_name": t, "full_name": f"Hráč {i:02d} {t}", "role": "ATT" if i % 3 else "DEF",
+         "club_name": "HC Klub", "country3": "CZE", "league_country3": "CZE"}
+        for t in TEAMS for i in range(players_per_team)
+    ]
+    return {"matches": matches, "predictions": [], "players": players}
+
+
+class _Capture:
+    """Zachytí ForwardMsg z posledního běhu skriptu (AppTest je jinak nevystavuje)."""
+
+    def __init__(self):
+        self.msgs = []
+        self._orig = lsr.parse_tree_from_messages
+
+    def __enter__(self):
+        def parse(msgs):
+            self.msgs = list(msgs)
+            return self._orig(msgs)
+
+        lsr.parse_tree_from_messages = parse
+        return self
+
+    def __exit__(self, *exc):
+        lsr.parse_tree_from_messages = self._orig
+
+
+def measure(lazy: bool, open_day: str) -> dict:
+    os.environ["TIPOVACKA_LAZY_DAYS"] = "1" if lazy else "0"
+    at = AppTest.from_file(PAGE, default_timeout=60)
+    at.session_state["user"] = {"id": "u-bench", "email": "bench@example.com"}
+    at.session_state["access_token"] = fake_jwt("u-bench")
+    at.session_state["refresh_token"] = "r-bench"
+    at.session_state["open_day"] = open_day
+    with _Capture() as cap:
+        at.run()
+    if at.exception:
+        raise RuntimeError(at.exception[0].value)
+
+    widgets = elements = delta_bytes = 0
+    for msg in cap.msgs:
+        if not msg.HasField("delta"):
+            continue
+        delta_bytes += msg.ByteSize()
+        if msg.delta.HasField("new_element"):
+            elements += 1
+            if msg.delta.new_element.WhichOneof("type") in WIDGETS:
+                widgets += 1
+    return {"widgets": widgets, "elements": elements, "delta_bytes": delta_bytes}
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--days", type=int, default=8)
+    ap.add_argument("--per-day", type=int, default=4)
+    ap.add_argument("--players", type=int, default=25, help="hráčů na tým")
+    args = ap.parse_args()
+
+    backend = StubBackend(make_tables(args.days, args.per_day, args.players)).start()
+    os.environ["SUPABASE_URL"] = backend.url
+    os.environ["SUPABASE_ANON_KEY"] = "bench-anon-key"
+    open_day = (date.today() + timedelta(days=1)).isoformat()
+    try:
+        before = measure(lazy=False, open_day=open_day)
+        after = measure(lazy=True, open_day=open_day)
+    finally:
+        backend.stop()
+
+    print(f"{args.days} dní × {args.per_day} zápasů, {args.players} hráčů na tým, otevřený den: {open_day}")
+    for name, r in (("všechny dny", before), ("lazy       ", after)):
+        print(f"{name}: widgetů {r['widgets']:5d}, elementů {r['elements']:5d}, deltas {r['delta_bytes'] / 1024:8.1f} KiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+# cache_bus.py
+"""
+Verze tabulek a invalidace cache napříč sessions (jeden proces Streamlitu).
+
+Cachovaná data (zápasy, soupisky, leaderboard, eventy umístění) nemají TTL – klíč cache
+obsahuje verzi zdrojové tabulky (table_version) a při změně verze se data načtou znovu.
+
+Verze se zvyšuje:
+- hned v procesu, když zapisuje naše kód (bump po zápisu – rosters, scoring, points, admin stránky)
+- z DB (sql/004_table_versions.sql: trigger na každý zápis, i z workeru nebo SQL konzole);
+  proces si tabulku table_versions přečte nejvýš jednou za POLL_SECONDS (poll volá get_supabase)
+
+Na změnu se dá i přihlásit (subscribe) – typicky `cached_fn.clear`, aby staré verze nezůstávaly v paměti.
+
+Pojistky, když verze z DB nejdou číst (chybí sql/004, výpadek) – zápisy z workeru, jiné repliky
+nebo SQL konzole by jinak cache nikdy nezneplatnily:
+- table_version pak obsahuje i "epochu" FALLBACK_TTL, takže se cache obnovují jako dřív s TTL
+- cache samotné mají navíc MAX_AGE (ttl u st.cache_data, stáří snapshotu leaderboardu)
+Selhání se zaloguje jednou (a jednou i návrat do normálu).
+"""
+import logging
+import threading
+import time
+from collections.abc import Callable, Iterable
+
+log = logging.getLogger(__name__)
+
+TRACKED_TABLES = ("matches", "players", "profiles", "points_breakdown", "placement_events")
+POLL_SECONDS = 5.0
+FALLBACK_TTL = 60  # s – jak často se cache obnovují, když verze z DB nejdou číst
+MAX_AGE = 600  # s – nejdelší život cache i při fungujících verzích
+
+
+class VersionBus:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._versions: dict[str, int] = {}
+        self._subscribers: dict[str, list[Callable[[], None]]] = {}
+        self._last_poll = 0.0
+        self.bumps = 0
+        self.polls = 0
+        self.degraded = False  # verze z DB nejdou číst / zapsat → cache jedou na FALLBACK_TTL
+
+    def version(self, table: str) -> int:
+        return self._versions.get(table, 0)
+
+    def versions(self) -> dict[str, int]:
+        with self._lock:
+            return dict(self._versions)
+
+    def subscribe(self, tables: Iterable[str], callback: Callable[[], None]) -> None:
+        with self._lock:
+            for t in tables:
+                subs = self._subscribers.setdefault(t, [])
+                if callback not in subs:
+                    subs.append(callback)
+
+    def _set(self, updates: dict[str, int]) -> list[str]:
+        """Nastaví vyšší verze, vrátí tabulky, které se změnily."""
+        changed = []
+        with self._lock:
+            for t, v in updates.items():
+                if v > self._versions.get(t, 0):
+                    self._versions[t] = v
+                    changed.append(t)
+        return changed
+
+    def _notify(self, tables: list[str]) -> None:
+        callbacks = {cb for t in tables for cb in self._subscribers.get(t, [])}
+        for cb in callbacks:
+            try:
+                cb()
+            except Exception:
+                log.exception("invalidace cache selhala")
+
+    def mark_degraded(self, what: str, exc: Exception) -> None:
+        with self._lock:
+            first, self.degraded = not self.degraded, True
+        if first:
+            log.warning("%s selhalo (%s) – cache se obnovují každých %d s, dokud verze z DB nepůjdou", what, exc, FALLBACK_TTL)
+
+    def _recover(self) -> None:
+        with self._lock:
+            was, self.degraded = self.degraded, False
+        if was:
+            log.info("verze tabulek z DB zase fungují")
+
+    def publish(self, tables: Iterable[str], remote: dict[str, int] | None = None) -> None:
+        """Lokální zápis: verze +1 (nebo hodnota z DB, je-li vyšší) a upozornění odběratelů."""
+        remote = remote or {}
+        tables = list(dict.fromkeys(tables))
+        with self._lock:
+            updates = {t: max(self._versions.get(t, 0) + 1, remote.get(t, 0)) for t in tables}
+            self.bumps += 1
+        self._notify(self._set(updates))
+
+    def poll(self, supabase, force: bool = False) -> list[str]:
+        """Srovná verze s DB (nejvýš jednou za POLL_SECONDS na proces). Vrací změněné tabulky."""
+        now = time.monotonic()
+        with self._lock:
+            if not force and now - self._last_poll < POLL_SECONDS:
+                return []
+            self._last_poll = now
+            self.polls += 1
+        try:
+            rows = supabase.table("table_versions").select("table_name, version").execute().data or []
+        except Exception as e:
+            # tabulka neexistuje (sql/004) / výpadek – lokální verze + FALLBACK_TTL
+            self.mark_degraded("čtení table_versions", e)
+            return []
+        self._recover()
+        changed = self._set({r["table_name"]: int(r.get("version") or 0) for r in rows})
+        self._notify(changed)
+        return changed
+
+
+_bus = VersionBus()
+
+
+def bus() -> VersionBus:
+    return _bus
+
+
+def table_version(*tables: str) -> tuple[int, ...]:
+    """Verze tabulek jako součást klíče cache: `cached_fn(_supabase, table_version("players"))`.
+
+    Bez verzí z DB je poslední položka epocha FALLBACK_TTL (jinak 0) – cache pak vyprší jako s TTL."""
+    epoch = int(time.time() // FALLBACK_TTL) if _bus.degraded else 0
+    return (*(_bus.version(t) for t in tables), epoch)
+
+
+def bump(supabase, *tables: str) -> None:
+    """Po zápisu do tabulek: invalidace v tomto procesu hned, do DB (ostatní procesy) best-effort."""
+    remote = {}
+    if supabase is not None:
+        try:
+            rows = supabase.rpc("bump_table_versions", {"tables": list(tables)}).execute().data or []
+            remote = {r["table_name"]: int(r.get("version") or 0) for r in rows}
+        except Exception as e:
+            _bus.mark_degraded("rpc bump_table_versions", e)
+    _bus.publish(tables, remote)
+
+
+def subscribe(tables: Iterable[str], callback: Callable[[], None]) -> None:
+    _bus.subscribe(tables, callback)
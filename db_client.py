@@ -0,0 +1,107 @@
+# db_client.py
+"""
+Sdílený přístup k Supabase.
+
+- jeden httpx pool (keep-alive spojení) na proces, sdílený všemi sessions
+- jeden lehký Supabase klient na Streamlit session (nevytváří se při každém rerunu)
+- JWT uživatele se na klienta jen přiloží (Bearer) při změně tokenů, refresh řídí session_tokens.py
+- TIPOVACKA_PROFILE_QUERIES=1: dotazy se měří po rerunech (query_profiler.py, Admin Diagnostika)
+- TIPOVACKA_BACKEND=sqlite: místo Supabase lokální SQLite (local_db.py) – offline běh a benchmarky
+- verze tabulek pro sdílené cache se srovnávají s DB (cache_bus.py)
+"""
+import os
+
+import httpx
+import streamlit as st
+from supabase import Client, ClientOptions
+
+from cache_bus import bus
+from query_profiler import caller_page, profiled_client
+from session_tokens import ensure_fresh_tokens
+
+CLIENT_KEY = "_supabase_client"
+BOUND_TOKENS_KEY = "_supabase_bound_tokens"
+
+# PostgREST i auth jedou přes stejný pool – hlavičky (apikey, Authorization)
+# se posílají s každým requestem zvlášť, takže sdílení mezi uživateli je bezpečné.
+HTTP_TIMEOUT = httpx.Timeout(30.0, connect=10.0)
+HTTP_LIMITS = httpx.Limits(max_connections=50, max_keepalive_connections=20, keepalive_expiry=60.0)
+
+
+def new_http_pool() -> httpx.Client:
+    return httpx.Client(timeout=HTTP_TIMEOUT, limits=HTTP_LIMITS, follow_redirects=True)
+
+
+def make_client(url: str, key: str, http_client: httpx.Client | None = None) -> Client:
+    """Supabase klient nad předaným poolem (bez Streamlitu – použitelné i ve skriptech)."""
+    # auto-refresh gotrue (vlastní timer na klienta) vypnutý – tokeny obnovuje session_tokens
+    options = ClientOptions(auto_refresh_token=False)
+    if http_client is not None:
+        options.httpx_client = http_client
+    return Client(url, key, options)
+
+
+def bind_tokens(client: Client, access_token: str) -> None:
+    """Přiloží JWT uživatele k dotazům (kvůli RLS). Bez requestu – platnost hlídá session_tokens."""
+    client.postgrest.auth(access_token)
+
+
+def use_local_backend() -> bool:
+    return os.getenv("TIPOVACKA_BACKEND", "supabase").strip().lower() == "sqlite"
+
+
+@st.cache_resource
+def _shared_http_pool() -> httpx.Client:
+    return new_http_pool()
+
+
+@st.cache_resource
+def _shared_local_db():
+    from local_db import LocalDatabase, sqlite_path
+
+    return LocalDatabase(sqlite_path())
+
+
+def _env() -> tuple[str, str]:
+    url = os.getenv("SUPABASE_URL")
+    key = os.getenv("SUPABASE_ANON_KEY")
+    if not url or not key:
+        st.error("Chybí SUPABASE_URL nebo SUPABASE_ANON_KEY v .env / Secrets")
+        st.stop()
+    return url, key
+
+
+def get_supabase() -> Client:
+    """Klient pro aktuální session. Při rerunu se jen vrátí – žádné nové spojení ani request na auth."""
+    client = st.session_state.get(CLIENT_KEY)
+    if client is None:
+        if use_local_backend():
+            from local_db import LocalClient
+
+            client = LocalClient(_shared_local_db())
+        else:
+            url, key = _env()
+            client = make_client(url, key, _shared_http_pool())
+        st.session_state[CLIENT_KEY] = client
+
+    tokens = ensure_fresh_tokens(client)
+    if tokens and st.session_state.get(BOUND_TOKENS_KEY) != tokens:
+        bind_tokens(client, tokens[0])
+        st.session_state[BOUND_TOKENS_KEY] = tokens
+
+    # verze tabulek z DB (zápisy jiných procesů) – nejvýš jednou za pár sekund na proces
+    if tokens:
+        bus().poll(client)
+
+    return profiled_client(client, caller_page())
+
+
+def mark_tokens_bound(access_token: str, refresh_token: str) -> None:
+    """Po sign_in klient token už má – ušetříme další bind_tokens."""
+    st.session_state[BOUND_TOKENS_KEY] = (access_token, refresh_token)
+
+
+def forget_supabase() -> None:
+    """Odhlášení: zahodí klienta této session (pool zůstává)."""
+    st.session_state.pop(CLIENT_KEY, None)
+    st.session_state.pop(BOUND_TOKENS_KEY, None)
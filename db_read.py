@@ -0,0 +1,175 @@
+# db_read.py
+"""
+Čtení velkých tabulek po stránkách.
+
+PostgREST vrátí na jeden dotaz jen omezený počet řádků (max-rows, typicky 1000) a nic nehlásí,
+dlouhé `.in_(...)` zase nafukují URL. Tady se proto:
+
+- stránkuje: podle klíče (keyset, `key=`) nebo přes `.range()` (pak musí dotaz mít stabilní `.order()`)
+- dlouhé IN seznamy dělí na kusy po IN_CHUNK
+- řádky vrací generátorem, takže agregace běží v konstantní paměti
+- pro zobrazení tabulek se čte jen viditelná stránka (fetch_page) a počty počítá DB (count_rows)
+- nezávislé dotazy jdou souběžně ve sdíleném thread poolu (fetch_parallel) – rerun čeká na nejpomalejší, ne na součet
+"""
+import threading
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+
+PAGE_SIZE = 1000
+IN_CHUNK = 100
+PARALLEL_WORKERS = 8  # na proces; HTTP pool (db_client) má spojení víc
+THREAD_PREFIX = "db-read"
+
+_executor: ThreadPoolExecutor | None = None
+_executor_lock = threading.Lock()
+
+
+def chunked(values: Iterable, size: int) -> Iterator[list]:
+    batch = []
+    for v in values:
+        batch.append(v)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def iter_rows(query_factory: Callable, key: str | None = None, page_size: int = PAGE_SIZE) -> Iterator[dict]:
+    """Všechny řádky dotazu. `query_factory()` musí pokaždé vrátit nový builder (select + filtry).
+
+    key: unikátní sloupec pro keyset stránkování (`key > poslední`), jinak offset přes range().
+    """
+    if key:
+        last = None
+        while True:
+            q = query_factory()
+            if last is not None:
+                q = q.gt(key, last)
+            batch = q.order(key).limit(page_size).execute().data or []
+            yield from batch
+            if len(batch) < page_size:
+                return
+            last = batch[-1][key]
+
+    start = 0
+    while True:
+        batch = query_factory().range(start, start + page_size - 1).execute().data or []
+        yield from batch
+        if len(batch) < page_size:
+            return
+        start += page_size
+
+
+def iter_rows_in(
+    query_factory: Callable,
+    column: str,
+    values: Iterable,
+    key: str | None = None,
+    chunk_size: int = IN_CHUNK,
+    page_size: int = PAGE_SIZE,
+) -> Iterator[dict]:
+    """Jako iter_rows, ale s filtrem `column IN values` rozděleným na kusy (krátké URL)."""
+    unique = list(dict.fromkeys(v for v in values if v is not None))
+    for part in chunked(unique, chunk_size):
+        yield from iter_rows(lambda part=part: query_factory().in_(column, part), key=key, page_size=page_size)
+
+
+def fetch_all(query_factory: Callable, key: str | None = None) -> list[dict]:
+    return list(iter_rows(query_factory, key=key))
+
+
+def fetch_page(query, page: int, page_size: int, order: tuple[str, ...] = ()) -> tuple[list[dict], int]:
+    """Jedna stránka (od 1) + celkový počet řádků. Dotaz musí mít `select(..., count="exact")`."""
+    for col in order:
+        query = query.order(col)
+    start = (max(1, page) - 1) * page_size
+    res = query.range(start, start + page_size - 1).execute()
+    return res.data or [], int(res.count or 0)
+
+
+def count_rows(query) -> int:
+    """Počet řádků spočítaný v DB bez přenosu dat. Dotaz: `select(sloupec, count="exact", head=True)` + filtry."""
+    return int(query.execute().count or 0)
+
+
+# =====================
+# Souběžné čtení
+# =====================
+def _shared_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=PARALLEL_WORKERS, thread_name_prefix=THREAD_PREFIX)
+        return _executor
+
+
+def _script_ctx():
+    """Kontext Streamlit rerunu (None mimo Streamlit – worker, benchmarky)."""
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+        return get_script_run_ctx(suppress_warning=True)
+    except Exception:
+        return None
+
+
+def _with_ctx(fn: Callable, ctx) -> Callable:
+    if ctx is None:
+        return fn
+
+    def run():
+        from streamlit.runtime.scriptrunner import add_script_run_ctx
+
+        # st.cache_data / session_state ve vlákně poolu patří k rerunu, který úlohu zadal
+        thread = threading.current_thread()
+        add_script_run_ctx(thread, ctx)
+        try:
+            return fn()
+        finally:
+            add_script_run_ctx(thread, None)
+
+    return run
+
+
+def fetch_parallel(tasks: dict[str, Callable]) -> dict:
+    """Spustí nezávislé načítací funkce souběžně a počká na všechny.
+
+    Vrací {jméno: výsledek}. Výjimka první selhané úlohy se vyhodí až po doběhnutí ostatních
+    (fallbacky – prázdný výsledek při chybě – patří do samotné úlohy).
+    """
+    # z vlákna poolu (vnořené volání) sekvenčně – čekání na vlastní pool by ho mohlo zablokovat
+    if len(tasks) <= 1 or threading.current_thread().name.startswith(THREAD_PREFIX):
+        return {name: fn() for name, fn in tasks.items()}
+
+    ctx = _script_ctx()
+    futures = {name: _shared_executor().submit(_with_ctx(fn, ctx)) for name, fn in tasks.items()}
+    error = None
+    out = {}
+    for name, fut in futures.items():
+        try:
+            out[name] = fut.result()
+        except Exception as e:
+            error = error or e
+    if error is not None:
+        raise error
+    return out
+
+
+def fetch_all_in(
+    query_factory: Callable,
+    column: str,
+    values: Iterable,
+    key: str | None = None,
+    chunk_size: int = IN_CHUNK,
+) -> list[dict]:
+    """Jako list(iter_rows_in(...)), ale kusy IN seznamu se čtou souběžně."""
+    unique = list(dict.fromkeys(v for v in values if v is not None))
+    parts = list(chunked(unique, chunk_size))
+    results = fetch_parallel(
+        {
+            i: (lambda part=part: list(iter_rows(lambda: query_factory().in_(column, part), key=key)))
+            for i, part in enumerate(parts)
+        }
+    )
+    return [r for i in range(len(parts)) for r in results[i]]
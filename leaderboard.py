@@ -0,0 +1,170 @@
+# leaderboard.py
+"""
+Leaderboard po kouscích: top N + okno kolem přihlášeného uživatele s jeho pořadím.
+
+- stránka Leaderboard čte ze sdíleného snapshotu (LeaderboardCache): seřazený a ozdobený seznam
+  se postaví jednou po každé změně bodů (verze tabulky profiles – cache_bus) a slouží všem sessions
+- load_slice: jeden dotaz, pořadí počítá DB (rpc leaderboard_slice, sql/005_leaderboard.sql) –
+  když snapshot postavit nejde; bez DB funkce se pořadí spočítá tady ze všech profilů
+
+Pořadí je "competition ranking": stejné body = stejné místo, další místo se přeskočí (1, 2, 2, 4).
+"""
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+
+import streamlit as st
+
+from cache_bus import MAX_AGE
+from db_read import iter_rows
+
+TOP_N = 50
+RADIUS = 5  # kolik řádků nad a pod "mnou"
+MEDALS = {1: "🥇", 2: "🥈", 3: "🥉"}
+
+
+@dataclass
+class LeaderboardSlice:
+    top: list[dict] = field(default_factory=list)
+    around: list[dict] = field(default_factory=list)  # okno kolem mě (prázdné, když jsem v top N)
+    me: dict | None = None
+    total: int = 0
+
+
+def rank_rows(rows: list[dict]) -> list[dict]:
+    """Seřadí {user_id, email, points} a doplní rank (competition) a pos (1..n)."""
+    ordered = sorted(rows, key=lambda r: (-int(r.get("points") or 0), r.get("email") or "", r.get("user_id") or ""))
+    out = []
+    rank, last_points = 0, None
+    for pos, r in enumerate(ordered, start=1):
+        points = int(r.get("points") or 0)
+        if points != last_points:
+            rank, last_points = pos, points
+        out.append({"user_id": r.get("user_id"), "email": r.get("email") or "—", "points": points, "rank": rank, "pos": pos})
+    return out
+
+
+def slice_ranked(ranked: list[dict], user_id: str | None, top_n: int = TOP_N, radius: int = RADIUS) -> LeaderboardSlice:
+    """Top N a okno kolem uživatele ze seřazeného seznamu (rank_rows)."""
+    me = next((r for r in ranked if r["user_id"] == user_id), None) if user_id else None
+    around = []
+    if me is not None and me["pos"] > top_n:
+        lo = max(me["pos"] - radius, top_n + 1)
+        around = ranked[lo - 1 : me["pos"] + radius]
+    return LeaderboardSlice(top=ranked[:top_n], around=around, me=me, total=len(ranked))
+
+
+def _slice_from_rpc(rows: list[dict], user_id: str | None, top_n: int) -> LeaderboardSlice:
+    rows = [{**r, "points": int(r.get("points") or 0), "rank": int(r["rank"]), "pos": int(r["pos"])} for r in rows]
+    top = [r for r in rows if r["pos"] <= top_n]
+    me = next((r for r in rows if r["user_id"] == user_id), None)
+    around = [r for r in rows if r["pos"] > top_n] if me is not None and me["pos"] > top_n else []
+    total = int(rows[0].get("total") or len(rows)) if rows else 0
+    return LeaderboardSlice(top=top, around=around, me=me, total=total)
+
+
+def load_all_ranked(supabase) -> list[dict]:
+    """Všechny profily seřazené s pořadím (fallback / sdílený snapshot)."""
+    rows = iter_rows(lambda: supabase.table("profiles").select("user_id, email, points"), key="user_id")
+    return rank_rows([r for r in rows if r.get("user_id")])
+
+
+def load_slice(supabase, user_id: str | None, top_n: int = TOP_N, radius: int = RADIUS) -> LeaderboardSlice:
+    """Top N + okno kolem uživatele; jeden dotaz na DB funkci, bez ní přes všechny profily."""
+    try:
+        rows = supabase.rpc("leaderboard_slice", {"top_n": top_n, "me": user_id, "radius": radius}).execute().data or []
+        return _slice_from_rpc(rows, user_id, top_n)
+    except Exception:
+        return slice_ranked(load_all_ranked(supabase), user_id, top_n, radius)
+
+
+def display_name(row: dict) -> str:
+    medal = MEDALS.get(row["rank"])
+    return f"{medal} {row['email']}" if medal else row["email"]
+
+
+# =====================
+# Sdílený snapshot (všechny sessions procesu)
+# =====================
+REBUILD_HISTORY = 50
+
+
+@dataclass
+class Snapshot:
+    version: tuple
+    ranked: list[dict]
+    pos_by_user: dict[str, int]
+    built_at: float
+    build_ms: float
+
+    def slice(self, user_id: str | None, top_n: int = TOP_N, radius: int = RADIUS) -> LeaderboardSlice:
+        pos = self.pos_by_user.get(user_id) if user_id else None
+        me = self.ranked[pos - 1] if pos else None
+        around = []
+        if me is not None and pos > top_n:
+            around = self.ranked[max(pos - radius, top_n + 1) - 1 : pos + radius]
+        return LeaderboardSlice(top=self.ranked[:top_n], around=around, me=me, total=len(self.ranked))
+
+
+class LeaderboardCache:
+    """Jeden snapshot na proces; při nové verzi ho postaví první request, ostatní počkají a použijí ho."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshot: Snapshot | None = None
+        self.hits = 0
+        self.misses = 0
+        self.rebuilds: deque[float] = deque(maxlen=REBUILD_HISTORY)
+
+    def _fresh(self, snap: Snapshot | None, version: tuple) -> bool:
+        # verze + pojistka stáří (cache_bus.MAX_AGE), kdyby se změna bodů do verze nepropsala
+        return snap is not None and snap.version == version and time.time() - snap.built_at < MAX_AGE
+
+    def get(self, supabase, version: tuple) -> Snapshot:
+        snap = self._snapshot
+        if self._fresh(snap, version):
+            self.hits += 1
+            return snap
+        with self._lock:
+            snap = self._snapshot
+            if self._fresh(snap, version):
+                self.hits += 1  # postavil ho souběžný request
+                return snap
+            self.misses += 1
+            t0 = time.perf_counter()
+            ranked = [{**r, "display": display_name(r)} for r in load_all_ranked(supabase)]
+            build_ms = (time.perf_counter() - t0) * 1000
+            snap = Snapshot(
+                version=version,
+                ranked=ranked,
+                pos_by_user={r["user_id"]: r["pos"] for r in ranked},
+                built_at=time.time(),
+                build_ms=build_ms,
+            )
+            self._snapshot = snap
+            self.rebuilds.append(build_ms)
+            return snap
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        snap = self._snapshot
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "last_build_ms": snap.build_ms if snap else None,
+            "avg_build_ms": sum(self.rebuilds) / len(self.rebuilds) if self.rebuilds else None,
+            "rows": len(snap.ranked) if snap else 0,
+            "version": snap.version if snap else None,
+            "built_at": snap.built_at if snap else None,
+        }
+
+    def reset_stats(self) -> None:
+        self.hits = self.misses = 0
+        self.rebuilds.clear()
+
+
+@st.cache_resource
+def leaderboard_cache() -> LeaderboardCache:
+    return LeaderboardCache()
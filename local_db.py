@@ -0,0 +1,806 @@
+# local_db.py
+"""
+Lokální náhrada Supabase nad SQLite (offline běh appky, benchmarky, zátěžové testy).
+
+Zapíná se v .env:
+
+    TIPOVACKA_BACKEND=sqlite
+    TIPOVACKA_SQLITE_PATH=tipovacka.db      # ":memory:" = jen v paměti procesu
+
+LocalClient umí to, co stránky volají na supabase klientovi:
+- table(...).select / insert / upsert(on_conflict) / update / delete
+- filtry eq, neq, gt, gte, lt, lte, in_, is_, like, ilike a not_.<filtr>
+- order (NULL jako v Postgresu), limit, range, single, maybe_single, count="exact"
+- rpc("apply_points_deltas"), rpc("claim_evaluation_job"), rpc("bump_table_versions"), rpc("leaderboard_slice")
+  – stejné chování jako sql/00x
+- auth: sign_up, sign_in_with_password, set_session, refresh_session, sign_out
+
+Chyby jsou postgrest.exceptions.APIError (stejné kódy jako PostgREST), odpověď má .data a .count
+a stejně jako PostgREST vrací max MAX_ROWS řádků na dotaz.
+RLS se neemuluje – lokální klient má práva service role.
+
+    python -m local_db --init                # založí tabulky
+    python -m local_db --admin jiri@o2.cz    # nastaví profiles.is_admin
+"""
+import argparse
+import base64
+import hashlib
+import json
+import os
+import secrets
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+from postgrest.exceptions import APIError
+
+from cache_bus import TRACKED_TABLES
+
+STALE_JOB_MESSAGE = "Worker přestal odpovídat – vyčerpané pokusy"
+DEFAULT_PATH = "tipovacka.db"
+MAX_ROWS = int(os.getenv("TIPOVACKA_SQLITE_MAX_ROWS", "1000"))
+TOKEN_TTL = 3600
+
+_NOW_SQL = "(strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now'))"
+
+# tabulka -> ([(sloupec, typ, default SQL nebo None)], primární klíč)
+# typy: uuid / text / int / bigserial / bool / json / timestamptz
+SCHEMA: dict[str, tuple[list[tuple[str, str, str | None]], tuple[str, ...]]] = {
+    "profiles": (
+        [
+            ("user_id", "uuid", None),
+            ("email", "text", None),
+            ("points", "int", "0"),
+            ("is_admin", "bool", "0"),
+            ("created_at", "timestamptz", _NOW_SQL),
+        ],
+        ("user_id",),
+    ),
+    "matches": (
+        [
+            ("id", "bigserial", None),
+            ("home_team", "text", None),
+            ("away_team", "text", None),
+            ("starts_at", "timestamptz", None),
+            ("final_home_score", "int", None),
+            ("final_away_score", "int", None),
+            ("evaluated_at", "timestamptz", None),
+            ("created_at", "timestamptz", _NOW_SQL),
+        ],
+        ("id",),
+    ),
+    "predictions": (
+        [
+            ("user_id", "uuid", None),
+            ("match_id", "int", None),
+            ("home_score", "int", None),
+            ("away_score", "int", None),
+            ("scorer_player_id", "uuid", None),
+            ("scorer_name", "text", None),
+            ("scorer_flag", "text", None),
+            ("scorer_team", "text", None),
+            ("points_awarded", "int", "0"),
+            ("points_detail", "json", None),
+            ("created_at", "timestamptz", _NOW_SQL),
+        ],
+        ("user_id", "match_id"),
+    ),
+    "players": (
+        [
+            ("id", "uuid", None),
+            ("team_name", "text", None),
+            ("full_name", "text", None),
+            ("role", "text", None),
+            ("club_name", "text", None),
+            ("country3", "text", None),
+            ("league_name", "text", None),
+            ("league_country3", "text", None),
+            ("source", "text", None),
+            ("created_by", "uuid", None),
+            ("created_at", "timestamptz", _NOW_SQL),
+        ],
+        ("id",),
+    ),
+    "scorer_results": (
+        [
+            ("match_id", "int", None),
+            ("scorer_player_id", "uuid", None),
+            ("scorer_name", "text", None),
+            ("scorer_team", "text", None),
+            ("did_score", "bool", "0"),
+        ],
+        ("match_id", "scorer_player_id"),
+    ),
+    "placement_events": (
+        [
+            ("id", "bigserial", None),
+            ("title", "text", None),
+            ("category", "text", None),
+            ("event_date", "timestamptz", None),
+            ("lock_at", "timestamptz", None),
+            ("correct_value", "text", None),
+            ("evaluated_at", "timestamptz", None),
+            ("created_at", "timestamptz", _NOW_SQL),
+        ],
+        ("id",),
+    ),
+    "placement_predictions": (
+        [
+            ("user_id", "uuid", None),
+            ("event_id", "int", None),
+            ("predicted_value", "text", None),
+            ("points_awarded", "int", "0"),
+            ("evaluated_at", "timestamptz", None),
+            ("created_at", "timestamptz", _NOW_SQL),
+        ],
+        ("user_id", "event_id"),
+    ),
+    "manual_points_log": (
+        [
+            ("id", "bigserial", None),
+            ("created_at", "timestamptz", _NOW_SQL),
+            ("admin_user_id", "uuid", None),
+            ("target_user_id", "uuid", None),
+            ("change_amount", "int", None),
+            ("old_points", "int", None),
+            ("new_points", "int", None),
+            ("reason", "text", None),
+        ],
+        ("id",),
+    ),
+    "points_breakdown": (
+        [
+            ("user_id", "uuid", None),
+            ("match_points", "int", "0"),
+            ("placement_points", "int", "0"),
+            ("manual_points", "int", "0"),
+            ("updated_at", "timestamptz", _NOW_SQL),
+        ],
+        ("user_id",),
+    ),
+    "evaluation_jobs": (
+        [
+            ("id", "bigserial", None),
+            ("kind", "text", None),
+            ("payload", "json", "'{}'"),
+            ("status", "text", "'queued'"),
+            ("progress", "int", "0"),
+            ("message", "text", None),
+            ("result", "json", None),
+            ("requested_by", "uuid", None),
+            ("created_at", "timestamptz", _NOW_SQL),
+            ("started_at", "timestamptz", None),
+            ("finished_at", "timestamptz", None),
+            ("heartbeat_at", "timestamptz", None),
+            ("attempts", "int", "0"),
+        ],
+        ("id",),
+    ),
+    "table_versions": (
+        [
+            ("table_name", "text", None),
+            ("version", "int", "0"),
+            ("updated_at", "timestamptz", _NOW_SQL),
+        ],
+        ("table_name",),
+    ),
+    # náhrada auth.users (jen pro lokální přihlášení)
+    "auth_users": (
+        [
+            ("id", "uuid", None),
+            ("email", "text", None),
+            ("password_hash", "text", None),
+            ("created_at", "timestamptz", _NOW_SQL),
+        ],
+        ("id",),
+    ),
+}
+
+_INDEXES = (
+    "create unique index if not exists auth_users_email_idx on auth_users (email)",
+    "create index if not exists predictions_match_idx on predictions (match_id)",
+    "create index if not exists players_team_idx on players (team_name)",
+    "create index if not exists placement_predictions_event_idx on placement_predictions (event_id)",
+    "create index if not exists manual_points_log_target_idx on manual_points_log (target_user_id)",
+    "create index if not exists evaluation_jobs_status_idx on evaluation_jobs (status, id)",
+    "create index if not exists profiles_points_idx on profiles (points desc, email)",
+)
+
+_SQL_TYPES = {"uuid": "TEXT", "text": "TEXT", "int": "INTEGER", "bool": "INTEGER", "json": "TEXT", "timestamptz": "TEXT"}
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _api_error(message: str, code: str, details: str | None = None) -> APIError:
+    return APIError({"message": message, "code": code, "hint": None, "details": details})
+
+
+def _column_ddl(name: str, typ: str, default: str | None) -> str:
+    col = f'"{name}" {_SQL_TYPES[typ]}'
+    if default is not None:
+        col += f" DEFAULT {default}"
+    return col
+
+
+def _ddl(table: str) -> str:
+    columns, pk = SCHEMA[table]
+    parts = []
+    for name, typ, default in columns:
+        if typ == "bigserial":
+            parts.append(f'"{name}" INTEGER PRIMARY KEY AUTOINCREMENT')
+            continue
+        parts.append(_column_ddl(name, typ, default))
+    if not any(typ == "bigserial" for _, typ, _ in columns):
+        parts.append("PRIMARY KEY (" + ", ".join(f'"{c}"' for c in pk) + ")")
+    return f'CREATE TABLE IF NOT EXISTS "{table}" (' + ", ".join(parts) + ")"
+
+
+# =====================
+# Databáze (sdílená v procesu)
+# =====================
+class LocalDatabase:
+    """Jedno SQLite spojení pro celý proces; dotazy se serializují zámkem (Streamlit sessions = vlákna)."""
+
+    def __init__(self, path: str = DEFAULT_PATH, max_rows: int = MAX_ROWS):
+        self.path = path
+        self.max_rows = max_rows
+        self.lock = threading.RLock()
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        if path != ":memory:":
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.types = {t: {name: typ for name, typ, _ in cols} for t, (cols, _) in SCHEMA.items()}
+        self.primary_keys = {t: pk for t, (_, pk) in SCHEMA.items()}
+        self.init_schema()
+
+    def init_schema(self) -> None:
+        with self.lock:
+            for table in SCHEMA:
+                self.conn.execute(_ddl(table))
+                # starší soubor: doplní sloupce přidané do SCHEMA později (jako "alter table add column if not exists")
+                existing = {r[1] for r in self.conn.execute(f'PRAGMA table_info("{table}")')}
+                for name, typ, default in SCHEMA[table][0]:
+                    if name not in existing:
+                        self.conn.execute(f'ALTER TABLE "{table}" ADD COLUMN {_column_ddl(name, typ, default)}')
+            for stmt in _INDEXES:
+                self.conn.execute(stmt)
+
+    def column_types(self, table: str) -> dict[str, str]:
+        types = self.types.get(table)
+        if types is None:
+            raise _api_error(f'relation "public.{table}" does not exist', "42P01")
+        return types
+
+    def encode(self, table: str, column: str, value):
+        typ = self.column_types(table).get(column)
+        if typ is None:
+            raise _api_error(f"Could not find the '{column}' column of '{table}' in the schema cache", "PGRST204")
+        if value is None:
+            return None
+        if typ == "json":
+            return json.dumps(value)
+        if typ == "bool":
+            if isinstance(value, str):
+                return 1 if value.lower() in ("true", "t", "1") else 0
+            return int(bool(value))
+        if typ in ("int", "bigserial") and isinstance(value, str) and value.lstrip("-").isdigit():
+            return int(value)
+        if typ in ("uuid", "text", "timestamptz") and not isinstance(value, str):
+            return str(value)
+        return value
+
+    def decode_row(self, table: str, row: sqlite3.Row) -> dict:
+        types = self.types[table]
+        out = {}
+        for key in row.keys():
+            value = row[key]
+            typ = types.get(key)
+            if value is not None and typ == "json":
+                value = json.loads(value)
+            elif value is not None and typ == "bool":
+                value = bool(value)
+            out[key] = value
+        return out
+
+    def run(self, sql: str, params: list) -> list[sqlite3.Row]:
+        with self.lock:
+            try:
+                return self.conn.execute(sql, params).fetchall()
+            except sqlite3.IntegrityError as e:
+                code = "23502" if "NOT NULL" in str(e) else "23505"
+                raise _api_error(str(e), code) from e
+            except sqlite3.OperationalError as e:
+                raise _api_error(str(e), "42703") from e
+
+    def transaction(self):
+        return _Transaction(self)
+
+
+class _Transaction:
+    def __init__(self, db: LocalDatabase):
+        self.db = db
+
+    def __enter__(self):
+        self.db.lock.acquire()
+        self.db.conn.execute("BEGIN IMMEDIATE")
+        return self.db
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            self.db.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        finally:
+            self.db.lock.release()
+        return False
+
+
+# =====================
+# Dotazy (napodobují postgrest request builder)
+# =====================
+def _parse_columns(db: LocalDatabase, table: str, columns: str) -> list[str]:
+    types = db.column_types(table)
+    names = [c.strip() for c in columns.split(",") if c.strip()]
+    if not names or names == ["*"]:
+        return list(types)
+    for name in names:
+        if name not in types:
+            raise _api_error(f"column {table}.{name} does not exist", "42703")
+    return names
+
+
+class LocalQuery:
+    def __init__(self, db: LocalDatabase, table: str):
+        self.db = db
+        self.table = table
+        self._op = "select"
+        self._columns = "*"
+        self._count: str | None = None
+        self._head = False
+        self._values: list[dict] = []
+        self._on_conflict: str | None = None
+        self._ignore_duplicates = False
+        self._filters: list[tuple[str, list]] = []
+        self._negate = False
+        self._order: list[tuple[str, bool]] = []
+        self._limit: int | None = None
+        self._offset = 0
+        self._single: str | None = None
+
+    # --- operace ---
+    def select(self, *columns: str, count: str | None = None, head: bool = False) -> "LocalQuery":
+        self._op = "select"
+        self._columns = ",".join(columns) if columns else "*"
+        self._count = count
+        self._head = head
+        return self
+
+    def insert(self, json, count: str | None = None, returning: str = "representation", upsert: bool = False, default_to_null: bool = True) -> "LocalQuery":
+        self._op = "upsert" if upsert else "insert"
+        self._values = list(json) if isinstance(json, list) else [json]
+        self._count = count
+        return self
+
+    def upsert(self, json, count: str | None = None, returning: str = "representation", ignore_duplicates: bool = False, on_conflict: str = "", default_to_null: bool = True) -> "LocalQuery":
+        self._op = "upsert"
+        self._values = list(json) if isinstance(json, list) else [json]
+        self._on_conflict = on_conflict or None
+        self._ignore_duplicates = ignore_duplicates
+        self._count = count
+        return self
+
+    def update(self, json: dict, count: str | None = None, returning: str = "representation") -> "LocalQuery":
+        self._op = "update"
+        self._values = [json]
+        self._count = count
+        return self
+
+    def delete(self, count: str | None = None, returning: str = "representation") -> "LocalQuery":
+        self._op = "delete"
+        self._count = count
+        return self
+
+    # --- filtry ---
+    @property
+    def not_(self) -> "LocalQuery":
+        self._negate = True
+        return self
+
+    def _add(self, sql: str, params: list) -> "LocalQuery":
+        if self._negate:
+            sql = f"NOT ({sql})"
+            self._negate = False
+        self._filters.append((sql, params))
+        return self
+
+    def _cmp(self, column: str, op: str, value) -> "LocalQuery":
+        return self._add(f'"{column}" {op} ?', [self.db.encode(self.table, column, value)])
+
+    def eq(self, column: str, value) -> "LocalQuery":
+        return self._cmp(column, "=", value)
+
+    def neq(self, column: str, value) -> "LocalQuery":
+        return self._cmp(column, "<>", value)
+
+    def gt(self, column: str, value) -> "LocalQuery":
+        return self._cmp(column, ">", value)
+
+    def gte(self, column: str, value) -> "LocalQuery":
+        return self._cmp(column, ">=", value)
+
+    def lt(self, column: str, value) -> "LocalQuery":
+        return self._cmp(column, "<", value)
+
+    def lte(self, column: str, value) -> "LocalQuery":
+        return self._cmp(column, "<=", value)
+
+    def like(self, column: str, pattern: str) -> "LocalQuery":
+        return self._add(f'"{column}" GLOB ?', [pattern.replace("%", "*").replace("_", "?")])
+
+    def ilike(self, column: str, pattern: str) -> "LocalQuery":
+        return self._add(f'"{column}" LIKE ?', [pattern])
+
+    def in_(self, column: str, values) -> "LocalQuery":
+        values = [self.db.encode(self.table, column, v) for v in values]
+        if not values:
+            return self._add("0", [])
+        return self._add(f'"{column}" IN ({", ".join("?" * len(values))})', values)
+
+    def is_(self, column: str, value) -> "LocalQuery":
+        self.db.encode(self.table, column, None)
+        v = str(value).lower()
+        if v in ("null", "none"):
+            return self._add(f'"{column}" IS NULL', [])
+        return self._add(f'"{column}" IS ?', [1 if v == "true" else 0])
+
+    # --- modifikátory ---
+    def order(self, column: str, *, desc: bool = False, nullsfirst: bool | None = None) -> "LocalQuery":
+        self.db.encode(self.table, column, None)
+        # Postgres: ASC → NULL na konci, DESC → NULL na začátku
+        self._order.append((column, desc, desc if nullsfirst is None else nullsfirst))
+        return self
+
+    def limit(self, size: int) -> "LocalQuery":
+        self._limit = int(size)
+        return self
+
+    def range(self, start: int, end: int) -> "LocalQuery":
+        self._offset = int(start)
+        self._limit = int(end) - int(start) + 1
+        return self
+
+    def single(self) -> "LocalQuery":
+        self._single = "single"
+        return self
+
+    def maybe_single(self) -> "LocalQuery":
+        self._single = "maybe"
+        return self
+
+    # --- SQL ---
+    def _where(self) -> tuple[str, list]:
+        if not self._filters:
+            return "", []
+        params: list = []
+        for _, p in self._filters:
+            params += p
+        return " WHERE " + " AND ".join(f"({sql})" for sql, _ in self._filters), params
+
+    def _order_sql(self) -> str:
+        parts = []
+        for column, desc, nullsfirst in self._order:
+            parts.append(f'"{column}" IS NULL {"DESC" if nullsfirst else "ASC"}, "{column}" {"DESC" if desc else "ASC"}')
+        return " ORDER BY " + ", ".join(parts) if parts else ""
+
+    def _count_rows(self, where: str, params: list) -> int:
+        return self.db.run(f'SELECT COUNT(*) FROM "{self.table}"{where}', params)[0][0]
+
+    def _select(self) -> tuple[list[dict], int | None]:
+        columns = _parse_columns(self.db, self.table, self._columns)
+        where, params = self._where()
+        count = self._count_rows(where, params) if self._count else None
+        if self._head:
+            return [], count
+
+        limit = self.db.max_rows if self._limit is None else min(self._limit, self.db.max_rows)
+        sql = (
+            f'SELECT {", ".join(chr(34) + c + chr(34) for c in columns)} FROM "{self.table}"{where}'
+            f"{self._order_sql()} LIMIT ? OFFSET ?"
+        )
+        rows = self.db.run(sql, params + [limit, self._offset])
+        return [self.db.decode_row(self.table, r) for r in rows], count
+
+    def _fill_defaults(self, row: dict) -> dict:
+        row = dict(row)
+        for col in self.db.primary_keys[self.table]:
+            if row.get(col) is None and self.db.types[self.table][col] == "uuid":
+                row[col] = str(uuid.uuid4())
+        return row
+
+    def _write(self) -> list[dict]:
+        types = self.db.column_types(self.table)
+        out: list[dict] = []
+        if self._op in ("insert", "upsert"):
+            target = [c.strip() for c in (self._on_conflict or ",".join(self.db.primary_keys[self.table])).split(",")]
+            keys = [k for k in dict.fromkeys(k for row in self._values for k in row)]
+            for row in self._values:
+                row = self._fill_defaults(row if self._op == "insert" else {k: row.get(k) for k in keys})
+                cols = list(row)
+                values = [self.db.encode(self.table, c, row[c]) for c in cols]
+                sql = (
+                    f'INSERT INTO "{self.table}" ({", ".join(chr(34) + c + chr(34) for c in cols)}) '
+                    f'VALUES ({", ".join("?" * len(cols))})'
+                )
+                if self._op == "upsert":
+                    updates = [c for c in cols if c not in target]
+                    sql += f' ON CONFLICT ({", ".join(chr(34) + c + chr(34) for c in target)}) '
+                    if updates and not self._ignore_duplicates:
+                        sql += "DO UPDATE SET " + ", ".join(f'"{c}" = excluded."{c}"' for c in updates)
+                    else:
+                        sql += "DO NOTHING"
+                out += self.db.run(sql + " RETURNING *", values)
+        elif self._op == "update":
+            values = self._values[0]
+            for c in values:
+                if c not in types:
+                    raise _api_error(f"Could not find the '{c}' column of '{self.table}' in the schema cache", "PGRST204")
+            where, params = self._where()
+            sets = ", ".join(f'"{c}" = ?' for c in values)
+            out = self.db.run(
+                f'UPDATE "{self.table}" SET {sets}{where} RETURNING *',
+                [self.db.encode(self.table, c, v) for c, v in values.items()] + params,
+            )
+        else:
+            where, params = self._where()
+            out = self.db.run(f'DELETE FROM "{self.table}"{where} RETURNING *', params)
+        return [self.db.decode_row(self.table, r) for r in out]
+
+    def execute(self) -> SimpleNamespace:
+        if self._op == "select":
+            data, count = self._select()
+        else:
+            with self.db.transaction():
+                data = self._write()
+            count = len(data) if self._count else None
+
+        if self._single:
+            if len(data) == 1:
+                data = data[0]
+            elif not data and self._single == "maybe":
+                data = None
+            else:
+                raise _api_error(
+                    "JSON object requested, multiple (or no) rows returned",
+                    "PGRST116",
+                    f"The result contains {len(data)} rows",
+                )
+        return SimpleNamespace(data=data, count=count)
+
+
+# =====================
+# RPC (zrcadlí funkce ze sql/)
+# =====================
+def _rpc_apply_points_deltas(db: LocalDatabase, params: dict) -> None:
+    from points import BREAKDOWN_COLUMNS
+
+    part = params.get("part")
+    column = BREAKDOWN_COLUMNS.get(part) if part else None
+    with db.transaction():
+        for uid, d in (params.get("deltas") or {}).items():
+            db.conn.execute("UPDATE profiles SET points = points + ? WHERE user_id = ?", [int(d), uid])
+            if column:
+                db.conn.execute(
+                    f'INSERT INTO points_breakdown (user_id, "{column}", updated_at) VALUES (?, ?, ?) '
+                    f'ON CONFLICT (user_id) DO UPDATE SET "{column}" = points_breakdown."{column}" + excluded."{column}", '
+                    "updated_at = excluded.updated_at",
+                    [uid, int(d), _now()],
+                )
+    return None
+
+
+def _rpc_claim_evaluation_job(db: LocalDatabase, params: dict) -> list[dict]:
+    # stejně jako sql/003: queued, nebo running s propadlým leasem (worker umřel)
+    lease = int(params.get("lease_seconds") or 900)
+    max_attempts = int(params.get("max_attempts") or 3)
+    now = datetime.now(timezone.utc)
+    cutoff = datetime.fromtimestamp(now.timestamp() - lease, timezone.utc).isoformat()
+    stale = "status = 'running' AND coalesce(heartbeat_at, started_at) < ?"
+    with db.transaction():
+        db.conn.execute(
+            f"UPDATE evaluation_jobs SET status = 'failed', message = ?, finished_at = ? WHERE {stale} AND attempts >= ?",
+            [STALE_JOB_MESSAGE, now.isoformat(), cutoff, max_attempts],
+        )
+        rows = db.conn.execute(
+            "UPDATE evaluation_jobs SET status = 'running', started_at = ?, heartbeat_at = ?, attempts = attempts + 1, "
+            "progress = 0, message = NULL "
+            f"WHERE id = (SELECT id FROM evaluation_jobs WHERE status = 'queued' OR ({stale}) ORDER BY id LIMIT 1) RETURNING *",
+            [now.isoformat(), now.isoformat(), cutoff],
+        ).fetchall()
+    return [db.decode_row("evaluation_jobs", r) for r in rows]
+
+
+def _rpc_bump_table_versions(db: LocalDatabase, params: dict) -> list[dict]:
+    # bez triggerů (sql/004) – verze zvyšuje jen appka po vlastním zápisu
+    with db.transaction():
+        rows = [
+            db.conn.execute(
+                "INSERT INTO table_versions (table_name, version, updated_at) VALUES (?, 1, ?) "
+                "ON CONFLICT (table_name) DO UPDATE SET version = table_versions.version + 1, "
+                "updated_at = excluded.updated_at RETURNING *",
+                [t, _now()],
+            ).fetchone()
+            for t in dict.fromkeys(params.get("tables") or [])
+            if t in TRACKED_TABLES
+        ]
+    return [db.decode_row("table_versions", r) for r in rows]
+
+
+def _rpc_leaderboard_slice(db: LocalDatabase, params: dict) -> list[dict]:
+    top_n = int(params.get("top_n") or 50)
+    radius = int(params.get("radius") or 5)
+    rows = db.run(
+        "WITH ranked AS ("
+        " SELECT user_id, email, coalesce(points, 0) AS points,"
+        " rank() OVER (ORDER BY coalesce(points, 0) DESC) AS rank,"
+        " row_number() OVER (ORDER BY coalesce(points, 0) DESC, email, user_id) AS pos,"
+        " count(*) OVER () AS total FROM profiles),"
+        " mine AS (SELECT pos FROM ranked WHERE user_id = ?)"
+        " SELECT * FROM ranked WHERE pos <= ?"
+        " OR pos BETWEEN (SELECT pos FROM mine) - ? AND (SELECT pos FROM mine) + ? ORDER BY pos",
+        [params.get("me"), top_n, radius, radius],
+    )
+    return [dict(r) for r in rows]
+
+
+RPCS = {
+    "apply_points_deltas": _rpc_apply_points_deltas,
+    "claim_evaluation_job": _rpc_claim_evaluation_job,
+    "bump_table_versions": _rpc_bump_table_versions,
+    "leaderboard_slice": _rpc_leaderboard_slice,
+}
+
+
+class _LocalRpc:
+    def __init__(self, db: LocalDatabase, name: str, params: dict):
+        self.db, self.name, self.params = db, name, params
+
+    def execute(self) -> SimpleNamespace:
+        fn = RPCS.get(self.name)
+        if fn is None:
+            raise _api_error(f"Could not find the function public.{self.name} in the schema cache", "PGRST202")
+        return SimpleNamespace(data=fn(self.db, self.params), count=None)
+
+
+# =====================
+# Auth
+# =====================
+def hash_password(password: str, salt: str | None = None) -> str:
+    salt = salt or secrets.token_hex(8)
+    digest = hashlib.pbkdf2_hmac("sha256", password.encode(), salt.encode(), 100_000).hex()
+    return f"{salt}${digest}"
+
+
+def _make_token(user_id: str, ttl: int = TOKEN_TTL) -> str:
+    """JWT tvar (header.payload.podpis) s sub/exp – podpis se lokálně neověřuje."""
+
+    def b64(obj: dict) -> str:
+        return base64.urlsafe_b64encode(json.dumps(obj, separators=(",", ":")).encode()).decode().rstrip("=")
+
+    payload = {"sub": user_id, "exp": int(time.time()) + ttl, "role": "authenticated"}
+    return f"{b64({'alg': 'none', 'typ': 'JWT'})}.{b64(payload)}.local"
+
+
+class LocalAuth:
+    def __init__(self, db: LocalDatabase):
+        self.db = db
+        self.session: SimpleNamespace | None = None
+
+    def _session_for(self, row: dict) -> SimpleNamespace:
+        user = SimpleNamespace(id=row["id"], email=row["email"])
+        session = SimpleNamespace(
+            access_token=_make_token(row["id"]),
+            refresh_token=f"{row['id']}.{secrets.token_hex(8)}",
+            expires_in=TOKEN_TTL,
+            expires_at=int(time.time()) + TOKEN_TTL,
+            token_type="bearer",
+            user=user,
+        )
+        self.session = session
+        return SimpleNamespace(user=user, session=session)
+
+    def _user(self, **where) -> dict | None:
+        q = LocalQuery(self.db, "auth_users").select("*")
+        for k, v in where.items():
+            q = q.eq(k, v)
+        return q.maybe_single().execute().data
+
+    def sign_up(self, credentials: dict) -> SimpleNamespace:
+        email = (credentials.get("email") or "").strip().lower()
+        if self._user(email=email):
+            raise _api_error("User already registered", "user_already_exists")
+        row = LocalQuery(self.db, "auth_users").insert(
+            {"email": email, "password_hash": hash_password(credentials.get("password") or "")}
+        ).execute().data[0]
+        return self._session_for(row)
+
+    def sign_in_with_password(self, credentials: dict) -> SimpleNamespace:
+        row = self._user(email=(credentials.get("email") or "").strip().lower())
+        if row:
+            salt = row["password_hash"].split("$", 1)[0]
+            if secrets.compare_digest(hash_password(credentials.get("password") or "", salt), row["password_hash"]):
+                return self._session_for(row)
+        raise _api_error("Invalid login credentials", "invalid_credentials")
+
+    def refresh_session(self, refresh_token: str | None = None) -> SimpleNamespace:
+        token = refresh_token or (self.session.refresh_token if self.session else "")
+        row = self._user(id=token.split(".", 1)[0]) if token else None
+        if not row:
+            raise _api_error("Invalid Refresh Token", "refresh_token_not_found")
+        return self._session_for(row)
+
+    def set_session(self, access_token: str, refresh_token: str) -> SimpleNamespace:
+        user_id = refresh_token.split(".", 1)[0]
+        row = self._user(id=user_id)
+        user = SimpleNamespace(id=user_id, email=row["email"] if row else None)
+        self.session = SimpleNamespace(access_token=access_token, refresh_token=refresh_token, user=user)
+        return SimpleNamespace(user=user, session=self.session)
+
+    def sign_out(self, options: dict | None = None) -> None:
+        self.session = None
+
+
+class _LocalPostgrest:
+    def auth(self, token: str) -> None:
+        pass
+
+
+class LocalClient:
+    """Lehký klient (jeden na Streamlit session) nad sdílenou LocalDatabase."""
+
+    def __init__(self, db: LocalDatabase):
+        self.db = db
+        self.auth = LocalAuth(db)
+        self.postgrest = _LocalPostgrest()
+
+    def table(self, name: str) -> LocalQuery:
+        return LocalQuery(self.db, name)
+
+    from_ = table
+
+    def rpc(self, fn: str, params: dict | None = None) -> _LocalRpc:
+        return _LocalRpc(self.db, fn, params or {})
+
+
+def sqlite_path() -> str:
+    return os.getenv("TIPOVACKA_SQLITE_PATH", DEFAULT_PATH)
+
+
+def connect(path: str | None = None) -> LocalClient:
+    """Klient nad novou LocalDatabase (skripty, worker, benchmarky)."""
+    return LocalClient(LocalDatabase(path or sqlite_path()))
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--path", default=None, help=f"soubor databáze (výchozí TIPOVACKA_SQLITE_PATH / {DEFAULT_PATH})")
+    ap.add_argument("--init", action="store_true", help="jen založí tabulky")
+    ap.add_argument("--admin", metavar="EMAIL", help="nastaví profiles.is_admin uživateli s tímto emailem")
+    args = ap.parse_args()
+
+    client = connect(args.path)
+    print(f"databáze: {client.db.path}")
+    if args.admin:
+        email = args.admin.strip().lower()
+        user = client.auth._user(email=email)
+        if not user:
+            raise SystemExit(f"Uživatel {email} neexistuje (nejdřív se zaregistruj v appce).")
+        client.table("profiles").upsert({"user_id": user["id"], "email": email, "is_admin": True}, on_conflict="user_id").execute()
+        print(f"admin ✅ {email}")
+
+
+if __name__ == "__main__":
+    main()
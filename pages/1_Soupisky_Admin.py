@@ -1,26 +1,20 @@
 # pages/1_Soupisky_Admin.py
-import os
-import re
+import io
+
 import streamlit as st
-from supabase import create_client
 from dotenv import load_dotenv
 
+from auth_guard import require_admin
+from db_client import get_supabase
+from roster_import import clean_name, detect_format, iter_file_players, parse_players, validate_players
+from rosters import apply_roster_diff, apply_roster_diffs, diff_roster, load_players_by_team, load_team_players
 from ui_layout import apply_o2_style, render_hero, card
 from ui_menu import render_top_menu
 
 load_dotenv()
 st.set_page_config(page_title="Admin – Soupisky", page_icon="🧾", layout="wide")
 
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_ANON_KEY = os.getenv("SUPABASE_ANON_KEY")
-if not SUPABASE_URL or not SUPABASE_ANON_KEY:
-    st.error("Chybí SUPABASE_URL nebo SUPABASE_ANON_KEY")
-    st.stop()
-
-supabase = create_client(SUPABASE_URL, SUPABASE_ANON_KEY)
-
-if st.session_state.get("access_token") and st.session_state.get("refresh_token"):
-    supabase.auth.set_session(st.session_state["access_token"], st.session_state["refresh_token"])
+supabase = get_supabase()
 
 apply_o2_style()
 
@@ -34,26 +28,8 @@ render_hero(
     image_path="assets/olymp.png",
 )
 
-if not user:
-    with card("🔐 Nepřihlášen"):
-        st.warning("Nejsi přihlášený.")
-        if st.button("➡️ Přihlášení", type="primary"):
-            st.switch_page("app.py")
-    st.stop()
-
-if not st.session_state.get("access_token") or not st.session_state.get("refresh_token"):
-    st.error("Chybí session tokeny. Odhlas se a přihlas znovu.")
-    st.stop()
-
-# admin check
-try:
-    prof = supabase.table("profiles").select("user_id, is_admin").eq("user_id", user["id"]).single().execute()
-    if not (prof.data or {}).get("is_admin"):
-        st.error("Tato stránka je jen pro admina.")
-        st.stop()
-except Exception as e:
-    st.error(f"Nelze ověřit admina: {e}")
-    st.stop()
+# jen admin (role z cache session)
+require_admin(supabase, user)
 
 COUNTRY3_TO_ISO2 = {
     "CAN": "CA", "USA": "US", "SWE": "SE", "FIN": "FI", "CZE": "CZ", "SVK": "SK", "RUS": "RU",
@@ -75,72 +51,6 @@ def flag_from_country3(code3: str | None) -> str:
     iso2 = COUNTRY3_TO_ISO2.get(code3.upper())
     return iso2_flag(iso2) if iso2 else "🏳️"
 
-def clean_name(x: str) -> str:
-    if not x:
-        return ""
-    return x.strip().lstrip(",").strip()
-
-def parse_player_item(item: str):
-    item = item.strip()
-    if not item:
-        return None
-
-    m = re.match(r"^(.*?)\s*\((.*?)\)\s*$", item)
-    if not m:
-        return None
-
-    name = clean_name(m.group(1))
-    inside = m.group(2)
-    parts = [p.strip() for p in inside.split(",") if p.strip()]
-
-    club_name = parts[0] if len(parts) >= 1 else ""
-    codes = [p for p in parts if re.fullmatch(r"[A-Z]{3}", p)]
-    country3 = codes[0] if codes else ""
-
-    rest = []
-    for p in parts[1:]:
-        if re.fullmatch(r"[A-Z]{3}", p):
-            continue
-        rest.append(p)
-    league_name = rest[0] if rest else ""
-
-    league_country3 = codes[1] if len(codes) >= 2 else country3
-
-    return {"full_name": name, "club_name": club_name, "country3": (country3 or "").upper(), "league_name": league_name, "league_country3": (league_country3 or "").upper()}
-
-def parse_players(text: str):
-    if not text:
-        return []
-    t = " ".join(text.replace("\n", " ").split())
-
-    def_section, fwd_section = "", ""
-    m_def = re.search(r"Defenders:\s*(.*?)(?:Forwards:|$)", t, flags=re.IGNORECASE)
-    if m_def:
-        def_section = m_def.group(1).strip()
-
-    m_fwd = re.search(r"Forwards:\s*(.*)$", t, flags=re.IGNORECASE)
-    if m_fwd:
-        fwd_section = m_fwd.group(1).strip()
-
-    def split_items(section_text: str):
-        if not section_text:
-            return []
-        raw = section_text.replace("),", ")|")
-        return [x.strip().strip(",") for x in raw.split("|") if x.strip()]
-
-    out = []
-
-    def add_section(section_text: str, role: str):
-        for item in split_items(section_text):
-            parsed = parse_player_item(item)
-            if not parsed:
-                continue
-            out.append({**parsed, "role": role})
-
-    add_section(def_section, "DEF")
-    add_section(fwd_section, "ATT")
-    return out
-
 with card("🧾 Vstup"):
     team_name = st.text_input("Název týmu (musí sedět s matches.home_team / matches.away_team)")
     uploaded = st.file_uploader("Nahraj obrázek soupisky (pro kontrolu)", type=["png", "jpg", "jpeg", "webp"])
@@ -167,8 +77,11 @@ with card("🔎 Náhled"):
                     st.write(f"- {p['full_name']} ({club}{lg_part}, {fl}) — {('Útočník' if p['role']=='ATT' else 'Obránce')}")
                 st.session_state["parsed_players_cache"] = parsed
 
-with card("💾 Uložení do DB"):
-    if st.button("Uložit", type="primary", use_container_width=True):
+ROLE_LABELS = {"ATT": "Útočník", "DEF": "Obránce"}
+DIFF_KEY = "roster_diff_cache"
+
+with card("💾 Uložení do DB", "Nejdřív porovnej s DB – uloží se jen noví, změnění a odebraní hráči (id zůstávají)."):
+    if st.button("🔍 Porovnat s DB", type="primary", use_container_width=True):
         if not team_name.strip():
             st.error("Vyplň team_name.")
             st.stop()
@@ -178,24 +91,131 @@ with card("💾 Uložení do DB"):
             st.error("Nemám co uložit (nejdřív Parse & náhled).")
             st.stop()
 
-        payload = []
-        for p in parsed:
-            payload.append({
-                "team_name": team_name.strip(),
-                "full_name": clean_name(p["full_name"]),
-                "role": p["role"],
-                "club_name": p.get("club_name") or None,
-                "country3": (p.get("country3") or "").upper() or None,
-                "league_name": p.get("league_name") or None,
-                "league_country3": (p.get("league_country3") or "").upper() or None,
-                "source": "upload_text",
-                "created_by": user_id,
-            })
-
         try:
-            supabase.table("players").delete().eq("team_name", team_name.strip()).execute()
-            supabase.table("players").insert(payload).execute()
-            st.success(f"Uloženo ✅ Soupiska '{team_name.strip()}' přepsána ({len(payload)} hráčů).")
-            st.session_state.pop("parsed_players_cache", None)
+            existing = load_team_players(supabase, team_name.strip())
+            incoming = [{**p, "full_name": clean_name(p["full_name"])} for p in parsed]
+            st.session_state[DIFF_KEY] = diff_roster(team_name.strip(), existing, incoming, created_by=user_id)
+        except Exception as e:
+            st.error(f"Načtení soupisky z DB selhalo: {e}")
+
+    diff = st.session_state.get(DIFF_KEY)
+    if diff is not None and diff.team_name == team_name.strip():
+        c1, c2, c3, c4 = st.columns(4)
+        c1.metric("➕ Noví", len(diff.inserts))
+        c2.metric("✏️ Změnění", len(diff.updates))
+        c3.metric("➖ Odebraní", len(diff.deletes))
+        c4.metric("= Beze změny", diff.unchanged)
+
+        if diff.inserts:
+            with st.expander(f"➕ Noví ({len(diff.inserts)})"):
+                st.dataframe(
+                    [{"Hráč": r["full_name"], "Role": ROLE_LABELS.get(r["role"], r["role"]), "Klub": r["club_name"]} for r in diff.inserts],
+                    use_container_width=True,
+                    hide_index=True,
+                )
+        if diff.updates:
+            with st.expander(f"✏️ Změnění ({len(diff.updates)})", expanded=True):
+                st.dataframe(
+                    [
+                        {"Hráč": u["full_name"], "Sloupec": col, "Teď": old, "Nově": new}
+                        for u in diff.updates
+                        for col, (old, new) in u["_changes"].items()
+                    ],
+                    use_container_width=True,
+                    hide_index=True,
+                )
+        if diff.deletes:
+            with st.expander(f"➖ Odebraní ({len(diff.deletes)})", expanded=True):
+                st.warning("Tipy na tyto hráče jako střelce zůstanou, ale hráč zmizí ze soupisky.")
+                st.dataframe(
+                    [{"Hráč": r["full_name"], "Role": ROLE_LABELS.get(r.get("role"), r.get("role"))} for r in diff.deletes],
+                    use_container_width=True,
+                    hide_index=True,
+                )
+
+        if diff.is_empty:
+            st.info("Soupiska v DB je stejná – není co ukládat.")
+        elif st.button("✅ Potvrdit a uložit změny", type="primary", use_container_width=True):
+            try:
+                res = apply_roster_diff(supabase, diff)
+                st.success(
+                    f"Uloženo ✅ '{diff.team_name}': +{res['inserted']} / ✏️ {res['updated']} / −{res['deleted']} "
+                    f"(beze změny {res['unchanged']}, zápisů {res['requests']})."
+                )
+                st.session_state.pop(DIFF_KEY, None)
+                st.session_state.pop("parsed_players_cache", None)
+            except Exception as e:
+                st.error(f"Uložení selhalo: {e}")
+
+# =====================
+# Hromadný import (všechny týmy ze souboru)
+# =====================
+BULK_KEY = "roster_bulk_cache"
+BULK_DIFF_KEY = "roster_bulk_diff_cache"
+
+with card(
+    "📦 Hromadný import (všechny týmy)",
+    "Text s řádky 'Team: …' (sekce Defenders/Forwards jako výše), CSV (team_name, full_name, role, club_name, …) nebo JSON.",
+):
+    bulk_file = st.file_uploader("Soubor se soupiskami", type=["txt", "csv", "json"], key="bulk_roster_file")
+
+    if bulk_file is not None and st.button("🔎 Načíst a zkontrolovat", use_container_width=True):
+        head = bulk_file.getvalue()[:200].decode("utf-8-sig", errors="ignore")
+        fmt = detect_format(bulk_file.name, head)
+        bulk_file.seek(0)
+        try:
+            lines = io.TextIOWrapper(bulk_file, encoding="utf-8-sig")
+            teams, errors = validate_players(iter_file_players(lines, fmt))
+            st.session_state[BULK_KEY] = {"file": bulk_file.name, "format": fmt, "teams": teams, "errors": errors}
+            st.session_state.pop(BULK_DIFF_KEY, None)
         except Exception as e:
-            st.error(f"Uložení selhalo: {e}")
\ No newline at end of file
+            st.error(f"Soubor nejde přečíst ({fmt}): {e}")
+
+    bulk = st.session_state.get(BULK_KEY)
+    if bulk and bulk_file is not None and bulk["file"] == bulk_file.name:
+        teams, errors = bulk["teams"], bulk["errors"]
+        st.success(f"Formát {bulk['format']}: {len(teams)} týmů, {sum(len(v) for v in teams.values())} hráčů.")
+        if errors:
+            with st.expander(f"⚠️ Chyby ({len(errors)}) – tyto řádky se přeskočí", expanded=True):
+                st.write("\n".join(f"- {e}" for e in errors[:200]))
+
+        if teams and st.button("🔍 Porovnat všechny týmy s DB", type="primary", use_container_width=True):
+            try:
+                existing = load_players_by_team(supabase, list(teams))
+                st.session_state[BULK_DIFF_KEY] = [
+                    diff_roster(t, existing.get(t, []), players, created_by=user_id, source="upload_file")
+                    for t, players in teams.items()
+                ]
+            except Exception as e:
+                st.error(f"Načtení soupisek z DB selhalo: {e}")
+
+        diffs = st.session_state.get(BULK_DIFF_KEY)
+        if diffs:
+            st.dataframe(
+                [
+                    {
+                        "Tým": d.team_name,
+                        "➕ Noví": len(d.inserts),
+                        "✏️ Změnění": len(d.updates),
+                        "➖ Odebraní": len(d.deletes),
+                        "= Beze změny": d.unchanged,
+                    }
+                    for d in diffs
+                ],
+                use_container_width=True,
+                hide_index=True,
+            )
+            changed = [d for d in diffs if not d.is_empty]
+            if not changed:
+                st.info("Všechny soupisky v DB jsou stejné – není co ukládat.")
+            elif st.button(f"✅ Potvrdit a uložit vše ({len(changed)} týmů)", type="primary", use_container_width=True):
+                try:
+                    res = apply_roster_diffs(supabase, changed)
+                    st.success(
+                        f"Uloženo ✅ {res['teams']} týmů: +{res['inserted']} / ✏️ {res['updated']} / −{res['deleted']} "
+                        f"(beze změny {res['unchanged']}, zápisů {res['requests']})."
+                    )
+                    st.session_state.pop(BULK_DIFF_KEY, None)
+                    st.session_state.pop(BULK_KEY, None)
+                except Exception as e:
+                    st.error(f"Uložení selhalo: {e}")
@@ -4,26 +4,20 @@ from datetime import datetime, timezone, date
 from zoneinfo import ZoneInfo
 
 import streamlit as st
-from supabase import create_client
 from dotenv import load_dotenv
 
+from cache_bus import MAX_AGE, table_version
+from db_client import get_supabase
+from db_read import fetch_parallel
+from predictions import prediction_row, save_prediction, save_predictions, scorer_fields, split_locked
+from rosters import load_roster_index, team_roster
 from ui_layout import apply_o2_style, render_hero, card
 from ui_menu import render_top_menu
 
 load_dotenv()
 st.set_page_config(page_title="Zápasy", page_icon="🏒", layout="wide")
 
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_ANON_KEY = os.getenv("SUPABASE_ANON_KEY")
-if not SUPABASE_URL or not SUPABASE_ANON_KEY:
-    st.error("Chybí SUPABASE_URL nebo SUPABASE_ANON_KEY v .env / Secrets")
-    st.stop()
-
-supabase = create_client(SUPABASE_URL, SUPABASE_ANON_KEY)
-
-# Session pro RLS
-if st.session_state.get("access_token") and st.session_state.get("refresh_token"):
-    supabase.auth.set_session(st.session_state["access_token"], st.session_state["refresh_token"])
+supabase = get_supabase()
 
 apply_o2_style()
 
@@ -33,7 +27,7 @@ render_top_menu(user, supabase=supabase, user_id=user_id)
 
 render_hero(
     "Zápasy",
-    "Tipuj výsledek a střelce. Klik na hráče uloží střelce okamžitě.",
+    "Tipuj výsledek a střelce celého dne a ulož vše jedním tlačítkem.",
     image_path="assets/olympic.jpeg",
 )
 
@@ -148,18 +142,20 @@ today = now.date()
 def day_label(d: date):
     return d.strftime("%d.%m.%Y")
 
-# ----- DB: matches -----
-matches_res = (
-    supabase.table("matches")
-    .select("id, home_team, away_team, starts_at, final_home_score, final_away_score, evaluated_at")
-    .order("starts_at")
-    .execute()
-)
-matches = matches_res.data or []
-if not matches:
-    with card("ℹ️ Info"):
-        st.info("V databázi nejsou žádné zápasy.")
-    st.stop()
+# ----- DB: matches + moje tipy + soupisky (souběžně) -----
+# zápasy jsou pro všechny stejné – sdílená cache do další změny tabulky matches (cache_bus)
+@st.cache_data(show_spinner=False, max_entries=4, ttl=MAX_AGE)
+def cached_matches(_supabase, version: tuple[int, ...]):
+    res = (
+        _supabase.table("matches")
+        .select("id, home_team, away_team, starts_at, final_home_score, final_away_score, evaluated_at")
+        .order("starts_at")
+        .execute()
+    )
+    return res.data or []
+
+def load_matches():
+    return cached_matches(supabase, table_version("matches"))
 
 def load_my_predictions():
     try:
@@ -180,7 +176,22 @@ def load_my_predictions():
         )
         return res.data or []
 
-preds = load_my_predictions()
+# ✅ nezávislé dotazy najednou – rerun čeká na nejpomalejší, ne na součet
+# (soupisky: jeden dotaz na players, sdílená cache – smaže ji Soupisky Admin při uložení)
+loaded = fetch_parallel(
+    {
+        "matches": load_matches,
+        "preds": load_my_predictions,
+        "rosters": lambda: load_roster_index(supabase),
+    }
+)
+matches = loaded["matches"]
+if not matches:
+    with card("ℹ️ Info"):
+        st.info("V databázi nejsou žádné zápasy.")
+    st.stop()
+
+preds = loaded["preds"]
 pred_by_match = {p["match_id"]: p for p in preds}
 
 # ✅ FIX: grouping do dnů podle lokálního času (Europe/Prague),
@@ -201,45 +212,63 @@ future_days = [d for d in days_sorted if d >= today]
 past_days = [d for d in days_sorted if d < today]
 
 OPEN_DAY_KEY = "open_day"
+# Vykreslovat karty jen u otevřeného dne (TIPOVACKA_LAZY_DAYS=0 vrátí původní chování – vše ve expanderech)
+LAZY_DAYS = os.getenv("TIPOVACKA_LAZY_DAYS", "1") != "0"
+
+roster_index = loaded["rosters"]
+
+def remember_prediction(match_id: str, fields: dict):
+    # ✅ po uložení jen upravíme lokální stav – karta se překreslí sama (fragment), bez nového načítání
+    pred_by_match[match_id] = {**pred_by_match.get(match_id, {}), "match_id": match_id, **fields}
+
+# ----- Rozepsané tipy (draft) -----
+# Skóre i vybraný střelec se drží v session_state, dokud je uživatel neuloží
+# (jeden zápas nebo celý den najednou – hromadný upsert, predictions.py).
+DRAFTS_KEY = f"tip_drafts_{user_id}"
+SAVE_MSG_KEY = "tip_save_msg"
+
+def drafts() -> dict:
+    return st.session_state.setdefault(DRAFTS_KEY, {})
+
+def set_draft(match_id: str, **fields):
+    drafts().setdefault(match_id, {}).update(fields)
+
+def draft_for(match_id: str) -> dict:
+    """Uložený tip překrytý rozepsanými změnami: {home_score, away_score, scorer_*}."""
+    saved = pred_by_match.get(match_id, {})
+    base = {
+        "home_score": int(saved.get("home_score", 0) or 0),
+        "away_score": int(saved.get("away_score", 0) or 0),
+        **scorer_fields(saved),
+    }
+    return {**base, **drafts().get(match_id, {})}
 
-@st.cache_data(ttl=120)
-def load_players_for_team(team_name: str):
-    try:
-        res = (
-            supabase.table("players")
-            .select("id, team_name, full_name, role, club_name, country3, league_country3")
-            .eq("team_name", team_name)
-            .order("role")
-            .order("full_name")
-            .execute()
-        )
-        return res.data or []
-    except Exception:
-        try:
-            res = (
-                supabase.table("players")
-                .select("team_name, full_name, role")
-                .eq("team_name", team_name)
-                .order("role")
-                .execute()
-            )
-            return res.data or []
-        except Exception:
-            return []
-
-def upsert_base_prediction(match_id: str, home_score: int, away_score: int):
-    supabase.table("predictions").upsert(
-        {"user_id": user_id, "match_id": match_id, "home_score": int(home_score), "away_score": int(away_score)},
-        on_conflict="user_id,match_id"
-    ).execute()
-
-def update_scorer(match_id: str, scorer_payload: dict):
-    supabase.table("predictions").update(scorer_payload).eq("user_id", user_id).eq("match_id", match_id).execute()
-
-def save_scorer(match_id: str, player: dict, team_name: str, match_day: date):
-    current_home = int(st.session_state.get(f"h_{match_id}", pred_by_match.get(match_id, {}).get("home_score", 0) or 0))
-    current_away = int(st.session_state.get(f"a_{match_id}", pred_by_match.get(match_id, {}).get("away_score", 0) or 0))
-
+def is_dirty(match_id: str) -> bool:
+    d = drafts().get(match_id)
+    if not d:
+        return False
+    saved = pred_by_match.get(match_id)
+    return saved is None or any(saved.get(k) != v for k, v in d.items())
+
+def sync_score_draft(match_id: str):
+    # on_change number_inputu → do draftu (hodnota přežije zavření dne i překreslení fragmentu)
+    current = draft_for(match_id)
+    set_draft(
+        match_id,
+        home_score=int(st.session_state.get(f"h_{match_id}", current["home_score"])),
+        away_score=int(st.session_state.get(f"a_{match_id}", current["away_score"])),
+    )
+
+def draft_row(match_id: str) -> dict:
+    d = draft_for(match_id)
+    return prediction_row(user_id, match_id, d["home_score"], d["away_score"], scorer_fields(d))
+
+def mark_saved(rows: list[dict]):
+    for row in rows:
+        remember_prediction(row["match_id"], row)
+        drafts().pop(row["match_id"], None)
+
+def pick_scorer(match_id: str, player: dict, team_name: str, match_day: date):
     full_name = clean_name(safe_get(player, "full_name", "Neznámý hráč"))
     raw_player_id = safe_get(player, "id")
     scorer_player_id = str(raw_player_id) if is_uuid(raw_player_id) else None
@@ -251,15 +280,10 @@ def save_scorer(match_id: str, player: dict, team_name: str, match_day: date):
         "scorer_team": team_name,
     }
 
-    try:
-        upsert_base_prediction(match_id, current_home, current_away)
-        update_scorer(match_id, scorer_payload)
-        st.session_state[OPEN_DAY_KEY] = match_day.isoformat()
-        st.success(f"Střelec uložen ✅ {scorer_payload['scorer_flag']} {full_name}")
-        st.rerun()
-    except Exception as e:
-        st.error("Uložení střelce selhalo:")
-        st.code(str(e))
+    # ✅ jen do draftu – uloží se s tipem (💾 Uložit tip / Uložit celý den)
+    set_draft(match_id, **scorer_payload)
+    st.session_state[OPEN_DAY_KEY] = match_day.isoformat()
+    st.rerun(scope="fragment")
 
 def player_label(p: dict):
     full_name = clean_name(safe_get(p, "full_name", "Neznámý hráč"))
@@ -269,12 +293,12 @@ def player_label(p: dict):
     return f"{full_name}\n({club} {cf})"
 
 def render_team_players_full(team_name: str, match_id: str, side: str, match_day: date):
-    players = load_players_for_team(team_name)
-    atts = [p for p in players if safe_get(p, "role") == "ATT"]
-    defs = [p for p in players if safe_get(p, "role") == "DEF"]
+    roster = team_roster(roster_index, team_name)
+    atts = roster["ATT"]
+    defs = roster["DEF"]
 
-    # Aktuální střelec pro tento zápas
-    current_scorer_name = pred_by_match.get(match_id, {}).get("scorer_name")
+    # Aktuální střelec pro tento zápas (i rozepsaný)
+    current_scorer_name = draft_for(match_id).get("scorer_name")
 
     # Klíč pro čekající potvrzení (uložen v session_state)
     confirm_key = f"confirm_scorer_{match_id}"
@@ -290,10 +314,10 @@ def render_team_players_full(team_name: str, match_id: str, side: str, match_day
                     "team_name": tm,
                     "match_day": match_day,
                 }
-                st.rerun()
+                st.rerun(scope="fragment")
             else:
-                # Žádný střelec → uložit rovnou
-                save_scorer(match_id, p, tm, match_day)
+                # Žádný střelec → rovnou do draftu
+                pick_scorer(match_id, p, tm, match_day)
 
     st.markdown(f"**{team_flag(team_name)} {team_name}**")
     st.markdown("**Útočníci:**")
@@ -323,8 +347,8 @@ def render_scorers_section(match_id: str, home_team: str, away_team: str, match_
         pending = st.session_state[confirm_key]
         new_name = clean_name(safe_get(pending["player"], "full_name", "Neznamy hrac"))
         new_flag = team_flag(pending["team_name"])
-        current_scorer_name = pred_by_match.get(match_id, {}).get("scorer_name")
-        old_flag = pred_by_match.get(match_id, {}).get("scorer_flag", "🏳️")
+        current_scorer_name = draft_for(match_id).get("scorer_name")
+        old_flag = draft_for(match_id).get("scorer_flag") or "🏳️"
 
         st.markdown(
             f"""
@@ -346,11 +370,11 @@ def render_scorers_section(match_id: str, home_team: str, away_team: str, match_
         with col_yes:
             if st.button("✅ Potvrdit změnu", key=f"confirm_yes_{match_id}", type="primary", use_container_width=True):
                 p_pending = st.session_state.pop(confirm_key)
-                save_scorer(p_pending["match_id"], p_pending["player"], p_pending["team_name"], p_pending["match_day"])
+                pick_scorer(p_pending["match_id"], p_pending["player"], p_pending["team_name"], p_pending["match_day"])
         with col_no:
             if st.button("❌ Zrušit", key=f"confirm_no_{match_id}", use_container_width=True):
                 del st.session_state[confirm_key]
-                st.rerun()
+                st.rerun(scope="fragment")
         return  # Hrace nezobrazuj, dokud uzivatel nerozhodne
 
     left, right = st.columns(2)
@@ -359,6 +383,9 @@ def render_scorers_section(match_id: str, home_team: str, away_team: str, match_
     with right:
         render_team_players_full(away_team, match_id, side="away", match_day=match_day)
 
+# ✅ každá karta je samostatný fragment: klik v ní přepočítá a překreslí jen ji,
+# ne celou stránku (počítadlo "Natipováno x/y" u dne se srovná při dalším plném rerunu)
+@st.fragment
 def match_card(m: dict):
     match_id = m["id"]
 
@@ -376,6 +403,8 @@ def match_card(m: dict):
     scorer_name = p.get("scorer_name")
     scorer_flag = p.get("scorer_flag")
     scorer_team = p.get("scorer_team")
+    draft = draft_for(match_id)
+    dirty = is_dirty(match_id)
 
     with card(
         f"{team_flag(m['home_team'])} {m['home_team']}  vs  {team_flag(m['away_team'])} {m['away_team']}",
@@ -386,8 +415,8 @@ def match_card(m: dict):
         else:
             st.markdown("**Střelec:** —")
 
-        # ✅ porovnání pro lock podle UTC
-        if dt_utc <= now:
+        # ✅ porovnání pro lock podle UTC (čerstvý čas – fragment se může přerenderovat později než stránka)
+        if dt_utc <= datetime.now(timezone.utc):
             final_home = m.get("final_home_score")
             final_away = m.get("final_away_score")
             evaluated_at = m.get("evaluated_at")
@@ -431,72 +460,116 @@ def match_card(m: dict):
         st.markdown("### 📝 Tip na výsledek")
         c1, c2, c3 = st.columns([1, 1, 1.1], vertical_alignment="bottom")
 
-        default_home = int(p.get("home_score", 0) or 0)
-        default_away = int(p.get("away_score", 0) or 0)
-
         with c1:
-            home_score = st.number_input(f"{m['home_team']} (góly)", 0, 30, default_home, key=f"h_{match_id}")
+            st.number_input(
+                f"{m['home_team']} (góly)", 0, 30, draft["home_score"], key=f"h_{match_id}",
+                on_change=sync_score_draft, args=(match_id,),
+            )
         with c2:
-            away_score = st.number_input(f"{m['away_team']} (góly)", 0, 30, default_away, key=f"a_{match_id}")
+            st.number_input(
+                f"{m['away_team']} (góly)", 0, 30, draft["away_score"], key=f"a_{match_id}",
+                on_change=sync_score_draft, args=(match_id,),
+            )
 
         with c3:
             if st.button("💾 Uložit tip", key=f"save_{match_id}", type="primary", use_container_width=True):
-                try:
-                    upsert_base_prediction(match_id, int(home_score), int(away_score))
-
-                    # zachovej střelce
-                    if p.get("scorer_name"):
-                        try:
-                            update_scorer(match_id, {
-                                "scorer_player_id": p.get("scorer_player_id"),
-                                "scorer_name": p.get("scorer_name"),
-                                "scorer_flag": p.get("scorer_flag"),
-                                "scorer_team": p.get("scorer_team"),
-                            })
-                        except Exception:
-                            pass
-
-                    st.session_state[OPEN_DAY_KEY] = match_day.isoformat()
-                    st.success("Tip uložen ✅")
-                    st.rerun()
-                except Exception as e:
-                    st.error("Uložení tipu selhalo:")
-                    st.code(str(e))
+                # ✅ lock čerstvě – karta mohla být vykreslená ještě před začátkem zápasu
+                if m["_dt"] <= datetime.now(timezone.utc):
+                    st.error("Zápas už začal – tip nejde uložit.")
+                else:
+                    try:
+                        # ✅ jeden upsert – tip i střelec z draftu
+                        d = draft_for(match_id)
+                        row = save_prediction(supabase, user_id, match_id, d["home_score"], d["away_score"], scorer_fields(d))
+                        mark_saved([row])
+                        st.session_state[OPEN_DAY_KEY] = match_day.isoformat()
+                        st.rerun(scope="fragment")
+                    except Exception as e:
+                        st.error("Uložení tipu selhalo:")
+                        st.code(str(e))
+
+        if dirty:
+            st.caption("✏️ Neuložené změny – ulož tip, nebo celý den tlačítkem pod zápasy.")
 
         st.markdown("### ⚽ Tip na střelce")
-        if scorer_name:
+        if draft.get("scorer_name") and draft.get("scorer_name") != scorer_name:
+            st.markdown(f"✏️ **Vybraný (neuložený):** {draft.get('scorer_flag') or '🏳️'} {draft['scorer_name']} ({draft.get('scorer_team')})")
+        elif scorer_name:
             st.markdown(f"✅ **Zvolený:** {scorer_flag or '🏳️'} {scorer_name} ({scorer_team})")
         else:
             st.caption("Zatím nevybrán žádný střelec.")
 
-        st.info("Klik na hráče = okamžité uložení střelce.")
+        st.info("Klik na hráče = výběr střelce, uloží se spolu s tipem.")
         render_scorers_section(match_id, m["home_team"], m["away_team"], match_day=match_day)
 
+def save_day(d: date):
+    """Všechny rozepsané tipy dne jedním hromadným upsertem; zápasy, které už začaly, se přeskočí."""
+    rows = [draft_row(mm["id"]) for mm in by_day[d] if is_dirty(mm["id"])]
+    if not rows:
+        st.session_state[SAVE_MSG_KEY] = ("info", "Žádné neuložené změny.")
+        return
+    open_rows, locked = split_locked(rows, {mm["id"]: mm["_dt"] for mm in by_day[d]})
+    try:
+        save_predictions(supabase, open_rows)
+    except Exception as e:
+        st.session_state[SAVE_MSG_KEY] = ("error", f"Uložení tipů selhalo: {e}")
+        return
+    mark_saved(open_rows)
+    msg = f"Uloženo tipů: {len(open_rows)} ✅"
+    if locked:
+        by_id = {mm["id"]: mm for mm in by_day[d]}
+        names = ", ".join(f"{by_id[r['match_id']]['home_team']} – {by_id[r['match_id']]['away_team']}" for r in locked)
+        for r in locked:
+            drafts().pop(r["match_id"], None)
+        st.session_state[SAVE_MSG_KEY] = ("warning", f"{msg} • Už začaly, neuloženo: {names}")
+    else:
+        st.session_state[SAVE_MSG_KEY] = ("success", msg)
+
+def render_day(d: date):
+    ms = by_day[d]
+    total = len(ms)
+    done = sum(1 for mm in ms if mm["id"] in pred_by_match)
+    dirty = sum(1 for mm in ms if is_dirty(mm["id"]))
+    day_key = d.isoformat()
+    is_open = st.session_state.get(OPEN_DAY_KEY) == day_key
+    header = f"{day_label(d)} • Natipováno {done}/{total}" + (f" • ✏️ neuloženo {dirty}" if dirty else "")
+
+    # ✅ lazy: zavřený den je jen hlavička – karty a tlačítka hráčů se nestaví ani neposílají do prohlížeče
+    if LAZY_DAYS and not is_open:
+        if st.button(f"▸ {header}", key=f"open_day_{day_key}", type="secondary", use_container_width=True):
+            st.session_state[OPEN_DAY_KEY] = day_key
+            st.rerun()
+        return
+
+    with st.expander(header, expanded=is_open):
+        for mm in ms:
+            match_card(mm)
+
+        # mimo fragmenty karet → plný rerun, hlavička dne i počty se srovnají
+        if any(mm["_dt"] > now for mm in ms):
+            if st.button("💾 Uložit celý den", key=f"save_day_{day_key}", type="primary", use_container_width=True):
+                save_day(d)
+                st.session_state[OPEN_DAY_KEY] = day_key
+                st.rerun()
+            if is_open and (msg := st.session_state.pop(SAVE_MSG_KEY, None)):
+                getattr(st, msg[0])(msg[1])
+
+        # lazy: sbalení expanderu je jen v prohlížeči – zavřený den se přestane stavět až po tomhle
+        if LAZY_DAYS and st.button("▴ Zavřít den", key=f"close_day_{day_key}", use_container_width=True):
+            st.session_state.pop(OPEN_DAY_KEY, None)
+            st.rerun()
+
 # ----- UI -----
 with card("📅 Nadcházející zápasy", "Rozklikni den a natipuj vše před začátkem."):
     if not future_days:
         st.info("Žádné nadcházející dny.")
     else:
         for d in future_days:
-            ms = by_day[d]
-            total = len(ms)
-            done = sum(1 for mm in ms if mm["id"] in pred_by_match)
-            day_key = d.isoformat()
-            is_open = st.session_state.get(OPEN_DAY_KEY) == day_key
-            with st.expander(f"{day_label(d)} • Natipováno {done}/{total}", expanded=is_open):
-                for mm in ms:
-                    match_card(mm)
+            render_day(d)
 
 with card("🕘 Odehrané", "Pouze náhled. Tipování je uzavřené."):
     if not past_days:
         st.info("Zatím nic odehraného.")
     else:
         for d in reversed(past_days):
-            ms = by_day[d]
-            total = len(ms)
-            done = sum(1 for mm in ms if mm["id"] in pred_by_match)
-            day_key = d.isoformat()
-            is_open = st.session_state.get(OPEN_DAY_KEY) == day_key
-            with st.expander(f"{day_label(d)} • Natipováno {done}/{total}", expanded=is_open):
-                for mm in ms:
-                    match_card(mm)
\ No newline at end of file
+            render_day(d)
@@ -1,29 +1,19 @@
 # pages/3_Leaderboard.py
-import os
 import streamlit as st
-from supabase import create_client
 from dotenv import load_dotenv
 
+from auth_guard import is_admin as resolve_is_admin
+from db_client import get_supabase
+from cache_bus import table_version
+from leaderboard import RADIUS, TOP_N, display_name, leaderboard_cache, load_slice
+from points import load_points_breakdown, sum_points_by_user
 from ui_layout import apply_o2_style, render_hero, card
 from ui_menu import render_top_menu
 
 load_dotenv()
 st.set_page_config(page_title="Leaderboard", page_icon="🏆", layout="wide")
 
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_ANON_KEY = os.getenv("SUPABASE_ANON_KEY")
-if not SUPABASE_URL or not SUPABASE_ANON_KEY:
-    st.error("Chybí SUPABASE_URL nebo SUPABASE_ANON_KEY")
-    st.stop()
-
-supabase = create_client(SUPABASE_URL, SUPABASE_ANON_KEY)
-
-# Session pro RLS (stejný pattern jako jinde)
-if st.session_state.get("access_token") and st.session_state.get("refresh_token"):
-    supabase.auth.set_session(
-        st.session_state["access_token"],
-        st.session_state["refresh_token"],
-    )
+supabase = get_supabase()
 
 apply_o2_style()
 
@@ -45,96 +35,51 @@ if not user:
             st.switch_page("app.py")
     st.stop()
 
-# --- Načti profily (toto musí být povolené pro všechny) ---
+TOP_CHOICES = (10, 25, TOP_N, 100, 250)
+
+# --- Pořadí: top N + okno kolem mě ze sdíleného snapshotu (leaderboard.py) ---
+# snapshot se staví jednou po změně bodů (verze profiles – cache_bus), pak ho čtou všechny sessions
+# volba počtu je až u tabulky; hodnota z minulého rerunu je v session_state
+top_n = int(st.session_state.get("lb_top_n", TOP_N))
 try:
-    prof_res = supabase.table("profiles").select("user_id, email, points, is_admin").execute()
-    profiles = prof_res.data or []
-except Exception as e:
-    st.error(f"Nelze načíst profiles: {e}")
-    st.stop()
+    lb = leaderboard_cache().get(supabase, table_version("profiles")).slice(user_id, top_n=top_n, radius=RADIUS)
+except Exception:
+    try:
+        lb = load_slice(supabase, user_id, top_n=top_n, radius=RADIUS)
+    except Exception as e:
+        st.error(f"Nelze načíst leaderboard: {e}")
+        st.stop()
 
-if not profiles:
+if not lb.total:
     with card("ℹ️ Info"):
         st.info("Zatím nejsou žádní uživatelé v profiles.")
     st.stop()
 
-# zjisti, zda jsem admin
-me = next((p for p in profiles if p.get("user_id") == user_id), None)
-is_admin = bool((me or {}).get("is_admin", False))
-
-# ---------- PRO VŠECHNY: leaderboard podle profiles.points ----------
-rows = []
-for p in profiles:
-    uid = p.get("user_id")
-    if not uid:
-        continue
-    rows.append({
-        "user_id": uid,
-        "email": p.get("email") or "—",
-        "total": int(p.get("points") or 0),  # ✅ SOUČET = profiles.points
-    })
-
-rows.sort(key=lambda x: (-x["total"], x["email"]))
-
-# ---------- ADMIN: dopočítej rozpad (zápasy/umístění/manuální) ----------
+# zjisti, zda jsem admin (role z cache session – auth_guard)
+is_admin = resolve_is_admin(supabase, user)
+shown = lb.top + lb.around
+
+# ---------- ADMIN: rozpad (zápasy/umístění/manuální) jen pro zobrazené řádky ----------
+# ✅ jeden malý dotaz na udržovanou tabulku points_breakdown (sql/002);
+# když ještě neexistuje, dopočítá se ze zdrojových tabulek jako dřív
 match_sum = {}
 place_sum = {}
 manual_sum = {}
 
 if is_admin:
-    user_ids = [r["user_id"] for r in rows]
+    shown_ids = [r["user_id"] for r in shown]
+    breakdown = load_points_breakdown(supabase, shown_ids)
+    if breakdown is None:
+        try:
+            breakdown = sum_points_by_user(supabase, shown_ids)
+        except Exception as e:
+            st.warning(f"Rozpad bodů se nepodařilo načíst: {e}")
+            breakdown = {}
 
-    match_sum = {uid: 0 for uid in user_ids}
-    place_sum = {uid: 0 for uid in user_ids}
-    manual_sum = {uid: 0 for uid in user_ids}
-
-    try:
-        preds = (
-            supabase.table("predictions")
-            .select("user_id, points_awarded")
-            .in_("user_id", user_ids)
-            .execute()
-            .data
-            or []
-        )
-        for r in preds:
-            uid = r.get("user_id")
-            if uid in match_sum:
-                match_sum[uid] += int(r.get("points_awarded") or 0)
-    except Exception:
-        pass
-
-    try:
-        pp = (
-            supabase.table("placement_predictions")
-            .select("user_id, points_awarded")
-            .in_("user_id", user_ids)
-            .execute()
-            .data
-            or []
-        )
-        for r in pp:
-            uid = r.get("user_id")
-            if uid in place_sum:
-                place_sum[uid] += int(r.get("points_awarded") or 0)
-    except Exception:
-        pass
-
-    try:
-        logs = (
-            supabase.table("manual_points_log")
-            .select("target_user_id, change_amount")
-            .in_("target_user_id", user_ids)
-            .execute()
-            .data
-            or []
-        )
-        for r in logs:
-            uid = r.get("target_user_id")
-            if uid in manual_sum:
-                manual_sum[uid] += int(r.get("change_amount") or 0)
-    except Exception:
-        pass
+    for uid, parts in breakdown.items():
+        match_sum[uid] = parts["match"]
+        place_sum[uid] = parts["placement"]
+        manual_sum[uid] = parts["manual"]
 
 
 # --- ADMIN box (jen pro adminy) ---
@@ -155,23 +100,18 @@ if is_admin:
                 st.switch_page("pages/5_Admin_Sync_Points.py")
 
 
-# --- HLAVNÍ TABULKA ---
-with card("🏆 Pořadí"):
-    table_rows = []
-    for i, r in enumerate(rows, start=1):
-        email_display = r["email"]
-        if i == 1:
-            email_display = f"🥇 {email_display}"
-        elif i == 2:
-            email_display = f"🥈 {email_display}"
-        elif i == 3:
-            email_display = f"🥉 {email_display}"
+def table_rows(rows: list[dict]) -> list[dict]:
+    out = []
+    for r in rows:
+        name = r.get("display") or display_name(r)
+        if r["user_id"] == user_id:
+            name = f"👉 {name}"
 
         # ✅ PRO VŠECHNY (admin i neadmin) = profiles.points
         base = {
-            "#": i,
-            "Uživatel": email_display,
-            "Body celkem": r["total"],  # ✅ profiles.points = zápasy + umístění + manuální
+            "#": r["rank"],
+            "Uživatel": name,
+            "Body celkem": r["points"],  # ✅ profiles.points = zápasy + umístění + manuální
         }
 
         # ✅ ADMIN vidí navíc rozpad pro kontrolu
@@ -181,24 +121,41 @@ with card("🏆 Pořadí"):
             base["└─ Umístění"] = int(place_sum.get(uid, 0))
             base["└─ Manuální"] = int(manual_sum.get(uid, 0))
 
-        table_rows.append(base)
+        out.append(base)
+    return out
+
 
-    st.dataframe(table_rows, use_container_width=True, hide_index=True)
+# --- MOJE POZICE ---
+with card("📍 Moje pozice"):
+    if lb.me is None:
+        st.info("V pořadí zatím nejsi (chybí profil).")
+    else:
+        c1, c2 = st.columns(2)
+        c1.metric("Místo", f"{lb.me['rank']}. z {lb.total}")
+        c2.metric("Body", lb.me["points"])
+        if lb.around:
+            st.caption(f"Okolí (±{RADIUS})")
+            st.dataframe(table_rows(lb.around), use_container_width=True, hide_index=True)
+
+# --- HLAVNÍ TABULKA ---
+with card(f"🏆 Top {len(lb.top)} z {lb.total}"):
+    st.selectbox("Zobrazit prvních", TOP_CHOICES, index=TOP_CHOICES.index(top_n) if top_n in TOP_CHOICES else 0, key="lb_top_n")
+    st.dataframe(table_rows(lb.top), use_container_width=True, hide_index=True)
 
 # --- Debug jen pro admina ---
 if is_admin:
     with st.expander("🔍 Debug (kontrola součtu)"):
-        st.caption("Porovnání: profiles.points vs. (zápasy+umístění+manuální).")
+        st.caption("Porovnání zobrazených řádků: profiles.points vs. (zápasy+umístění+manuální). Všechny uživatele kontroluje Sync bodů.")
         dbg = []
-        for r in rows:
+        for r in shown:
             uid = r["user_id"]
             parts = int(match_sum.get(uid, 0)) + int(place_sum.get(uid, 0)) + int(manual_sum.get(uid, 0))
             dbg.append({
                 "email": r["email"],
-                "profiles.points": r["total"],
+                "profiles.points": r["points"],
                 "parts_sum": parts,
                 "zápasy": int(match_sum.get(uid, 0)),
                 "umístění": int(place_sum.get(uid, 0)),
                 "manuální": int(manual_sum.get(uid, 0)),
             })
-        st.dataframe(dbg, use_container_width=True, hide_index=True)
\ No newline at end of file
+        st.dataframe(dbg, use_container_width=True, hide_index=True)
@@ -1,90 +1,23 @@
 # pages/4_Admin_Vyhodnoceni.py
-import os
+import time
 from datetime import datetime, timezone
 
 import pandas as pd
 import streamlit as st
 from dotenv import load_dotenv
-from supabase import create_client
 
+from auth_guard import require_admin
+from cache_bus import bump
+from db_client import get_supabase
+from db_read import fetch_all, fetch_all_in, fetch_parallel
+from points import apply_points_deltas, point_deltas
+from scoring import evaluate_finished_matches, prediction_points
 from ui_layout import apply_o2_style, render_hero, card
 from ui_menu import render_top_menu
+from worker import enqueue_job, recent_jobs
 
 
-# =====================
-# BODY – jednotný výpočet (zápasy + umístění + manuální)
-# =====================
-def recompute_profiles_points(supabase, user_ids: list[str]):
-    """Přepíše profiles.points pro dané uživatele podle:
-    predictions.points_awarded + placement_predictions.points_awarded + sum(manual_points_log.change_amount).
-    """
-    if not user_ids:
-        return
-
-    # --- zápasy ---
-    match_sum: dict[str, int] = {uid: 0 for uid in user_ids}
-    try:
-        preds = (
-            supabase.table("predictions")
-            .select("user_id, points_awarded")
-            .in_("user_id", user_ids)
-            .execute()
-            .data
-            or []
-        )
-        for r in preds:
-            uid = r.get("user_id")
-            if uid in match_sum:
-                match_sum[uid] += int(r.get("points_awarded") or 0)
-    except Exception:
-        pass
-
-    # --- umístění ---
-    place_sum: dict[str, int] = {uid: 0 for uid in user_ids}
-    try:
-        pp = (
-            supabase.table("placement_predictions")
-            .select("user_id, points_awarded")
-            .in_("user_id", user_ids)
-            .execute()
-            .data
-            or []
-        )
-        for r in pp:
-            uid = r.get("user_id")
-            if uid in place_sum:
-                place_sum[uid] += int(r.get("points_awarded") or 0)
-    except Exception:
-        pass
-
-    # --- manuální ---
-    manual_sum: dict[str, int] = {uid: 0 for uid in user_ids}
-    try:
-        logs = (
-            supabase.table("manual_points_log")
-            .select("target_user_id, change_amount")
-            .in_("target_user_id", user_ids)
-            .execute()
-            .data
-            or []
-        )
-        for r in logs:
-            uid = r.get("target_user_id")
-            if uid in manual_sum:
-                manual_sum[uid] += int(r.get("change_amount") or 0)
-    except Exception:
-        pass
-
-    errors = []
-    for uid in user_ids:
-        total = int(match_sum.get(uid, 0)) + int(place_sum.get(uid, 0)) + int(manual_sum.get(uid, 0))
-        if total < 0:
-            total = 0
-        try:
-            supabase.table("profiles").update({"points": total}).eq("user_id", uid).execute()
-        except Exception as e:
-            errors.append(f"{uid}: {e}")
-
+def show_points_errors(errors: list[str]):
     if errors:
         st.error("Některé updates do profiles selhaly (RLS/permissions):")
         st.code("\n".join(errors))
@@ -149,57 +82,15 @@ st.markdown(
 # =====================
 # Supabase klient
 # =====================
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_ANON_KEY = os.getenv("SUPABASE_ANON_KEY")
-if not SUPABASE_URL or not SUPABASE_ANON_KEY:
-    st.error("Chybí SUPABASE_URL nebo SUPABASE_ANON_KEY v .env / Secrets")
-    st.stop()
-
-supabase = create_client(SUPABASE_URL, SUPABASE_ANON_KEY)
-
-# ✅ Navázání session (nutné pro RLS)
-if st.session_state.get("access_token") and st.session_state.get("refresh_token"):
-    supabase.auth.set_session(
-        st.session_state["access_token"],
-        st.session_state["refresh_token"],
-    )
+supabase = get_supabase()
 
 # =====================
-# Guard: musí být přihlášený
+# Guard: přihlášený admin (role z cache session)
 # =====================
 user = st.session_state.get("user")
 user_id = user["id"] if user else None
 render_top_menu(user, supabase=supabase, user_id=user_id)
-
-if not user:
-    st.warning("Nejsi přihlášený.")
-    if st.button("Jít na přihlášení", type="primary"):
-        st.switch_page("app.py")
-    st.stop()
-
-if not st.session_state.get("access_token") or not st.session_state.get("refresh_token"):
-    st.error("Chybí session tokeny. Odhlas se a přihlas znovu.")
-    st.stop()
-
-# =====================
-# Ověření admina
-# =====================
-try:
-    prof = (
-        supabase.table("profiles")
-        .select("user_id, email, is_admin")
-        .eq("user_id", user["id"])
-        .single()
-        .execute()
-    )
-    profile = prof.data
-except Exception as e:
-    st.error(f"Nelze načíst profil: {e}")
-    st.stop()
-
-if not profile or not profile.get("is_admin"):
-    st.error("Nemáš admin práva.")
-    st.stop()
+require_admin(supabase, user)
 
 # =====================
 # HERO
@@ -267,50 +158,49 @@ m = match_map[selected_label]
 match_id = m["id"]  # BIGINT
 
 # =====================
-# Load predictions for match
+# Load predictions + scorer decisions (scorer_results) for match – souběžně
 # =====================
-try:
-    preds_res = (
-        supabase.table("predictions")
+def load_match_predictions():
+    return fetch_all(
+        lambda: supabase.table("predictions")
         .select("user_id, match_id, home_score, away_score, scorer_player_id, scorer_name, scorer_team, points_awarded")
-        .eq("match_id", match_id)
-        .execute()
+        .eq("match_id", match_id),
+        key="user_id",
     )
-    preds = preds_res.data or []
+
+
+def load_scorer_results():
+    try:
+        return (
+            supabase.table("scorer_results")
+            .select("scorer_player_id, scorer_name, scorer_team, did_score")
+            .eq("match_id", match_id)
+            .execute()
+            .data
+            or []
+        )
+    except Exception:
+        return []
+
+
+try:
+    loaded = fetch_parallel({"preds": load_match_predictions, "scorer_results": load_scorer_results})
 except Exception as e:
     st.error(f"Nelze načíst tipy: {e}")
     st.stop()
+preds = loaded["preds"]
+scorer_results = loaded["scorer_results"]
 
-# user_id -> email map
+# user_id -> email map (kusy IN seznamu souběžně)
 user_emails = {}
 if preds:
     uids = list({p["user_id"] for p in preds if p.get("user_id")})
     try:
-        profs = (
-            supabase.table("profiles")
-            .select("user_id, email")
-            .in_("user_id", uids)
-            .execute()
-        )
-        for r in (profs.data or []):
+        for r in fetch_all_in(lambda: supabase.table("profiles").select("user_id, email"), "user_id", uids, key="user_id"):
             user_emails[r["user_id"]] = r.get("email") or r["user_id"]
     except Exception:
         user_emails = {}
 
-# =====================
-# Load scorer decisions (scorer_results) for match
-# =====================
-try:
-    sr_res = (
-        supabase.table("scorer_results")
-        .select("scorer_player_id, scorer_name, scorer_team, did_score")
-        .eq("match_id", match_id)
-        .execute()
-    )
-    scorer_results = sr_res.data or []
-except Exception:
-    scorer_results = []
-
 sr_map = {r["scorer_player_id"]: r for r in scorer_results if r.get("scorer_player_id")}
 
 # =====================
@@ -355,6 +245,7 @@ if save_match:
                 "evaluated_at": datetime.now(timezone.utc).isoformat(),
             }
         ).eq("id", match_id).execute()
+        bump(supabase, "matches")
         st.success("✅ Výsledek uložen.")
         st.rerun()
     except Exception as e:
@@ -434,65 +325,28 @@ with card("🧾 Náhled bodů", "Kontrola: jak se body počítají pro jednotliv
         st.dataframe(pd.DataFrame(rows), use_container_width=True)
 
 
-# =====================
-# HELPERS
-# =====================
-def score_points(pred_h, pred_a, final_h, final_a):
-    points = 0
-    detail = {
-        "exact_score": 0,
-        "winner_and_diff": 0,
-        "winner_only": 0,
-        "one_team_goals": 0,
-        "scorer": 0,
-    }
-
-    # ✅ přesný výsledek = 6 body (dle tvého požadavku)
-    if pred_h == final_h and pred_a == final_a:
-        points += 6
-        detail["exact_score"] = 6
-        return points, detail
-
-    pred_diff = pred_h - pred_a
-    final_diff = final_h - final_a
-    pred_winner = 1 if pred_diff > 0 else (-1 if pred_diff < 0 else 0)
-    final_winner = 1 if final_diff > 0 else (-1 if final_diff < 0 else 0)
-
-    # správný vítěz + správný brankový rozdíl = 4 body
-    if pred_winner == final_winner and pred_diff == final_diff:
-        points += 4
-        detail["winner_and_diff"] = 4
-
-    # ✅ správně určený vítěz = 3 body (u tebe bylo 2, to bylo špatně)
-    elif pred_winner == final_winner and pred_winner != 0:
-        points += 3
-        detail["winner_only"] = 3
-
-    # trefený počet gólů jednoho týmu = 1 bod
-    if pred_h == final_h or pred_a == final_a:
-        points += 1
-        detail["one_team_goals"] = 1
-
-    return points, detail
-
-
-def scorer_point_for_prediction(pred: dict, did_score_map: dict) -> int:
-    """✅ střelec je za 5 bodů"""
-    pid = pred.get("scorer_player_id")
-    if not pid:
-        return 0
-    return 5 if did_score_map.get(pid) else 0
-
-
 # =====================
 # ACTIONS
 # =====================
 with card("⚙️ Akce", "Spusť přepočet bodů nebo smaž hodnocení zápasu."):
-    colA, colB = st.columns([1, 1], gap="large")
+    colA, colB, colC = st.columns([1, 1, 1], gap="large")
     with colA:
         do_recalc = st.button("🔄 Přepočítat body", type="primary", use_container_width=True)
     with colB:
         do_delete_eval = st.button("🗑️ Smazat hodnocení zápasu", type="secondary", use_container_width=True)
+    with colC:
+        do_recalc_all = st.button(
+            "🧮 Přepočítat všechny odehrané",
+            type="secondary",
+            use_container_width=True,
+            help="Všechny zápasy se zadaným výsledkem najednou – hromadný zápis a jeden přepočet profiles.points.",
+        )
+        do_enqueue_all = st.button(
+            "🧵 Vyhodnotit na pozadí",
+            type="secondary",
+            use_container_width=True,
+            help="Založí úlohu do fronty evaluation_jobs – zpracuje ji `python -m worker` mimo Streamlit.",
+        )
 
 # =====================
 # Přepočet bodů
@@ -532,15 +386,7 @@ if do_recalc:
         # 3) přepočti body pro každý tip
         updates = []
         for p in preds:
-            ph = int(p.get("home_score") or 0)
-            pa = int(p.get("away_score") or 0)
-
-            sp, detail = score_points(ph, pa, final_h, final_a)
-
-            # ✅ +5 bodů za správného střelce
-            sp += scorer_point_for_prediction(p, did_score_map)
-            if p.get("scorer_player_id") and did_score_map.get(p["scorer_player_id"]):
-                detail["scorer"] = 5
+            sp, detail = prediction_points(p, final_h, final_a, did_score_map)
 
             updates.append(
                 {
@@ -564,10 +410,15 @@ if do_recalc:
         supabase.table("matches").update(
             {"evaluated_at": datetime.now(timezone.utc).isoformat()}
         ).eq("id", match_id).execute()
+        bump(supabase, "matches")
 
-        # 6) přepočti profiles.points (leaderboard celkem)
-        uids = list({p["user_id"] for p in preds if p.get("user_id")})
-        recompute_profiles_points(supabase, uids)
+        # 6) profiles.points – jen změny bodů u uživatelů, kterým se něco změnilo
+        res = apply_points_deltas(
+            supabase,
+            point_deltas([(p["user_id"], p.get("points_awarded"), u["points_awarded"]) for p, u in zip(preds, updates)]),
+            part="match",
+        )
+        show_points_errors(res["errors"])
 
         st.success("✅ Body přepočítány a uloženy.")
         st.rerun()
@@ -575,6 +426,36 @@ if do_recalc:
     except Exception as e:
         st.error(f"Chyba při přepočtu: {e}")
 
+# =====================
+# Hromadný přepočet všech odehraných zápasů
+# =====================
+if do_recalc_all:
+    try:
+        with st.spinner("Přepočítávám všechny odehrané zápasy…"):
+            t0 = time.perf_counter()
+            summary = evaluate_finished_matches(supabase)
+            res = apply_points_deltas(supabase, summary["deltas"], part="match")
+            show_points_errors(res["errors"])
+            elapsed = time.perf_counter() - t0
+
+        st.success(
+            f"✅ Vyhodnoceno zápasů: {summary['matches']} • tipů: {summary['predictions']} • "
+            f"změněno: {summary['changed']} ({summary['write_requests']} zápisů) • "
+            f"změna bodů u uživatelů: {len(summary['deltas'])} • {elapsed:.1f} s"
+        )
+    except Exception as e:
+        st.error(f"Chyba při hromadném přepočtu: {e}")
+
+# =====================
+# Vyhodnocení na pozadí (worker.py)
+# =====================
+if do_enqueue_all:
+    try:
+        job = enqueue_job(supabase, "evaluate_matches", requested_by=user["id"])
+        st.success(f"🧵 Úloha #{job.get('id', '?')} je ve frontě – průběh níže v „Úlohy na pozadí“.")
+    except Exception as e:
+        st.error(f"Nepodařilo se založit úlohu (chybí sql/003_evaluation_jobs.sql?): {e}")
+
 # =====================
 # Mazání hodnocení
 # =====================
@@ -584,14 +465,12 @@ if do_delete_eval:
 
         if st.button("Ano, smaž hodnocení", type="primary", disabled=not confirm):
             try:
-                preds_before = (
-                    supabase.table("predictions")
-                    .select("user_id")
-                    .eq("match_id", match_id)
-                    .execute()
-                ).data or []
+                preds_before = fetch_all(
+                    lambda: supabase.table("predictions").select("user_id, points_awarded").eq("match_id", match_id),
+                    key="user_id",
+                )
 
-                affected_uids = list({p.get("user_id") for p in preds_before if p.get("user_id")})
+                deltas = point_deltas([(p.get("user_id"), p.get("points_awarded"), 0) for p in preds_before])
 
                 supabase.table("predictions").update(
                     {"points_awarded": 0, "points_detail": None}
@@ -599,14 +478,58 @@ if do_delete_eval:
 
                 supabase.table("scorer_results").delete().eq("match_id", match_id).execute()
 
-                recompute_profiles_points(supabase, affected_uids)
+                show_points_errors(apply_points_deltas(supabase, deltas, part="match")["errors"])
 
                 supabase.table("matches").update(
                     {"evaluated_at": None}
                 ).eq("id", match_id).execute()
+                bump(supabase, "matches")
 
                 st.success("🗑️ Hodnocení zápasu bylo smazáno. Zápas je zpět jako 'nevyhodnocený'.")
                 st.rerun()
 
             except Exception as e:
-                st.error(f"Chyba při mazání hodnocení: {e}")
\ No newline at end of file
+                st.error(f"Chyba při mazání hodnocení: {e}")
+
+# =====================
+# Úlohy na pozadí
+# =====================
+JOB_STATUS_ICONS = {"queued": "⏳", "running": "⚙️", "done": "✅", "failed": "❌"}
+
+
+@st.fragment
+def render_jobs():
+    with card("🧵 Úlohy na pozadí", "Fronta evaluation_jobs – zpracovává `python -m worker`."):
+        try:
+            jobs = recent_jobs(supabase)
+        except Exception as e:
+            st.caption(f"Fronta není dostupná: {e}")
+            return
+
+        if not jobs:
+            st.caption("Zatím žádné úlohy.")
+        else:
+            st.dataframe(
+                pd.DataFrame(
+                    [
+                        {
+                            "#": j["id"],
+                            "Úloha": j.get("kind"),
+                            "Stav": f"{JOB_STATUS_ICONS.get(j.get('status'), '')} {j.get('status')}",
+                            "Průběh %": j.get("progress") or 0,
+                            "Zpráva": j.get("message") or "",
+                            "Založeno": j.get("created_at"),
+                            "Dokončeno": j.get("finished_at"),
+                        }
+                        for j in jobs
+                    ]
+                ),
+                use_container_width=True,
+                hide_index=True,
+            )
+
+        if st.button("🔄 Obnovit stav úloh", key="refresh_jobs"):
+            st.rerun(scope="fragment")
+
+
+render_jobs()
@@ -1,25 +1,22 @@
 # pages/6_Admin_Diagnostika_RLS.py
-import os
+from datetime import datetime, timedelta
+
 import streamlit as st
-from supabase import create_client
 from dotenv import load_dotenv
 
+from auth_guard import require_admin
+from cache_bus import FALLBACK_TTL, MAX_AGE, TRACKED_TABLES, bus, table_version
+from db_client import get_supabase
+from db_read import IN_CHUNK, count_rows, fetch_all, fetch_page, iter_rows_in
+from leaderboard import leaderboard_cache
+from query_profiler import MAX_RERUNS, n_plus_one, page_summary, profile_store, slowest_queries
 from ui_layout import apply_o2_style, render_hero, card
 from ui_menu import render_top_menu
 
 load_dotenv()
 st.set_page_config(page_title="Admin – Diagnostika RLS", page_icon="🔍", layout="wide")
 
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_ANON_KEY = os.getenv("SUPABASE_ANON_KEY")
-if not SUPABASE_URL or not SUPABASE_ANON_KEY:
-    st.error("Chybí SUPABASE_URL nebo SUPABASE_ANON_KEY")
-    st.stop()
-
-supabase = create_client(SUPABASE_URL, SUPABASE_ANON_KEY)
-
-if st.session_state.get("access_token") and st.session_state.get("refresh_token"):
-    supabase.auth.set_session(st.session_state["access_token"], st.session_state["refresh_token"])
+supabase = get_supabase()
 
 apply_o2_style()
 
@@ -33,56 +30,254 @@ render_hero(
     image_path="assets/olymp.png",
 )
 
-if not user:
-    with card("🔐 Nepřihlášen"):
-        st.warning("Nejsi přihlášený.")
-        if st.button("➡️ Přihlášení", type="primary"):
-            st.switch_page("app.py")
-    st.stop()
-
-# admin check
-try:
-    prof = supabase.table("profiles").select("user_id, is_admin").eq("user_id", user["id"]).single().execute()
-    if not (prof.data or {}).get("is_admin"):
-        st.error("Tato stránka je jen pro admina.")
-        st.stop()
-except Exception as e:
-    st.error(f"Nelze ověřit admina: {e}")
-    st.stop()
-
-with card("1️⃣ profiles"):
-    try:
-        profiles = supabase.table("profiles").select("user_id, email, points, is_admin").execute().data or []
-        st.success(f"✅ Vidím {len(profiles)} profilů")
-        st.dataframe(profiles, use_container_width=True, hide_index=True)
-    except Exception as e:
-        st.error(f"❌ profiles read: {e}")
-        st.code(str(e))
+# jen admin (role z cache session)
+require_admin(supabase, user)
 
-with card("2️⃣ predictions"):
-    try:
-        preds = supabase.table("predictions").select("user_id, match_id, home_score, away_score, points_awarded, scorer_name").execute().data or []
-        st.success(f"✅ Vidím {len(preds)} tipů")
-        st.dataframe(preds, use_container_width=True, hide_index=True)
-    except Exception as e:
-        st.error(f"❌ predictions read: {e}")
-        st.code(str(e))
-        st.warning("Pokud nevidíš tipy všech uživatelů, leaderboard nebude umět sečíst body.")
+PAGE_SIZES = (25, 50, 100, 250)
+
+
+def count(table: str, *filters) -> int:
+    """Počet řádků, které přes RLS vidím – počítá DB (HEAD request, žádná data)."""
+    q = supabase.table(table).select("*", count="exact", head=True)
+    for f in filters:
+        q = f(q)
+    return count_rows(q)
 
-with card("3️⃣ matches"):
+
+def pager(key: str) -> tuple[int, int]:
+    c1, c2 = st.columns([1, 1])
+    with c1:
+        page_size = st.selectbox("Řádků na stránku", PAGE_SIZES, key=f"{key}_size")
+    with c2:
+        page = st.number_input("Stránka", min_value=1, value=1, step=1, key=f"{key}_page")
+    return int(page), int(page_size)
+
+
+def reset_page(key: str):
+    """Callback filtru – nový filtr začíná od první stránky."""
+    st.session_state.pop(f"{key}_page", None)
+
+
+def show_page(rows: list[dict], total: int, page: int, page_size: int):
+    pages = max(1, -(-total // page_size))
+    st.caption(f"Stránka {min(page, pages)} / {pages} • celkem {total} řádků")
+    st.dataframe(rows, use_container_width=True, hide_index=True)
+
+
+@st.cache_data(show_spinner=False, max_entries=4, ttl=MAX_AGE)
+def match_options(_supabase, user_id: str, version: tuple[int, ...]) -> dict[str, str]:
+    rows = fetch_all(lambda: _supabase.table("matches").select("id, home_team, away_team, starts_at").order("starts_at").order("id"))
+    return {r["id"]: f"{(r.get('starts_at') or '')[:10]} • {r.get('home_team')} – {r.get('away_team')}" for r in rows}
+
+
+# =====================
+# Souhrn (počty z DB)
+# =====================
+with card("📊 Souhrn", "Počty řádků viditelných přes RLS – spočítané v DB, bez stahování tabulek."):
     try:
-        matches = supabase.table("matches").select("id, home_team, away_team, starts_at, final_home_score, final_away_score").execute().data or []
-        st.success(f"✅ Vidím {len(matches)} zápasů")
-        st.dataframe(matches, use_container_width=True, hide_index=True)
+        c1, c2, c3, c4 = st.columns(4)
+        c1.metric("profiles", count("profiles"))
+        c1.metric("z toho admini", count("profiles", lambda q: q.eq("is_admin", True)))
+        c2.metric("predictions", count("predictions"))
+        c2.metric("s body", count("predictions", lambda q: q.gt("points_awarded", 0)))
+        c3.metric("matches", count("matches"))
+        c3.metric("s výsledkem", count("matches", lambda q: q.not_.is_("final_home_score", "null")))
+        c4.metric("scorer_results", count("scorer_results"))
+        c4.metric("dal gól", count("scorer_results", lambda q: q.eq("did_score", True)))
     except Exception as e:
-        st.error(f"❌ matches read: {e}")
+        st.error(f"❌ počty: {e}")
         st.code(str(e))
 
-with card("4️⃣ scorer_results"):
-    try:
-        rows = supabase.table("scorer_results").select("match_id, scorer_name, scorer_team, did_score").execute().data or []
-        st.success(f"✅ Vidím {len(rows)} záznamů")
-        st.dataframe(rows, use_container_width=True, hide_index=True)
-    except Exception as e:
-        st.error(f"❌ scorer_results read: {e}")
-        st.code(str(e))
\ No newline at end of file
+
+# =====================
+# Tabulky po stránkách
+# =====================
+@st.fragment
+def profiles_view():
+    with card("1️⃣ profiles"):
+        try:
+            email = st.text_input("Email obsahuje", key="diag_prof_email", on_change=reset_page, args=("diag_prof",))
+            page, page_size = pager("diag_prof")
+            q = supabase.table("profiles").select("user_id, email, points, is_admin", count="exact")
+            if email.strip():
+                q = q.ilike("email", f"%{email.strip()}%")
+            rows, total = fetch_page(q, page, page_size, order=("email", "user_id"))
+            show_page(rows, total, page, page_size)
+        except Exception as e:
+            st.error(f"❌ profiles read: {e}")
+            st.code(str(e))
+
+
+@st.fragment
+def predictions_view():
+    with card("2️⃣ predictions", "Filtr podle uživatele a zápasu – načítá se jen zobrazená stránka."):
+        try:
+            options = match_options(supabase, user_id, table_version("matches"))
+            c1, c2 = st.columns(2)
+            with c1:
+                email = st.text_input(
+                    "Email uživatele obsahuje", key="diag_pred_email", on_change=reset_page, args=("diag_pred",)
+                )
+            with c2:
+                match_id = st.selectbox(
+                    "Zápas",
+                    [None, *options.keys()],
+                    format_func=lambda mid: "— všechny —" if mid is None else options[mid],
+                    key="diag_pred_match",
+                    on_change=reset_page,
+                    args=("diag_pred",),
+                )
+
+            user_ids = None
+            if email.strip():
+                # všichni odpovídající uživatelé (stránkovaně) – i široký filtr typu "@firma.cz"
+                found = fetch_all(
+                    lambda: supabase.table("profiles").select("user_id").ilike("email", f"%{email.strip()}%"),
+                    key="user_id",
+                )
+                user_ids = sorted(r["user_id"] for r in found)
+
+            page, page_size = pager("diag_pred")
+            cols = "user_id, match_id, home_score, away_score, points_awarded, scorer_name"
+            if user_ids is not None and len(user_ids) > IN_CHUNK:
+                # moc uživatelů na jeden IN (délka URL) – tipy po kusech, stránka se vybere tady
+                def query():
+                    q = supabase.table("predictions").select(cols).order("user_id").order("match_id")
+                    return q.eq("match_id", match_id) if match_id else q
+
+                all_rows = sorted(iter_rows_in(query, "user_id", user_ids), key=lambda r: (r["user_id"], r["match_id"]))
+                start = (page - 1) * page_size
+                rows, total = all_rows[start : start + page_size], len(all_rows)
+            else:
+                q = supabase.table("predictions").select(cols, count="exact")
+                if user_ids is not None:
+                    q = q.in_("user_id", user_ids)
+                if match_id:
+                    q = q.eq("match_id", match_id)
+                rows, total = fetch_page(q, page, page_size, order=("user_id", "match_id"))
+            if user_ids is not None:
+                st.caption(f"Uživatelů odpovídá filtru: {len(user_ids)}")
+            show_page(rows, total, page, page_size)
+        except Exception as e:
+            st.error(f"❌ predictions read: {e}")
+            st.code(str(e))
+            st.warning("Pokud nevidíš tipy všech uživatelů, leaderboard nebude umět sečíst body.")
+
+
+@st.fragment
+def matches_view():
+    with card("3️⃣ matches"):
+        try:
+            c1, c2 = st.columns([1, 2])
+            with c1:
+                by_date = st.checkbox("Filtrovat podle data", key="diag_match_by_date")
+            with c2:
+                span = st.date_input("Od – do", value=(), key="diag_match_dates", disabled=not by_date)
+            page, page_size = pager("diag_match")
+            q = supabase.table("matches").select(
+                "id, home_team, away_team, starts_at, final_home_score, final_away_score", count="exact"
+            )
+            if by_date and len(span) == 2:
+                q = q.gte("starts_at", span[0].isoformat()).lt("starts_at", (span[1] + timedelta(days=1)).isoformat())
+            rows, total = fetch_page(q, page, page_size, order=("starts_at", "id"))
+            show_page(rows, total, page, page_size)
+        except Exception as e:
+            st.error(f"❌ matches read: {e}")
+            st.code(str(e))
+
+
+@st.fragment
+def scorer_results_view():
+    with card("4️⃣ scorer_results"):
+        try:
+            options = match_options(supabase, user_id, table_version("matches"))
+            match_id = st.selectbox(
+                "Zápas",
+                [None, *options.keys()],
+                format_func=lambda mid: "— všechny —" if mid is None else options[mid],
+                key="diag_sr_match",
+            )
+            page, page_size = pager("diag_sr")
+            q = supabase.table("scorer_results").select("match_id, scorer_name, scorer_team, did_score", count="exact")
+            if match_id:
+                q = q.eq("match_id", match_id)
+            rows, total = fetch_page(q, page, page_size, order=("match_id", "scorer_name", "scorer_player_id"))
+            show_page(rows, total, page, page_size)
+        except Exception as e:
+            st.error(f"❌ scorer_results read: {e}")
+            st.code(str(e))
+
+
+profiles_view()
+predictions_view()
+matches_view()
+scorer_results_view()
+
+with card("⏱️ Profil dotazů", "Co stojí reruny jednotlivých stránek na backendu (všechny sessions)."):
+    store = profile_store()
+    c1, c2, c3 = st.columns([1, 1, 1], gap="large")
+    with c1:
+        enabled = st.toggle("Profilovat dotazy", value=store.enabled, help="Do restartu appky; trvale přes TIPOVACKA_PROFILE_QUERIES=1.")
+        if enabled != store.enabled:
+            store.enabled = enabled
+            st.rerun()
+    with c2:
+        last_n = st.number_input("Posledních N rerunů", min_value=1, max_value=MAX_RERUNS, value=50, step=10)
+    with c3:
+        if st.button("🧹 Smazat záznamy", use_container_width=True):
+            store.clear()
+            st.rerun()
+
+    reruns = store.snapshot(int(last_n))
+    if not reruns:
+        st.info("Zatím žádné záznamy – zapni profiler a proklikej stránky.")
+    else:
+        m1, m2, m3 = st.columns(3)
+        m1.metric("Rerunů", len(reruns))
+        m2.metric("Backend ms / rerun", f"{sum(r.total_ms for r in reruns) / len(reruns):.0f}")
+        m3.metric("Dotazů / rerun", f"{sum(len(r.queries) for r in reruns) / len(reruns):.1f}")
+
+        st.markdown("**Stránky**")
+        st.dataframe(page_summary(reruns), use_container_width=True, hide_index=True)
+
+        st.markdown("**Nejpomalejší dotazy**")
+        st.dataframe(slowest_queries(reruns), use_container_width=True, hide_index=True)
+
+        st.markdown("**Podezření na N+1** (stejný malý dotaz opakovaně v jednom rerunu)")
+        suspects = n_plus_one(reruns)
+        if suspects:
+            st.dataframe(suspects, use_container_width=True, hide_index=True)
+        else:
+            st.caption("Nic nenalezeno ✅")
+
+with card("🔁 Verze tabulek (cache)", "Sdílené cache se zahodí, když se zvýší verze zdrojové tabulky (cache_bus, sql/004)."):
+    versions_bus = bus()
+    if st.button("🔄 Načíst verze z DB", use_container_width=True):
+        changed = versions_bus.poll(supabase, force=True)
+        st.success(f"Změněné tabulky: {', '.join(changed)}" if changed else "Beze změny ✅")
+    versions = versions_bus.versions()
+    st.dataframe(
+        [{"Tabulka": t, "Verze": versions.get(t, 0)} for t in TRACKED_TABLES],
+        use_container_width=True,
+        hide_index=True,
+    )
+    if versions_bus.degraded:
+        st.warning(f"Verze z DB nejdou číst (chybí sql/004?) – cache se obnovují každých {FALLBACK_TTL} s.")
+    st.caption(f"Bumpů v tomto procesu: {versions_bus.bumps} • dotazů na verze: {versions_bus.polls} • max. stáří cache {MAX_AGE} s")
+
+with card("🏆 Leaderboard snapshot", "Seřazený leaderboard sdílený všemi sessions – staví se znovu jen po změně bodů (verze profiles)."):
+    lb_cache = leaderboard_cache()
+    lb_stats = lb_cache.stats()
+    m1, m2, m3, m4 = st.columns(4)
+    m1.metric("Hit rate", f"{lb_stats['hit_rate'] * 100:.1f} %")
+    m2.metric("Hity / přestavby", f"{lb_stats['hits']} / {lb_stats['misses']}")
+    m3.metric("Poslední přestavba ms", "—" if lb_stats["last_build_ms"] is None else f"{lb_stats['last_build_ms']:.0f}")
+    m4.metric("Průměr přestavby ms", "—" if lb_stats["avg_build_ms"] is None else f"{lb_stats['avg_build_ms']:.0f}")
+    if lb_stats["built_at"] is None:
+        st.caption("Snapshot zatím nevznikl – otevři Leaderboard.")
+    else:
+        built = datetime.fromtimestamp(lb_stats["built_at"]).strftime("%d.%m.%Y %H:%M:%S")
+        st.caption(f"Řádků: {lb_stats['rows']} • verze profiles: {lb_stats['version']} • postaven: {built}")
+    if st.button("🧹 Vynulovat statistiky snapshotu", use_container_width=True):
+        lb_cache.reset_stats()
+        st.rerun()
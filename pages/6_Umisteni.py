@@ -1,28 +1,19 @@
 # pages/6_Umisteni.py
-import os
 import re
 from datetime import datetime, timezone, date
 
 import streamlit as st
-from supabase import create_client
 from dotenv import load_dotenv
 
+from cache_bus import MAX_AGE, table_version
+from db_client import get_supabase
 from ui_layout import apply_o2_style, render_hero, card
 from ui_menu import render_top_menu
 
 load_dotenv()
 st.set_page_config(page_title="Umístění", page_icon="🏅", layout="wide")
 
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_ANON_KEY = os.getenv("SUPABASE_ANON_KEY")
-if not SUPABASE_URL or not SUPABASE_ANON_KEY:
-    st.error("Chybí SUPABASE_URL nebo SUPABASE_ANON_KEY")
-    st.stop()
-
-supabase = create_client(SUPABASE_URL, SUPABASE_ANON_KEY)
-
-if st.session_state.get("access_token") and st.session_state.get("refresh_token"):
-    supabase.auth.set_session(st.session_state["access_token"], st.session_state["refresh_token"])
+supabase = get_supabase()
 
 apply_o2_style()
 
@@ -87,15 +78,19 @@ def can_tip(event: dict) -> tuple[bool, str]:
 
     return True, "Tipování otevřeno."
 
-# Load events
-try:
+# Load events (sdílená cache do další změny placement_events – cache_bus)
+@st.cache_data(show_spinner=False, max_entries=4, ttl=MAX_AGE)
+def cached_events(_supabase, version: tuple[int, ...]):
     ev_res = (
-        supabase.table("placement_events")
+        _supabase.table("placement_events")
         .select("id, title, category, event_date, lock_at, correct_value, evaluated_at, created_at")
         .order("event_date")
         .execute()
     )
-    events = ev_res.data or []
+    return ev_res.data or []
+
+try:
+    events = cached_events(supabase, table_version("placement_events"))
 except Exception as e:
     st.error(f"Nelze načíst placement_events: {e}")
     st.stop()
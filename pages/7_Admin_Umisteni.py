@@ -1,73 +1,23 @@
 # pages/7_Admin_Umisteni.py
-import os
-from datetime import datetime, timezone
-
 import streamlit as st
 from dotenv import load_dotenv
-from supabase import create_client
 
+from auth_guard import require_admin
+from cache_bus import bump
+from db_client import get_supabase
+from db_read import fetch_all, iter_rows_in
+from points import apply_points_deltas, point_deltas
+from scoring import evaluate_placement_events
 from ui_layout import apply_o2_style, render_hero, card
 from ui_menu import render_top_menu
-
-
-def recompute_profiles_points(supabase, user_ids: list[str]):
-    """Přepíše profiles.points pro dané uživatele podle:
-    predictions.points_awarded + placement_predictions.points_awarded + sum(manual_points_log.change_amount)."""
-    if not user_ids:
-        return
-    match_sum = {uid: 0 for uid in user_ids}
-    try:
-        preds = supabase.table("predictions").select("user_id, points_awarded").in_("user_id", user_ids).execute().data or []
-        for r in preds:
-            uid = r.get("user_id")
-            if uid in match_sum:
-                match_sum[uid] += int(r.get("points_awarded") or 0)
-    except Exception:
-        pass
-    place_sum = {uid: 0 for uid in user_ids}
-    try:
-        pp = supabase.table("placement_predictions").select("user_id, points_awarded").in_("user_id", user_ids).execute().data or []
-        for r in pp:
-            uid = r.get("user_id")
-            if uid in place_sum:
-                place_sum[uid] += int(r.get("points_awarded") or 0)
-    except Exception:
-        pass
-    manual_sum = {uid: 0 for uid in user_ids}
-    try:
-        logs = supabase.table("manual_points_log").select("target_user_id, change_amount").in_("target_user_id", user_ids).execute().data or []
-        for r in logs:
-            uid = r.get("target_user_id")
-            if uid in manual_sum:
-                manual_sum[uid] += int(r.get("change_amount") or 0)
-    except Exception:
-        pass
-
-    for uid in user_ids:
-        total = int(match_sum.get(uid, 0)) + int(place_sum.get(uid, 0)) + int(manual_sum.get(uid, 0))
-        if total < 0:
-            total = 0
-        try:
-            supabase.table("profiles").update({"points": total}).eq("user_id", uid).execute()
-        except Exception:
-            pass
-
+from worker import enqueue_job
 
 load_dotenv()
 st.set_page_config(page_title="Admin – Umístění", page_icon="🏅", layout="wide")
 
 apply_o2_style()
 
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_ANON_KEY = os.getenv("SUPABASE_ANON_KEY")
-if not SUPABASE_URL or not SUPABASE_ANON_KEY:
-    st.error("Chybí SUPABASE_URL nebo SUPABASE_ANON_KEY v .env / Secrets")
-    st.stop()
-
-supabase = create_client(SUPABASE_URL, SUPABASE_ANON_KEY)
-
-if st.session_state.get("access_token") and st.session_state.get("refresh_token"):
-    supabase.auth.set_session(st.session_state["access_token"], st.session_state["refresh_token"])
+supabase = get_supabase()
 
 user = st.session_state.get("user")
 user_id = user["id"] if user else None
@@ -79,22 +29,8 @@ render_hero(
     image_path="assets/olymp.png",
 )
 
-if not user:
-    with card("🔐 Nepřihlášen"):
-        st.warning("Nejsi přihlášený.")
-        if st.button("➡️ Přihlášení", type="primary"):
-            st.switch_page("app.py")
-    st.stop()
-
-# admin check
-try:
-    prof = supabase.table("profiles").select("user_id, is_admin").eq("user_id", user["id"]).single().execute()
-    if not (prof.data or {}).get("is_admin"):
-        st.error("Tato stránka je jen pro admina.")
-        st.stop()
-except Exception as e:
-    st.error(f"Nelze ověřit admina: {e}")
-    st.stop()
+# jen admin (role z cache session)
+require_admin(supabase, user)
 
 events = (supabase.table("placement_events").select("id, title, event_date, correct_value, evaluated_at").order("event_date").execute().data or [])
 
@@ -117,70 +53,144 @@ with card("Vyber event", "Vyber disciplínu / umístění."):
 event = event_map[sel]
 selected_event_id = event["id"]
 
-preds = (supabase.table("placement_predictions").select("user_id, predicted_value, points_awarded").eq("event_id", selected_event_id).execute().data or [])
+preds = fetch_all(lambda: supabase.table("placement_predictions").select("user_id, predicted_value, points_awarded").eq("event_id", selected_event_id), key="user_id")
 
 # map emails
 email_map = {}
 uids = list({p.get("user_id") for p in preds if p.get("user_id")})
 if uids:
-    profs = (supabase.table("profiles").select("user_id, email").in_("user_id", uids).execute().data or [])
+    profs = iter_rows_in(lambda: supabase.table("profiles").select("user_id, email"), "user_id", uids, key="user_id")
     email_map = {p["user_id"]: p.get("email") or p["user_id"] for p in profs}
 
 with card("⚙️ Vyhodnocení"):
     current_correct = (event.get("correct_value") or "").strip()
     cv = st.text_input("Správné umístění (přesně jak tipují lidé)", value=current_correct, placeholder="např. 1) USA 2) Kanada 3) Česko")
 
-    colA, colB = st.columns(2)
+    colA, colB, colC = st.columns(3)
     with colA:
         do_eval = st.button("✅ Vyhodnotit (10/0)", type="primary", use_container_width=True)
     with colB:
         do_reset = st.button("♻️ Reset", type="secondary", use_container_width=True)
+    with colC:
+        do_enqueue = st.button(
+            "🧵 Vyhodnotit na pozadí",
+            type="secondary",
+            use_container_width=True,
+            help="Založí úlohu do fronty – zpracuje ji `python -m worker`, průběh je v Admin Vyhodnocení.",
+        )
 
     if do_eval:
         if not cv.strip():
             st.error("Zadej správné umístění.")
         else:
             try:
-                cv = cv.strip()
-                now_iso = datetime.now(timezone.utc).isoformat()
-
-                supabase.table("placement_events").update({"correct_value": cv, "evaluated_at": now_iso}).eq("id", selected_event_id).execute()
-
-                preds2 = (supabase.table("placement_predictions").select("user_id, predicted_value").eq("event_id", selected_event_id).execute().data or [])
-                updated = 0
-                affected_uids = []
-                for p in preds2:
-                    uid = p.get("user_id")
-                    if uid:
-                        affected_uids.append(uid)
-                    pv = (p.get("predicted_value") or "").strip()
-                    if not pv:
-                        continue
-                    pts = 10 if pv == cv else 0
-                    supabase.table("placement_predictions").update({"points_awarded": pts, "evaluated_at": now_iso}).eq("event_id", selected_event_id).eq("user_id", p["user_id"]).execute()
-                    updated += 1
-
-                # ✅ jednotný přepočet leaderboard bodů
-                recompute_profiles_points(supabase, list(sorted(set(affected_uids))))
-
-                st.success(f"Hotovo ✅ Aktualizováno tipů: {updated}")
+                res = evaluate_placement_events(supabase, {selected_event_id: cv})
+
+                # ✅ leaderboard body – jen změny (nové − staré)
+                apply_points_deltas(supabase, res["deltas"], part="placement")
+
+                st.session_state["placement_eval_msg"] = (
+                    f"Hotovo ✅ Aktualizováno tipů: {res['updated']} (správně {res['correct']}) • "
+                    f"zápisů: {res['write_requests']} • {res['elapsed_ms']:.0f} ms"
+                )
                 st.rerun()
 
             except Exception as e:
                 st.error(f"Vyhodnocení selhalo: {e}")
 
+    if do_enqueue:
+        if not cv.strip():
+            st.error("Zadej správné umístění.")
+        else:
+            try:
+                job = enqueue_job(
+                    supabase,
+                    "evaluate_placement",
+                    {"event_id": selected_event_id, "correct_value": cv.strip()},
+                    requested_by=user["id"],
+                )
+                st.success(f"🧵 Úloha #{job.get('id', '?')} je ve frontě.")
+            except Exception as e:
+                st.error(f"Nepodařilo se založit úlohu (chybí sql/003_evaluation_jobs.sql?): {e}")
+
     if do_reset:
         try:
             supabase.table("placement_events").update({"correct_value": None, "evaluated_at": None}).eq("id", selected_event_id).execute()
+            bump(supabase, "placement_events")
             supabase.table("placement_predictions").update({"points_awarded": 0, "evaluated_at": None}).eq("event_id", selected_event_id).execute()
-            # ✅ přepočti body dotčeným uživatelům (kteří tipovali tento event)
-            affected = [p.get("user_id") for p in preds if p.get("user_id")]
-            recompute_profiles_points(supabase, list(sorted(set(affected))))
+            # ✅ odečti body dotčeným uživatelům (kteří tipovali tento event)
+            apply_points_deltas(supabase, point_deltas([(p.get("user_id"), p.get("points_awarded"), 0) for p in preds]), part="placement")
             st.success("Reset hotov ♻️")
             st.rerun()
         except Exception as e:
             st.error(f"Reset selhal: {e}")
 
+    if msg := st.session_state.pop("placement_eval_msg", None):
+        st.success(msg)
+
+# =====================
+# Víc eventů najednou (medailové dny)
+# =====================
+with card("🏅 Vyhodnotit víc eventů najednou", "Vyplň správné umístění u eventů, které chceš vyhodnotit – tipy se načtou a zapíšou hromadně."):
+    edited = st.data_editor(
+        [
+            {
+                "id": e["id"],
+                "Datum": e.get("event_date") or "—",
+                "Event": e.get("title") or "—",
+                "Správně": e.get("correct_value") or "",
+                "Vyhodnoceno": "✅" if e.get("evaluated_at") else "",
+            }
+            for e in events
+        ],
+        column_config={"id": None},
+        disabled=["Datum", "Event", "Vyhodnoceno"],
+        use_container_width=True,
+        hide_index=True,
+        key="placement_bulk_editor",
+    )
+    stored = {e["id"]: ((e.get("correct_value") or "").strip(), bool(e.get("evaluated_at"))) for e in events}
+    # jen vyplněné eventy, u kterých se správná odpověď změnila nebo ještě nebyly vyhodnocené
+    to_eval = {
+        r["id"]: r["Správně"].strip()
+        for r in edited
+        if (r.get("Správně") or "").strip() and ((r["Správně"].strip(), True) != stored.get(r["id"]))
+    }
+    st.caption(f"K vyhodnocení: {len(to_eval)} eventů")
+
+    colA, colB = st.columns(2)
+    with colA:
+        do_bulk = st.button("✅ Vyhodnotit vyplněné (10/0)", type="primary", use_container_width=True, disabled=not to_eval)
+    with colB:
+        do_bulk_enqueue = st.button("🧵 Vyhodnotit vyplněné na pozadí", type="secondary", use_container_width=True, disabled=not to_eval)
+
+    if do_bulk:
+        try:
+            res = evaluate_placement_events(supabase, to_eval)
+            applied = apply_points_deltas(supabase, res["deltas"], part="placement")
+            st.session_state["placement_bulk_msg"] = (
+                f"Hotovo ✅ Eventů: {res['events']} • tipů: {res['updated']} (správně {res['correct']}) • "
+                f"uživatelům upraveny body: {applied['updated']} • zápisů: {res['write_requests']} • {res['elapsed_ms']:.0f} ms"
+            )
+            st.rerun()
+        except Exception as e:
+            st.error(f"Vyhodnocení selhalo: {e}")
+
+    if do_bulk_enqueue:
+        try:
+            job = enqueue_job(
+                supabase,
+                "evaluate_placement",
+                {"events": [{"event_id": eid, "correct_value": cv} for eid, cv in to_eval.items()]},
+                requested_by=user["id"],
+            )
+            st.success(f"🧵 Úloha #{job.get('id', '?')} je ve frontě.")
+        except Exception as e:
+            st.error(f"Nepodařilo se založit úlohu (chybí sql/003_evaluation_jobs.sql?): {e}")
+
+    if msg := st.session_state.pop("placement_bulk_msg", None):
+        st.success(msg)
+
 with card("📋 Tipy uživatelů"):
     if not preds:
         st.info("Nikdo zatím netipoval.")
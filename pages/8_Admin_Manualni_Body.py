@@ -1,71 +1,20 @@
 # pages/8_Admin_Manualni_Body.py
-import os
 import streamlit as st
-from supabase import create_client
 from dotenv import load_dotenv
 
+from auth_guard import require_admin
+from db_client import get_supabase
+from db_read import fetch_all
+from points import apply_points_deltas
 from ui_layout import apply_o2_style, render_hero, card
 from ui_menu import render_top_menu
 
-
-def recompute_profiles_points(supabase, user_ids: list[str]):
-    """Přepíše profiles.points pro dané uživatele podle:
-    predictions.points_awarded + placement_predictions.points_awarded + sum(manual_points_log.change_amount)."""
-    if not user_ids:
-        return
-    match_sum = {uid: 0 for uid in user_ids}
-    try:
-        preds = supabase.table("predictions").select("user_id, points_awarded").in_("user_id", user_ids).execute().data or []
-        for r in preds:
-            uid = r.get("user_id")
-            if uid in match_sum:
-                match_sum[uid] += int(r.get("points_awarded") or 0)
-    except Exception:
-        pass
-    place_sum = {uid: 0 for uid in user_ids}
-    try:
-        pp = supabase.table("placement_predictions").select("user_id, points_awarded").in_("user_id", user_ids).execute().data or []
-        for r in pp:
-            uid = r.get("user_id")
-            if uid in place_sum:
-                place_sum[uid] += int(r.get("points_awarded") or 0)
-    except Exception:
-        pass
-    manual_sum = {uid: 0 for uid in user_ids}
-    try:
-        logs = supabase.table("manual_points_log").select("target_user_id, change_amount").in_("target_user_id", user_ids).execute().data or []
-        for r in logs:
-            uid = r.get("target_user_id")
-            if uid in manual_sum:
-                manual_sum[uid] += int(r.get("change_amount") or 0)
-    except Exception:
-        pass
-
-    for uid in user_ids:
-        total = int(match_sum.get(uid, 0)) + int(place_sum.get(uid, 0)) + int(manual_sum.get(uid, 0))
-        if total < 0:
-            total = 0
-        try:
-            supabase.table("profiles").update({"points": total}).eq("user_id", uid).execute()
-        except Exception:
-            pass
-
-
 load_dotenv()
 st.set_page_config(page_title="Admin – Manuální body", page_icon="✏️", layout="wide")
 
 apply_o2_style()
 
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_ANON_KEY = os.getenv("SUPABASE_ANON_KEY")
-if not SUPABASE_URL or not SUPABASE_ANON_KEY:
-    st.error("Chybí SUPABASE_URL nebo SUPABASE_ANON_KEY")
-    st.stop()
-
-supabase = create_client(SUPABASE_URL, SUPABASE_ANON_KEY)
-
-if st.session_state.get("access_token") and st.session_state.get("refresh_token"):
-    supabase.auth.set_session(st.session_state["access_token"], st.session_state["refresh_token"])
+supabase = get_supabase()
 
 user = st.session_state.get("user")
 user_id = user["id"] if user else None
@@ -77,25 +26,11 @@ render_hero(
     image_path="assets/olymp.png",
 )
 
-if not user:
-    with card("🔐 Nepřihlášen"):
-        st.warning("Nejsi přihlášený.")
-        if st.button("➡️ Přihlášení", type="primary"):
-            st.switch_page("app.py")
-    st.stop()
-
-# admin check
-try:
-    prof = supabase.table("profiles").select("user_id, is_admin").eq("user_id", user["id"]).single().execute()
-    if not (prof.data or {}).get("is_admin"):
-        st.error("Tato stránka je jen pro admina.")
-        st.stop()
-except Exception as e:
-    st.error(f"Nelze ověřit admina: {e}")
-    st.stop()
+# jen admin (role z cache session)
+require_admin(supabase, user)
 
 # load users
-users = (supabase.table("profiles").select("user_id, email, points").order("email").execute().data or [])
+users = fetch_all(lambda: supabase.table("profiles").select("user_id, email, points").order("email").order("user_id"))
 if not users:
     st.info("Žádní uživatelé v profiles.")
     st.stop()
@@ -134,8 +69,8 @@ with card("🎯 Přidat / odebrat body"):
 
             supabase.table("manual_points_log").insert(log_entry).execute()
 
-            # 2. Přepočti profiles.points jednotně (zápasy + umístění + manuální)
-            recompute_profiles_points(supabase, [selected_user["user_id"]])
+            # 2. Přičti změnu do profiles.points (u 0 / záporného výsledku plný přepočet)
+            apply_points_deltas(supabase, {selected_user["user_id"]: int(points_to_add)}, part="manual")
 
             action = "přidáno" if points_to_add > 0 else "odebráno"
             # načti čerstvé body po přepočtu
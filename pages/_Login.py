@@ -1,8 +1,9 @@
-import os
 import streamlit as st
-from supabase import create_client
 from dotenv import load_dotenv
 
+from db_client import get_supabase, mark_tokens_bound
+from session_tokens import store_session
+
 # =========================
 # Init
 # =========================
@@ -10,14 +11,7 @@ load_dotenv()
 
 st.set_page_config(page_title="Přihlášení", page_icon="🔐")
 
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_ANON_KEY = os.getenv("SUPABASE_ANON_KEY")
-
-if not SUPABASE_URL or not SUPABASE_ANON_KEY:
-    st.error("Chybí SUPABASE_URL nebo SUPABASE_ANON_KEY v .env")
-    st.stop()
-
-supabase = create_client(SUPABASE_URL, SUPABASE_ANON_KEY)
+supabase = get_supabase()
 
 st.title("🔐 Přihlášení")
 
@@ -51,8 +45,8 @@ if submit:
             "id": res.user.id,
             "email": res.user.email,
         }
-        st.session_state["access_token"] = res.session.access_token
-        st.session_state["refresh_token"] = res.session.refresh_token
+        store_session(res.session)
+        mark_tokens_bound(res.session.access_token, res.session.refresh_token)
 
         st.success("Přihlášení OK ✅")
         st.rerun()
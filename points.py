@@ -0,0 +1,195 @@
+# points.py
+"""
+Celkové body v profiles.points = zápasy + umístění + manuální.
+
+- apply_points_deltas: běžná cesta – přičte jen změny (nové body − staré) dotčeným uživatelům
+- recompute_profiles_points: plný přepočet ze zdrojových tabulek (oprava / fallback)
+- points_breakdown: udržovaný rozpad po uživatelích (sql/002) – Leaderboard ho čte jedním dotazem
+"""
+from datetime import datetime, timezone
+
+from postgrest.exceptions import APIError
+
+from cache_bus import bump
+from db_read import chunked, iter_rows, iter_rows_in
+
+UPSERT_CHUNK = 500
+
+PARTS = ("match", "placement", "manual")
+BREAKDOWN_COLUMNS = {"match": "match_points", "placement": "placement_points", "manual": "manual_points"}
+
+
+# chybějící tabulka (PostgREST schema cache / Postgres) – jen tehdy se zdroj bodů přeskočí
+MISSING_TABLE_CODES = ("PGRST205", "42P01")
+
+
+def _table_missing(supabase, table: str, column: str) -> bool:
+    """Zjistí předem, jestli tabulka vůbec existuje; jiná chyba se propaguje."""
+    try:
+        supabase.table(table).select(column).limit(1).execute()
+    except APIError as e:
+        if e.code in MISSING_TABLE_CODES:
+            return True
+        raise
+    return False
+
+
+def sum_points_by_user(supabase, user_ids: list[str]) -> dict[str, dict[str, int]]:
+    """Rozpad bodů pro dané uživatele: {"match": .., "placement": .., "manual": ..}.
+
+    Zdroj se přeskočí jen když jeho tabulka neexistuje. Chyba při čtení (stránka, kus IN)
+    se propaguje – neúplné součty se nesmí zapsat do profiles.points."""
+    sums = {uid: {"match": 0, "placement": 0, "manual": 0} for uid in user_ids}
+    if not user_ids:
+        return sums
+
+    # (část, tabulka, sloupec uživatele, sloupec bodů, řazení pro stabilní stránkování)
+    sources = (
+        ("match", "predictions", "user_id", "points_awarded", ("user_id", "match_id")),
+        ("placement", "placement_predictions", "user_id", "points_awarded", ("user_id", "event_id")),
+        ("manual", "manual_points_log", "target_user_id", "change_amount", ("target_user_id", "created_at", "id")),
+    )
+    for part, table, uid_col, value_col, order in sources:
+
+        def query(table=table, uid_col=uid_col, value_col=value_col, order=order):
+            q = supabase.table(table).select(f"{uid_col}, {value_col}")
+            for col in order:
+                q = q.order(col)
+            return q
+
+        if _table_missing(supabase, table, uid_col):
+            continue
+        for r in iter_rows_in(query, uid_col, user_ids):
+            uid = r.get(uid_col)
+            if uid in sums:
+                sums[uid][part] += int(r.get(value_col) or 0)
+    return sums
+
+
+def total_points(parts: dict[str, int]) -> int:
+    return max(0, int(parts.get("match", 0)) + int(parts.get("placement", 0)) + int(parts.get("manual", 0)))
+
+
+# =====================
+# Rozpad bodů (points_breakdown)
+# =====================
+def _breakdown_row(uid: str, parts: dict[str, int]) -> dict:
+    return {
+        "user_id": uid,
+        **{BREAKDOWN_COLUMNS[k]: int(parts.get(k, 0)) for k in PARTS},
+        "updated_at": datetime.now(timezone.utc).isoformat(),
+    }
+
+
+def write_breakdown(supabase, sums: dict[str, dict[str, int]]) -> None:
+    """Přepíše rozpad pro dané uživatele (po plném přepočtu). Chybějící tabulka nevadí."""
+    if not sums:
+        return
+    try:
+        rows = (_breakdown_row(uid, parts) for uid, parts in sums.items())
+        for part in chunked(rows, UPSERT_CHUNK):
+            supabase.table("points_breakdown").upsert(part, on_conflict="user_id").execute()
+    except Exception:
+        pass
+
+
+def _bump_breakdown(supabase, deltas: dict[str, int], part: str) -> None:
+    """Fallback bez DB funkce: přičte změny do rozpadu jedním upsertem."""
+    try:
+        cols = ", ".join(["user_id", *BREAKDOWN_COLUMNS.values()])
+        rows = iter_rows_in(lambda: supabase.table("points_breakdown").select(cols), "user_id", list(deltas), key="user_id")
+        current = {r["user_id"]: {k: int(r.get(c) or 0) for k, c in BREAKDOWN_COLUMNS.items()} for r in rows}
+        out = {}
+        for uid, d in deltas.items():
+            parts = current.get(uid) or {k: 0 for k in PARTS}
+            parts[part] += d
+            out[uid] = parts
+        write_breakdown(supabase, out)
+    except Exception:
+        pass
+
+
+def load_points_breakdown(supabase, user_ids: list[str] | None = None) -> dict[str, dict[str, int]] | None:
+    """Rozpad všech (nebo jen `user_ids`) uživatelů; None = tabulka neexistuje / není naplněná."""
+    try:
+        cols = ", ".join(["user_id", *BREAKDOWN_COLUMNS.values()])
+        if user_ids is None:
+            rows = iter_rows(lambda: supabase.table("points_breakdown").select(cols), key="user_id")
+        else:
+            rows = iter_rows_in(lambda: supabase.table("points_breakdown").select(cols), "user_id", user_ids, key="user_id")
+        out = {r["user_id"]: {k: int(r.get(c) or 0) for k, c in BREAKDOWN_COLUMNS.items()} for r in rows}
+    except Exception:
+        return None
+    return out or None
+
+
+# =====================
+# Celkové body
+# =====================
+def recompute_profiles_points(supabase, user_ids: list[str]) -> list[str]:
+    """Přepíše profiles.points (a rozpad) pro dané uživatele podle:
+    predictions.points_awarded + placement_predictions.points_awarded + sum(manual_points_log.change_amount).
+    Vrací seznam chyb (RLS/permissions)."""
+    if not user_ids:
+        return []
+
+    sums = sum_points_by_user(supabase, user_ids)
+    write_breakdown(supabase, sums)
+    errors = []
+    for uid in user_ids:
+        try:
+            supabase.table("profiles").update({"points": total_points(sums[uid])}).eq("user_id", uid).execute()
+        except Exception as e:
+            errors.append(f"{uid}: {e}")
+    bump(supabase, "profiles", "points_breakdown")
+    return errors
+
+
+def point_deltas(old_new: list[tuple[str, int | None, int | None]]) -> dict[str, int]:
+    """[(user_id, staré body, nové body), ...] -> {user_id: změna} (bez nulových změn)."""
+    deltas: dict[str, int] = {}
+    for uid, old, new in old_new:
+        if not uid:
+            continue
+        d = int(new or 0) - int(old or 0)
+        if d:
+            deltas[uid] = deltas.get(uid, 0) + d
+    return {uid: d for uid, d in deltas.items() if d}
+
+
+def apply_points_deltas(supabase, deltas: dict[str, int], part: str) -> dict:
+    """Přičte změny do profiles.points (a do rozpadu `part`) jen uživatelům, kterým se body opravdu změnily.
+
+    Součet se v profiles ořezává na 0 – u uživatelů s 0 body (mohou být "pod nulou")
+    nebo se záporným výsledkem proto delta nestačí a jde se přes plný přepočet.
+    """
+    deltas = {uid: int(d) for uid, d in deltas.items() if uid and int(d)}
+    if not deltas:
+        return {"updated": 0, "recomputed": 0, "errors": []}
+
+    uids = list(deltas.keys())
+    current = {
+        r["user_id"]: int(r.get("points") or 0)
+        for r in iter_rows_in(lambda: supabase.table("profiles").select("user_id, points"), "user_id", uids, key="user_id")
+    }
+
+    safe = {uid: d for uid, d in deltas.items() if current.get(uid, 0) > 0 and current[uid] + d >= 0}
+    unsafe = [uid for uid in uids if uid not in safe]
+
+    errors: list[str] = []
+    if safe:
+        try:
+            supabase.rpc("apply_points_deltas", {"deltas": safe, "part": part}).execute()
+        except Exception:
+            # fallback – DB funkce chybí (sql/002_points_breakdown.sql)
+            for uid, d in safe.items():
+                try:
+                    supabase.table("profiles").update({"points": current[uid] + d}).eq("user_id", uid).execute()
+                except Exception as e:
+                    errors.append(f"{uid}: {e}")
+            _bump_breakdown(supabase, safe, part)
+
+    errors += recompute_profiles_points(supabase, unsafe)
+    if safe:
+        bump(supabase, "profiles", "points_breakdown")
+    return {"updated": len(safe), "recomputed": len(unsafe), "errors": errors}
@@ -0,0 +1,64 @@
+# predictions.py
+"""
+Zápis tipů uživatele (stránka Zápasy) – výsledek i střelec jedním upsertem.
+
+Tip a střelec jsou jeden řádek predictions, takže se posílají spolu: jeden request
+na uložení a žádná chvíle, kdy tip v DB existuje bez střelce (nebo se střelcem ze
+starého stavu). Bez klíčů střelce upsert střelce v DB nechá, jak je.
+
+Celý den najednou: save_predictions (hromadný upsert) po kontrole zámku split_locked –
+tip na zápas, který už začal, se neuloží.
+"""
+from datetime import datetime, timezone
+
+from db_read import chunked
+
+UPSERT_CHUNK = 500
+SCORER_FIELDS = ("scorer_player_id", "scorer_name", "scorer_flag", "scorer_team")
+
+
+def scorer_fields(pred: dict | None) -> dict:
+    """Střelec z uloženého tipu (prázdný dict, když střelec zvolený není)."""
+    if not pred or not pred.get("scorer_name"):
+        return {}
+    return {k: pred.get(k) for k in SCORER_FIELDS}
+
+
+def prediction_row(user_id: str, match_id, home_score: int, away_score: int, scorer: dict | None = None) -> dict:
+    row = {"user_id": user_id, "match_id": match_id, "home_score": int(home_score), "away_score": int(away_score)}
+    row.update({k: v for k, v in (scorer or {}).items() if k in SCORER_FIELDS})
+    return row
+
+
+def save_prediction(supabase, user_id: str, match_id, home_score: int, away_score: int, scorer: dict | None = None) -> dict:
+    """Tip (+ střelec, je-li zadaný) jedním upsertem. Vrací zapsaný řádek (bez id z DB)."""
+    row = prediction_row(user_id, match_id, home_score, away_score, scorer)
+    supabase.table("predictions").upsert(row, on_conflict="user_id,match_id").execute()
+    return row
+
+
+def split_locked(rows: list[dict], starts_at: dict, now: datetime | None = None) -> tuple[list[dict], list[dict]]:
+    """(otevřené, zamčené) – zamčený je tip na zápas, který už začal (nebo start neznáme)."""
+    now = now or datetime.now(timezone.utc)
+    open_rows, locked = [], []
+    for r in rows:
+        start = starts_at.get(r["match_id"])
+        (open_rows if start is not None and start > now else locked).append(r)
+    return open_rows, locked
+
+
+def save_predictions(supabase, rows: list[dict]) -> int:
+    """Hromadný upsert tipů (prediction_row). Vrací počet requestů.
+
+    Řádky se seskupí podle sloupců – hromadný upsert chybějící sloupec zapíše jako NULL,
+    takže tipy bez střelce jdou zvlášť, aby nepřepsaly střelce uloženého v DB."""
+    groups: dict[tuple, list[dict]] = {}
+    for r in rows:
+        groups.setdefault(tuple(sorted(r)), []).append(r)
+
+    requests = 0
+    for group in groups.values():
+        for part in chunked(group, UPSERT_CHUNK):
+            supabase.table("predictions").upsert(part, on_conflict="user_id,match_id").execute()
+            requests += 1
+    return requests
@@ -0,0 +1,291 @@
+# query_profiler.py
+"""
+Profil dotazů na backend po rerunech (Admin Diagnostika).
+
+Když je profiler zapnutý, get_supabase() vrací klienta obaleného ProfiledClient:
+každé .execute() se zapíše (tabulka, operace, filtry, počet řádků, latence, velikost dat)
+do záznamu aktuálního rerunu. Rerun jen fragmentu (st.fragment) dostane vlastní záznam
+se stránkou "… (fragment)". Záznamy posledních MAX_RERUNS rerunů drží sdílený ProfileStore.
+
+Zapnutí: TIPOVACKA_PROFILE_QUERIES=1 v .env, nebo přepínač v Admin Diagnostice (do restartu).
+"""
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+
+import streamlit as st
+
+MAX_RERUNS = 500
+N_PLUS_ONE_MIN = 5  # stejný dotaz (jiné hodnoty) tolikrát v jednom rerunu = podezření na N+1
+N_PLUS_ONE_MAX_ROWS = 10  # … ale jen malé dotazy – stránkování / IN po kusech vrací plné dávky
+PROFILED_KEY = "_profiled_supabase"
+
+# metody builderu, které jen mění dotaz – do profilu jde metoda + sloupec (hodnoty ne)
+OPERATIONS = ("select", "insert", "upsert", "update", "delete")
+
+
+@dataclass
+class QueryRecord:
+    table: str
+    op: str
+    filters: tuple[str, ...]
+    rows: int
+    ms: float
+    bytes: int
+    error: str | None = None
+
+    @property
+    def signature(self) -> str:
+        return f"{self.op} {self.table}" + (" " + " ".join(self.filters) if self.filters else "")
+
+
+@dataclass
+class RerunRecord:
+    page: str
+    session: str
+    started: float
+    queries: list[QueryRecord] = field(default_factory=list)
+
+    @property
+    def total_ms(self) -> float:
+        return sum(q.ms for q in self.queries)
+
+
+class ProfileStore:
+    def __init__(self, enabled: bool, max_reruns: int = MAX_RERUNS):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._reruns: deque[RerunRecord] = deque(maxlen=max_reruns)
+
+    def begin_rerun(self, page: str, session: str) -> RerunRecord:
+        rec = RerunRecord(page=page, session=session, started=time.time())
+        with self._lock:
+            self._reruns.append(rec)
+        return rec
+
+    def snapshot(self, last_n: int | None = None) -> list[RerunRecord]:
+        with self._lock:
+            reruns = list(self._reruns)
+        return reruns[-last_n:] if last_n else reruns
+
+    def clear(self) -> None:
+        with self._lock:
+            self._reruns.clear()
+
+
+@st.cache_resource
+def profile_store() -> ProfileStore:
+    return ProfileStore(enabled=os.getenv("TIPOVACKA_PROFILE_QUERIES", "0") == "1")
+
+
+# =====================
+# Obalení klienta
+# =====================
+def _payload_bytes(data) -> int:
+    if data is None:
+        return 0
+    try:
+        return len(json.dumps(data, default=str, ensure_ascii=False).encode())
+    except Exception:
+        return 0
+
+
+def _row_count(data) -> int:
+    if isinstance(data, list):
+        return len(data)
+    return 0 if data is None else 1
+
+
+class _ProfiledQuery:
+    """Proxy nad request builderem: pamatuje si operaci a filtry, měří execute()."""
+
+    def __init__(self, owner: "ProfiledClient", table: str, query, op: str = "select", filters: tuple = ()):
+        self._owner = owner
+        self._table = table
+        self._query = query
+        self._op = op
+        self._filters = filters
+
+    def __getattr__(self, name):
+        attr = getattr(self._query, name)
+        if not callable(attr):
+            # not_ (property) – další filtr je negovaný
+            return _ProfiledQuery(self._owner, self._table, attr, self._op, self._filters + (name,))
+
+        def call(*args, **kwargs):
+            op, filters = self._op, self._filters
+            if name in OPERATIONS:
+                op = name
+            elif args and isinstance(args[0], str):
+                filters = filters + (f"{name}({args[0]})",)
+            else:
+                filters = filters + (f"{name}()",)
+            return _ProfiledQuery(self._owner, self._table, attr(*args, **kwargs), op, filters)
+
+        return call
+
+    def execute(self):
+        t0 = time.perf_counter()
+        try:
+            res = self._query.execute()
+        except Exception as e:
+            self._owner._record(self._table, self._op, self._filters, None, time.perf_counter() - t0, str(e)[:200])
+            raise
+        self._owner._record(self._table, self._op, self._filters, getattr(res, "data", None), time.perf_counter() - t0)
+        return res
+
+
+class ProfiledClient:
+    """Obal Supabase (nebo local_db) klienta; auth a ostatní atributy propouští beze změny."""
+
+    def __init__(self, client):
+        self._client = client
+        self.page = "?"
+        self.current: RerunRecord | None = None
+        self._fragments: list[str] | None = None  # fragment_ids_this_run, ke kterému patří current
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+    def table(self, name: str) -> _ProfiledQuery:
+        return _ProfiledQuery(self, name, self._client.table(name))
+
+    from_ = table
+
+    def rpc(self, fn: str, params: dict | None = None, *args, **kwargs) -> _ProfiledQuery:
+        return _ProfiledQuery(self, fn, self._client.rpc(fn, params or {}, *args, **kwargs), op="rpc")
+
+    def begin_rerun(self, page: str) -> None:
+        self.page = page
+        self._fragments = None
+        self.current = profile_store().begin_rerun(page, _session_id())
+
+    def _run_record(self) -> RerunRecord | None:
+        """Záznam aktuálního běhu – rerun fragmentu nevolá get_supabase(), nový záznam se založí tady."""
+        fragments = _fragment_ids_this_run()
+        if fragments is not None and fragments is not self._fragments:
+            self._fragments = fragments
+            self.current = profile_store().begin_rerun(f"{self.page} (fragment)", _session_id())
+        return self.current
+
+    def _record(self, table: str, op: str, filters: tuple, data, seconds: float, error: str | None = None) -> None:
+        current = self._run_record()
+        if current is None:
+            return
+        current.queries.append(
+            QueryRecord(
+                table=table,
+                op=op,
+                filters=filters,
+                rows=_row_count(data),
+                ms=seconds * 1000,
+                bytes=_payload_bytes(data),
+                error=error,
+            )
+        )
+
+
+def _script_run_ctx():
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+        return get_script_run_ctx(suppress_warning=True)
+    except Exception:
+        return None
+
+
+def _session_id() -> str:
+    ctx = _script_run_ctx()
+    return ctx.session_id[:8] if ctx else "-"
+
+
+def _fragment_ids_this_run() -> list[str] | None:
+    """Fragmenty, které běží v tomhle rerunu (None = celý skript). Každý rerun má vlastní seznam."""
+    ctx = _script_run_ctx()
+    return getattr(ctx, "fragment_ids_this_run", None) or None
+
+
+def profiled_client(client, page: str):
+    """Volá get_supabase() na začátku každého rerunu: vrátí obal klienta s novým záznamem rerunu."""
+    store = profile_store()
+    if not store.enabled:
+        return client
+
+    wrapped = st.session_state.get(PROFILED_KEY)
+    if wrapped is None or wrapped._client is not client:
+        wrapped = ProfiledClient(client)
+        st.session_state[PROFILED_KEY] = wrapped
+    wrapped.begin_rerun(page)
+    return wrapped
+
+
+def caller_page(depth: int = 2) -> str:
+    try:
+        return os.path.basename(sys._getframe(depth).f_code.co_filename)
+    except Exception:
+        return "?"
+
+
+# =====================
+# Přehledy pro Diagnostiku
+# =====================
+def page_summary(reruns: list[RerunRecord]) -> list[dict]:
+    by_page: dict[str, list[RerunRecord]] = {}
+    for r in reruns:
+        by_page.setdefault(r.page, []).append(r)
+
+    out = []
+    for page, rs in by_page.items():
+        totals = [r.total_ms for r in rs]
+        out.append(
+            {
+                "Stránka": page,
+                "Rerunů": len(rs),
+                "Backend ms (průměr)": round(sum(totals) / len(rs), 1),
+                "Backend ms (max)": round(max(totals), 1),
+                "Dotazů / rerun": round(sum(len(r.queries) for r in rs) / len(rs), 1),
+                "Řádků / rerun": round(sum(q.rows for r in rs for q in r.queries) / len(rs)),
+                "kB / rerun": round(sum(q.bytes for r in rs for q in r.queries) / len(rs) / 1024, 1),
+            }
+        )
+    return sorted(out, key=lambda x: x["Backend ms (průměr)"], reverse=True)
+
+
+def slowest_queries(reruns: list[RerunRecord], limit: int = 20) -> list[dict]:
+    rows = [(r, q) for r in reruns for q in r.queries]
+    rows.sort(key=lambda rq: rq[1].ms, reverse=True)
+    return [
+        {
+            "Stránka": r.page,
+            "Dotaz": q.signature,
+            "ms": round(q.ms, 1),
+            "Řádků": q.rows,
+            "kB": round(q.bytes / 1024, 1),
+            "Chyba": q.error or "",
+        }
+        for r, q in rows[:limit]
+    ]
+
+
+def n_plus_one(reruns: list[RerunRecord], min_repeats: int = N_PLUS_ONE_MIN) -> list[dict]:
+    """Malé dotazy se stejným tvarem opakované v jednom rerunu (typicky dotaz v cyklu přes zápasy/uživatele)."""
+    found: dict[tuple[str, str], dict] = {}
+    for r in reruns:
+        counts: dict[str, list[QueryRecord]] = {}
+        for q in r.queries:
+            counts.setdefault(q.signature, []).append(q)
+        for sig, qs in counts.items():
+            if len(qs) < min_repeats or sum(q.rows for q in qs) / len(qs) > N_PLUS_ONE_MAX_ROWS:
+                continue
+            item = found.setdefault(
+                (r.page, sig),
+                {"Stránka": r.page, "Dotaz": sig, "Rerunů": 0, "Max opakování": 0, "ms celkem (max)": 0.0},
+            )
+            item["Rerunů"] += 1
+            item["Max opakování"] = max(item["Max opakování"], len(qs))
+            item["ms celkem (max)"] = round(max(item["ms celkem (max)"], sum(q.ms for q in qs)), 1)
+    return sorted(found.values(), key=lambda x: x["ms celkem (max)"], reverse=True)
@@ -0,0 +1,309 @@
+# roster_import.py
+"""
+Parser soupisek – jeden tým (Soupisky Admin) i hromadný import všech týmů ze souboru.
+
+Formáty:
+- text: "Team: Czechia" (nebo "Tým:") začíná tým, pak "Defenders:" / "Forwards:" a hráči
+  "Jméno (Klub, CZE, Liga, SWE), ..." – jako dosud, hráč může přetéct na další řádek
+- CSV: hlavička team_name, full_name, role (+ club_name, country3, league_name, league_country3)
+- JSON: [{team_name, full_name, role, ...}, ...], {"Czechia": [{full_name, role, ...}, ...], ...}
+  nebo NDJSON (jeden objekt hráče na řádek)
+
+Text se čte po řádcích jedním průchodem s předkompilovanými vzory (žádné slepování celého textu),
+JSON taky po řádcích – dekóduje se vždy jen jeden hráč (raw_decode), ne celý soubor najednou.
+"""
+import csv
+import json
+import re
+from collections.abc import Iterable, Iterator
+from functools import partial
+
+from rosters import ROLES, normalize_name
+
+TEAM_RE = re.compile(r"^\s*(?:team|tým|tym)\s*:\s*(.+?)\s*$", re.IGNORECASE)
+SECTION = r"defenders|defencemen|forwards|goalies|goaltenders"
+# sekce nebo hráč "Jméno (uvnitř závorky)"; jméno může obsahovat ":", jen nesmí spolknout nadpis sekce,
+# uvnitř závorky smí být jedna úroveň vnořených závorek ("HC Club (B), CZE")
+TOKEN_RE = re.compile(
+    rf"(?P<section>{SECTION})\s*:"
+    rf"|(?P<name>(?:(?!(?:{SECTION})\s*:)[^()])+?)\s*\((?P<inside>(?:[^()]|\([^()]*\))*)\)",
+    re.IGNORECASE,
+)
+SEPARATORS = " ,"
+CODE3_RE = re.compile(r"[A-Z]{3}")
+MAX_PENDING = 1000  # delší zbytek bez závorky už není hráč
+JSON_CHUNK = 64 * 1024
+
+SECTION_ROLES = {"defenders": "DEF", "defencemen": "DEF", "forwards": "ATT", "goalies": None, "goaltenders": None}
+ROLE_ALIASES = {
+    "DEF": "DEF", "D": "DEF", "OBRÁNCE": "DEF", "OBRANCE": "DEF", "DEFENDER": "DEF",
+    "ATT": "ATT", "F": "ATT", "ÚTOČNÍK": "ATT", "UTOCNIK": "ATT", "FORWARD": "ATT",
+}
+FIELDS = ("team_name", "full_name", "role", "club_name", "country3", "league_name", "league_country3")
+
+
+def clean_name(x: str) -> str:
+    if not x:
+        return ""
+    return x.strip().lstrip(",").strip()
+
+
+def parse_inside(inside: str) -> dict:
+    """"Klub, CZE, Liga, SWE" -> klub, země hráče, liga, země ligy (jako dosud v Soupisky Admin)."""
+    parts = [p for p in map(str.strip, inside.split(",")) if p]
+    club_name = parts[0] if parts else ""
+    codes, rest = [], []
+    for i, p in enumerate(parts):
+        if CODE3_RE.fullmatch(p):
+            codes.append(p)
+        elif i:
+            rest.append(p)
+    country3 = codes[0] if codes else ""
+    return {
+        "club_name": club_name,
+        "country3": country3.upper(),
+        "league_name": rest[0] if rest else "",
+        "league_country3": (codes[1] if len(codes) >= 2 else country3).upper(),
+    }
+
+
+# =====================
+# Text
+# =====================
+def iter_text_players(lines: Iterable[str], team_name: str | None = None) -> Iterator[dict]:
+    """Hráči z textu po řádcích. Bez "Team:" řádku patří všichni do `team_name`."""
+    team, role, buf = team_name, None, ""
+    seen_section = False
+
+    for line in lines:
+        m_team = TEAM_RE.match(line)
+        if m_team:
+            team, role, buf, seen_section = m_team.group(1), None, "", False
+            continue
+
+        buf = f"{buf} {line.strip()}" if buf else line.strip()
+        end = 0
+        for m in TOKEN_RE.finditer(buf):
+            gap, start, end = buf[end:m.start()], end, m.end()
+            if m.group("section"):
+                role = SECTION_ROLES[m.group("section").lower()]
+                seen_section = True
+            elif seen_section and role:
+                if gap.strip(SEPARATORS):
+                    # zbytek před hráčem (hlubší závorky, chybějící čárka …) – hráč by byl špatně, radši chyba
+                    text = buf[start:end].strip(SEPARATORS)
+                    yield {"team_name": team, "full_name": text, "role": role, "error": f"nerozpoznaný zápis '{text}'"}
+                    continue
+                name = clean_name(m.group("name"))
+                if name:
+                    yield {"team_name": team, "full_name": name, "role": role, **parse_inside(m.group("inside"))}
+        # nedokončený hráč (jméno / závorka pokračuje na dalším řádku) zůstává v bufferu
+        buf = buf[end:].lstrip(" ,")
+        if len(buf) > MAX_PENDING:
+            buf = ""
+
+
+def parse_players(text: str) -> list[dict]:
+    """Jeden tým z textového pole (bez team_name)."""
+    if not text:
+        return []
+    return [{k: v for k, v in p.items() if k != "team_name"} for p in iter_text_players(text.splitlines()) if not p.get("error")]
+
+
+# =====================
+# CSV / JSON
+# =====================
+def _normalize_record(rec: dict, team_name: str | None = None) -> dict:
+    role = str(rec.get("role") or "").strip().upper()
+    return {
+        "team_name": str(rec.get("team_name") or team_name or "").strip(),
+        "full_name": clean_name(str(rec.get("full_name") or rec.get("name") or "")),
+        "role": ROLE_ALIASES.get(role, role),
+        "club_name": str(rec.get("club_name") or "").strip(),
+        "country3": str(rec.get("country3") or "").strip().upper(),
+        "league_name": str(rec.get("league_name") or "").strip(),
+        "league_country3": str(rec.get("league_country3") or rec.get("country3") or "").strip().upper(),
+    }
+
+
+def iter_csv_players(lines: Iterable[str]) -> Iterator[dict]:
+    for rec in csv.DictReader(lines):
+        yield _normalize_record({(k or "").strip().lower(): v for k, v in rec.items()})
+
+
+class _JsonStream:
+    """JSON z řádků po kouscích: v paměti je jen rozdělaná hodnota, ne celý soubor."""
+
+    def __init__(self, lines: Iterable[str]):
+        self._lines = iter(lines)
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+        self._decoder = json.JSONDecoder()
+
+    def _fill(self) -> bool:
+        if self._eof:
+            return False
+        line = next(self._lines, None)
+        if line is None:
+            self._eof = True
+            return False
+        self._buf = self._buf[self._pos :] + line
+        self._pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Další znak mimo whitespace ("" na konci)."""
+        while True:
+            while self._pos < len(self._buf) and self._buf[self._pos].isspace():
+                self._pos += 1
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self._fill():
+                return ""
+
+    def take(self, expected: str | None = None) -> str:
+        ch = self.peek()
+        if not ch or (expected and ch != expected):
+            raise ValueError(f"JSON: čekám '{expected or 'hodnotu'}', je tu '{ch or 'konec souboru'}'")
+        self._pos += 1
+        return ch
+
+    def value(self):
+        """Jedna hodnota (objekt hráče, klíč, …); nedokončenou doplní z dalších řádků."""
+        self.peek()
+        while True:
+            try:
+                val, end = self._decoder.raw_decode(self._buf, self._pos)
+                # číslo na konci bufferu může pokračovat na dalším řádku
+                if end < len(self._buf) or self._eof or not isinstance(val, (int, float)) or not self._fill():
+                    self._pos = end
+                    return val
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+
+    def array(self) -> Iterator:
+        self.take("[")
+        if self.peek() == "]":
+            self.take()
+            return
+        while True:
+            yield self.value()
+            if self.take() == "]":
+                return
+            self.separator(",")
+
+    def separator(self, expected: str) -> None:
+        """Právě přečtený znak musel být `expected` (oddělovač)."""
+        ch = self._buf[self._pos - 1]
+        if ch != expected:
+            raise ValueError(f"JSON: čekám '{expected}', je tu '{ch}'")
+
+
+def _record(rec) -> dict:
+    if not isinstance(rec, dict):
+        raise ValueError(f"JSON: hráč má být objekt, je tu {rec!r}")
+    return rec
+
+
+def iter_json_players(lines: Iterable[str] | str) -> Iterator[dict]:
+    """JSON po kouscích (jeden hráč / tým najednou):
+    [{...}, ...], {"Czechia": [{...}, ...], ...} nebo NDJSON (objekt hráče na řádek)."""
+    if isinstance(lines, str):
+        lines = lines.splitlines(keepends=True)
+    elif hasattr(lines, "read"):
+        # soubor: po blocích – minifikovaný JSON je celý na jednom řádku
+        lines = iter(partial(lines.read, JSON_CHUNK), "")
+    s = _JsonStream(lines)
+
+    if s.peek() == "[":
+        for rec in s.array():
+            yield _normalize_record(_record(rec))
+    else:
+        yield from _iter_json_objects(s)
+
+    if s.peek():
+        raise ValueError(f"JSON: neočekávaný znak '{s.peek()}'")
+
+
+def _iter_json_objects(s: _JsonStream) -> Iterator[dict]:
+    while s.peek() == "{":
+        s.take("{")
+        if s.peek() == "}":
+            s.take()
+            continue
+        key = s.value()
+        s.take(":")
+        if s.peek() == "[":
+            # {"tým": [hráči], ...}
+            while True:
+                for rec in s.array():
+                    yield _normalize_record(_record(rec), key)
+                if s.take() == "}":
+                    break
+                s.separator(",")
+                key = s.value()
+                s.take(":")
+        else:
+            # NDJSON – objekt hráče (klíč už je přečtený)
+            rec = {key: s.value()}
+            while s.take() != "}":
+                s.separator(",")
+                k = s.value()
+                s.take(":")
+                rec[k] = s.value()
+            yield _normalize_record(rec)
+
+
+def detect_format(filename: str, head: str) -> str:
+    name = (filename or "").lower()
+    if name.endswith(".json") or head.lstrip().startswith(("[", "{")):
+        return "json"
+    if name.endswith(".csv") or head.lower().startswith(("team_name,", "team_name;")):
+        return "csv"
+    return "text"
+
+
+def iter_file_players(lines: Iterable[str], fmt: str) -> Iterator[dict]:
+    if fmt == "json":
+        yield from iter_json_players(lines)
+    elif fmt == "csv":
+        yield from iter_csv_players(lines)
+    else:
+        yield from iter_text_players(lines)
+
+
+# =====================
+# Validace
+# =====================
+def validate_players(players: Iterable[dict]) -> tuple[dict[str, list[dict]], list[str]]:
+    """Rozdělí hráče podle týmů a vrátí chyby (chybný řádek se přeskočí, duplicita v týmu taky)."""
+    teams: dict[str, list[dict]] = {}
+    seen: dict[str, set[str]] = {}
+    errors: list[str] = []
+    for i, p in enumerate(players, start=1):
+        who = f"#{i} {p.get('full_name') or '?'}"
+        if p.get("error"):
+            errors.append(f"#{i}: {p['error']}")
+            continue
+        if not p.get("team_name"):
+            errors.append(f"{who}: chybí tým (řádek 'Team: …' / sloupec team_name)")
+            continue
+        if not p.get("full_name"):
+            errors.append(f"{who}: chybí jméno")
+            continue
+        if p.get("role") not in ROLES:
+            errors.append(f"{who}: neznámá role '{p.get('role')}'")
+            continue
+        for col in ("country3", "league_country3"):
+            if p.get(col) and not CODE3_RE.fullmatch(p[col]):
+                errors.append(f"{who}: {col} '{p[col]}' není třípísmenný kód")
+                p = {**p, col: ""}
+        key = normalize_name(p["full_name"])
+        if key in seen.setdefault(p["team_name"], set()):
+            errors.append(f"{who}: duplicita v týmu {p['team_name']}")
+            continue
+        seen[p["team_name"]].add(key)
+        teams.setdefault(p["team_name"], []).append({k: p.get(k) for k in FIELDS})
+    return teams, errors
@@ -0,0 +1,207 @@
+# rosters.py
+"""
+Soupisky všech týmů jedním dotazem.
+
+Index: team_name -> {"ATT": [...], "DEF": [...]}, hráči seřazení podle jména.
+Cache je sdílená pro celý proces bez TTL – klíčem je verze tabulky players (cache_bus),
+kterou zvýší každé uložení soupisky (invalidate_rosters) i zápis mimo appku (trigger v DB).
+
+Uložení soupisky jde přes diff (diff_roster / apply_roster_diff): hráči se párují podle
+normalizovaného jména, takže existující řádky drží id (predictions.scorer_player_id,
+scorer_results) a zapisují se jen nové / změněné / odebrané.
+"""
+import re
+import unicodedata
+from dataclasses import dataclass, field
+
+import streamlit as st
+
+from cache_bus import MAX_AGE, bump, subscribe, table_version
+from db_read import chunked, fetch_all, iter_rows_in
+
+PLAYER_COLUMNS = "id, team_name, full_name, role, club_name, country3, league_country3"
+ROLES = ("ATT", "DEF")
+
+# sloupce, které soupiska z textu určuje (porovnávají se v diffu)
+ROSTER_FIELDS = ("full_name", "role", "club_name", "country3", "league_name", "league_country3")
+WRITE_CHUNK = 200
+_NON_ALNUM = re.compile(r"[^0-9a-z]+")
+
+
+def build_roster_index(players: list[dict]) -> dict[str, dict[str, list[dict]]]:
+    index: dict[str, dict[str, list[dict]]] = {}
+    for p in players:
+        team = p.get("team_name")
+        role = p.get("role")
+        if not team or role not in ROLES:
+            continue
+        index.setdefault(team, {r: [] for r in ROLES})[role].append(p)
+
+    for by_role in index.values():
+        for lst in by_role.values():
+            lst.sort(key=lambda p: p.get("full_name") or "")
+    return index
+
+
+def fetch_all_players(supabase) -> list[dict]:
+    try:
+        return fetch_all(lambda: supabase.table("players").select(PLAYER_COLUMNS), key="id")
+    except Exception:
+        # fallback – starší schema bez klubu/zemí
+        try:
+            return fetch_all(lambda: supabase.table("players").select("team_name, full_name, role").order("team_name").order("full_name"))
+        except Exception:
+            return []
+
+
+@st.cache_data(show_spinner=False, max_entries=4, ttl=MAX_AGE)
+def _cached_roster_index(_supabase, version: tuple[int, ...]) -> dict[str, dict[str, list[dict]]]:
+    return build_roster_index(fetch_all_players(_supabase))
+
+
+subscribe(("players",), _cached_roster_index.clear)
+
+
+def load_roster_index(supabase) -> dict[str, dict[str, list[dict]]]:
+    """Jeden dotaz na players pro všechny zápasy a všechny sessions (do další změny soupisek)."""
+    return _cached_roster_index(supabase, table_version("players"))
+
+
+def team_roster(index: dict, team_name: str) -> dict[str, list[dict]]:
+    return index.get(team_name) or {r: [] for r in ROLES}
+
+
+def invalidate_rosters(supabase=None) -> None:
+    bump(supabase, "players")
+
+
+# =====================
+# Diff soupisky
+# =====================
+def normalize_name(name: str | None) -> str:
+    """"Pastrňák, David " -> "pastrnak david" (bez diakritiky, velikosti písmen a interpunkce)."""
+    if not name:
+        return ""
+    ascii_name = unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode()
+    return " ".join(_NON_ALNUM.sub(" ", ascii_name.lower()).split())
+
+
+@dataclass
+class RosterDiff:
+    team_name: str
+    inserts: list[dict] = field(default_factory=list)
+    updates: list[dict] = field(default_factory=list)  # celé řádky s id (upsert); "_changes" = změněné sloupce
+    deletes: list[dict] = field(default_factory=list)
+    unchanged: int = 0
+
+    @property
+    def is_empty(self) -> bool:
+        return not (self.inserts or self.updates or self.deletes)
+
+
+def _roster_row(team_name: str, p: dict) -> dict:
+    return {
+        "team_name": team_name,
+        "full_name": (p.get("full_name") or "").strip(),
+        "role": p.get("role"),
+        "club_name": p.get("club_name") or None,
+        "country3": (p.get("country3") or "").upper() or None,
+        "league_name": p.get("league_name") or None,
+        "league_country3": (p.get("league_country3") or "").upper() or None,
+    }
+
+
+def diff_roster(team_name: str, existing: list[dict], incoming: list[dict], created_by: str | None = None, source: str = "upload_text") -> RosterDiff:
+    """Porovná soupisku v DB (`existing`, řádky s id) s naparsovanou (`incoming`)."""
+    diff = RosterDiff(team_name=team_name)
+
+    by_name: dict[str, dict] = {}
+    for row in existing:
+        key = normalize_name(row.get("full_name"))
+        if key in by_name:
+            diff.deletes.append(row)  # duplicita v DB
+        else:
+            by_name[key] = row
+
+    seen = set()
+    for p in incoming:
+        new = _roster_row(team_name, p)
+        key = normalize_name(new["full_name"])
+        if not key or key in seen:
+            continue
+        seen.add(key)
+
+        old = by_name.pop(key, None)
+        if old is None:
+            diff.inserts.append({**new, "source": source, "created_by": created_by})
+            continue
+
+        changes = {f: new[f] for f in ROSTER_FIELDS if (old.get(f) or None) != (new[f] or None)}
+        if changes:
+            diff.updates.append(
+                {
+                    **{k: old.get(k) for k in ("id", "source", "created_by")},
+                    **new,
+                    "_changes": {f: (old.get(f), v) for f, v in changes.items()},
+                }
+            )
+        else:
+            diff.unchanged += 1
+
+    diff.deletes.extend(by_name.values())
+    return diff
+
+
+def load_team_players(supabase, team_name: str) -> list[dict]:
+    return load_players_by_team(supabase, [team_name]).get(team_name, [])
+
+
+def load_players_by_team(supabase, team_names: list[str]) -> dict[str, list[dict]]:
+    """Stávající hráči zadaných týmů (IN po kusech) – pro diff víc soupisek naráz."""
+    cols = ", ".join(["id", "team_name", *ROSTER_FIELDS, "source", "created_by"])
+    out: dict[str, list[dict]] = {t: [] for t in team_names}
+    for r in iter_rows_in(lambda: supabase.table("players").select(cols), "team_name", team_names, key="id"):
+        out.setdefault(r["team_name"], []).append(r)
+    return out
+
+
+def apply_roster_diff(supabase, diff: RosterDiff) -> dict:
+    return apply_roster_diffs(supabase, [diff])
+
+
+def apply_roster_diffs(supabase, diffs: list[RosterDiff]) -> dict:
+    """Zapíše diffy (jeden i víc týmů) po dávkách: insert nových, upsert (podle id) změněných, delete odebraných."""
+    inserts = [r for d in diffs for r in d.inserts]
+    updates = [{k: v for k, v in u.items() if k != "_changes"} for d in diffs for u in d.updates]
+    delete_ids = [r["id"] for d in diffs for r in d.deletes]
+
+    requests = 0
+    for part in chunked(inserts, WRITE_CHUNK):
+        supabase.table("players").insert(part).execute()
+        requests += 1
+
+    try:
+        for part in chunked(updates, WRITE_CHUNK):
+            supabase.table("players").upsert(part, on_conflict="id").execute()
+            requests += 1
+    except Exception:
+        # fallback – upsert neprojde (RLS / chybí insert policy): update po řádcích
+        for u in updates:
+            fields = {f: u[f] for f in ROSTER_FIELDS}
+            supabase.table("players").update(fields).eq("id", u["id"]).execute()
+            requests += 1
+
+    for part in chunked(delete_ids, WRITE_CHUNK):
+        supabase.table("players").delete().in_("id", part).execute()
+        requests += 1
+
+    if inserts or updates or delete_ids:
+        invalidate_rosters(supabase)
+    return {
+        "teams": len(diffs),
+        "inserted": len(inserts),
+        "updated": len(updates),
+        "deleted": len(delete_ids),
+        "unchanged": sum(d.unchanged for d in diffs),
+        "requests": requests,
+    }
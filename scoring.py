@@ -0,0 +1,327 @@
+# scoring.py
+"""
+Bodování zápasů a umístění (bez Streamlitu – používají admin stránky i worker.py).
+"""
+import time
+from collections.abc import Callable
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from cache_bus import bump
+from db_read import IN_CHUNK, chunked, iter_rows_in
+from points import point_deltas
+
+UPSERT_CHUNK = 500
+
+# sloupce, které se při hromadném upsertu posílají celé (insert část upsertu musí projít NOT NULL)
+PREDICTION_COLUMNS = (
+    "user_id, match_id, home_score, away_score, scorer_player_id, scorer_name, scorer_flag, scorer_team, "
+    "points_awarded, points_detail"
+)
+
+
+def score_points(pred_h, pred_a, final_h, final_a):
+    points = 0
+    detail = {
+        "exact_score": 0,
+        "winner_and_diff": 0,
+        "winner_only": 0,
+        "one_team_goals": 0,
+        "scorer": 0,
+    }
+
+    # ✅ přesný výsledek = 6 body (dle tvého požadavku)
+    if pred_h == final_h and pred_a == final_a:
+        points += 6
+        detail["exact_score"] = 6
+        return points, detail
+
+    pred_diff = pred_h - pred_a
+    final_diff = final_h - final_a
+    pred_winner = 1 if pred_diff > 0 else (-1 if pred_diff < 0 else 0)
+    final_winner = 1 if final_diff > 0 else (-1 if final_diff < 0 else 0)
+
+    # správný vítěz + správný brankový rozdíl = 4 body
+    if pred_winner == final_winner and pred_diff == final_diff:
+        points += 4
+        detail["winner_and_diff"] = 4
+
+    # ✅ správně určený vítěz = 3 body (u tebe bylo 2, to bylo špatně)
+    elif pred_winner == final_winner and pred_winner != 0:
+        points += 3
+        detail["winner_only"] = 3
+
+    # trefený počet gólů jednoho týmu = 1 bod
+    if pred_h == final_h or pred_a == final_a:
+        points += 1
+        detail["one_team_goals"] = 1
+
+    return points, detail
+
+
+def scorer_point_for_prediction(pred: dict, did_score_map: dict) -> int:
+    """✅ střelec je za 5 bodů"""
+    pid = pred.get("scorer_player_id")
+    if not pid:
+        return 0
+    return 5 if did_score_map.get(pid) else 0
+
+
+def prediction_points(pred: dict, final_h: int, final_a: int, did_score_map: dict) -> tuple[int, dict]:
+    """Body za jeden tip: výsledek + střelec."""
+    ph = int(pred.get("home_score") or 0)
+    pa = int(pred.get("away_score") or 0)
+    sp, detail = score_points(ph, pa, final_h, final_a)
+
+    # ✅ +5 bodů za správného střelce
+    scorer = scorer_point_for_prediction(pred, did_score_map)
+    if scorer:
+        sp += scorer
+        detail["scorer"] = scorer
+    return int(sp), detail
+
+
+# =====================
+# Sloupcový (vektorový) výpočet – stejná pravidla pro celé pole tipů najednou
+# =====================
+DETAIL_KEYS = ("exact_score", "winner_and_diff", "winner_only", "one_team_goals", "scorer")
+
+
+def score_points_vec(pred_h, pred_a, final_h, final_a, scorer_hit=None) -> pd.DataFrame:
+    """Vektorová obdoba score_points + scorer_point_for_prediction.
+
+    Vstupy jsou pole stejné délky (nebo skaláry), scorer_hit je maska "tipovaný střelec dal gól".
+    Vrací DataFrame se sloupci DETAIL_KEYS (rozpad jako points_detail) a `points`.
+    """
+    ph = np.asarray(pred_h, dtype=np.int64)
+    pa = np.asarray(pred_a, dtype=np.int64)
+    fh = np.asarray(final_h, dtype=np.int64)
+    fa = np.asarray(final_a, dtype=np.int64)
+    ph, pa, fh, fa = np.broadcast_arrays(ph, pa, fh, fa)
+    hit = np.zeros(ph.shape, dtype=bool) if scorer_hit is None else np.broadcast_to(np.asarray(scorer_hit, dtype=bool), ph.shape)
+
+    exact = (ph == fh) & (pa == fa)
+    pred_diff = ph - pa
+    final_diff = fh - fa
+    same_winner = np.sign(pred_diff) == np.sign(final_diff)
+    same_diff = pred_diff == final_diff
+
+    # přesný výsledek vylučuje ostatní kategorie (viz early return ve score_points)
+    winner_and_diff = ~exact & same_winner & same_diff
+    winner_only = ~exact & same_winner & ~same_diff & (pred_diff != 0)
+    one_team = ~exact & ((ph == fh) | (pa == fa))
+
+    cols = {
+        "exact_score": exact * 6,
+        "winner_and_diff": winner_and_diff * 4,
+        "winner_only": winner_only * 3,
+        "one_team_goals": one_team * 1,
+        "scorer": hit * 5,
+    }
+    cols["points"] = sum(cols.values())
+    return pd.DataFrame(cols)
+
+
+def score_predictions_frame(preds: list[dict], finals: dict, did_score_by_match: dict) -> pd.DataFrame:
+    """Body pro seznam tipů (řádky z predictions) přes víc zápasů najednou."""
+    if not preds:
+        return pd.DataFrame(columns=[*DETAIL_KEYS, "points"])
+    df = pd.DataFrame(preds)
+    final_h = df["match_id"].map(lambda mid: finals[mid][0])
+    final_a = df["match_id"].map(lambda mid: finals[mid][1])
+    scorer_col = df["scorer_player_id"] if "scorer_player_id" in df else pd.Series([None] * len(df))
+    hit = [
+        bool(pid) and bool(did_score_by_match.get(mid, {}).get(pid))
+        for mid, pid in zip(df["match_id"], scorer_col)
+    ]
+    return score_points_vec(
+        df["home_score"].fillna(0), df["away_score"].fillna(0), final_h, final_a, hit
+    )
+
+
+# =====================
+# Dávkové vyhodnocení všech odehraných zápasů
+# =====================
+def _write_points_grouped(supabase, rows: list[dict]) -> int:
+    """Fallback bez upsertu (když RLS nepustí insert cizích tipů):
+    jeden update na (zápas, body, detail) pro všechny uživatele najednou."""
+    groups: dict[tuple, list[str]] = {}
+    payloads: dict[tuple, dict] = {}
+    for r in rows:
+        key = (r["match_id"], r["points_awarded"], tuple(sorted((r["points_detail"] or {}).items())))
+        groups.setdefault(key, []).append(r["user_id"])
+        payloads[key] = {"points_awarded": r["points_awarded"], "points_detail": r["points_detail"]}
+
+    requests = 0
+    for key, uids in groups.items():
+        for part in chunked(uids, 100):
+            supabase.table("predictions").update(payloads[key]).eq("match_id", key[0]).in_("user_id", part).execute()
+            requests += 1
+    return requests
+
+
+def _noop_progress(pct: int, message: str) -> None:
+    pass
+
+
+def evaluate_finished_matches(
+    supabase,
+    match_ids: list | None = None,
+    progress: Callable[[int, str], None] = _noop_progress,
+) -> dict:
+    """Přepočítá body všech zápasů, které mají zadaný výsledek (nebo jen `match_ids`).
+
+    Čte hromadně (zápasy, tipy, rozhodnutí o střelcích), zapisuje jen změněné tipy
+    po dávkách a vrací změny bodů po uživatelích (`deltas`) – profiles.points si volající
+    upraví jednou přes points.apply_points_deltas.
+    """
+    progress(0, "Načítám zápasy")
+    q = (
+        supabase.table("matches")
+        .select("id, final_home_score, final_away_score")
+        .not_.is_("final_home_score", "null")
+        .not_.is_("final_away_score", "null")
+    )
+    if match_ids:
+        q = q.in_("id", list(match_ids))
+    matches = q.execute().data or []
+    if not matches:
+        return {"matches": 0, "predictions": 0, "changed": 0, "user_ids": [], "deltas": {}, "write_requests": 0}
+
+    finals = {m["id"]: (int(m["final_home_score"]), int(m["final_away_score"])) for m in matches}
+    match_ids = list(finals.keys())
+
+    progress(10, f"Načítám tipy ({len(match_ids)} zápasů)")
+
+    preds = list(iter_rows_in(
+        lambda: supabase.table("predictions").select(PREDICTION_COLUMNS).order("match_id").order("user_id"),
+        "match_id", match_ids,
+    ))
+    srs = iter_rows_in(
+        lambda: supabase.table("scorer_results").select("match_id, scorer_player_id, did_score")
+        .order("match_id").order("scorer_player_id"),
+        "match_id", match_ids,
+    )
+
+    did_score_by_match: dict = {}
+    for r in srs:
+        if r.get("scorer_player_id") is not None:
+            did_score_by_match.setdefault(r["match_id"], {})[r["scorer_player_id"]] = bool(r.get("did_score"))
+
+    progress(40, f"Počítám body ({len(preds)} tipů)")
+    scored = score_predictions_frame(preds, finals, did_score_by_match)
+    points = scored["points"].tolist()
+    details = scored[list(DETAIL_KEYS)].to_dict("records")
+
+    changed: list[dict] = []
+    old_new: list[tuple] = []
+    for p, pts, detail in zip(preds, points, details):
+        if p.get("points_awarded") == pts and p.get("points_detail") == detail:
+            continue
+        changed.append({**p, "points_awarded": pts, "points_detail": detail})
+        old_new.append((p.get("user_id"), p.get("points_awarded"), pts))
+
+    progress(60, f"Zapisuji změněné tipy ({len(changed)})")
+    write_requests = 0
+    if changed:
+        try:
+            for part in chunked(changed, UPSERT_CHUNK):
+                supabase.table("predictions").upsert(part, on_conflict="user_id,match_id").execute()
+                write_requests += 1
+        except Exception:
+            write_requests += _write_points_grouped(supabase, changed)
+
+    supabase.table("matches").update(
+        {"evaluated_at": datetime.now(timezone.utc).isoformat()}
+    ).in_("id", match_ids).execute()
+    bump(supabase, "matches")
+
+    return {
+        "matches": len(match_ids),
+        "predictions": len(preds),
+        "changed": len(changed),
+        "user_ids": sorted({p["user_id"] for p in preds if p.get("user_id")}),
+        "deltas": point_deltas(old_new),
+        "write_requests": write_requests,
+    }
+
+
+# =====================
+# Umístění (placement_events)
+# =====================
+PLACEMENT_POINTS = 10
+
+
+def _write_placement_grouped(supabase, event_id, pts_by_user: dict[str, int], now_iso: str) -> int:
+    """Jeden update na (event, body) pro všechny uživatele najednou – typicky dva (10 a 0)."""
+    groups: dict[int, list[str]] = {}
+    for uid, pts in pts_by_user.items():
+        groups.setdefault(pts, []).append(uid)
+
+    requests = 0
+    for pts, uids in groups.items():
+        for part in chunked(sorted(uids), IN_CHUNK):
+            supabase.table("placement_predictions").update(
+                {"points_awarded": pts, "evaluated_at": now_iso}
+            ).eq("event_id", event_id).in_("user_id", part).execute()
+            requests += 1
+    return requests
+
+
+def evaluate_placement_events(supabase, correct_by_event: dict) -> dict:
+    """Uloží správné umístění více eventů a ohodnotí tipy: 10 bodů za přesnou shodu, jinak 0.
+
+    Tipy všech eventů se čtou hromadně, body se spočítají v paměti a zapisují se skupinově
+    (jeden update na event a počet bodů). Vrací počet ohodnocených tipů, změny bodů
+    po uživatelích (`deltas` – sečtené přes všechny eventy), počet zápisů a čas.
+    """
+    t0 = time.perf_counter()
+    correct = {eid: (cv or "").strip() for eid, cv in correct_by_event.items() if (cv or "").strip()}
+    if not correct:
+        return {"events": 0, "updated": 0, "correct": 0, "deltas": {}, "per_event": {}, "write_requests": 0, "elapsed_ms": 0.0}
+    now_iso = datetime.now(timezone.utc).isoformat()
+
+    for eid, cv in correct.items():
+        supabase.table("placement_events").update({"correct_value": cv, "evaluated_at": now_iso}).eq("id", eid).execute()
+    write_requests = len(correct)
+
+    preds = iter_rows_in(
+        lambda: supabase.table("placement_predictions").select("event_id, user_id, predicted_value, points_awarded")
+        .order("event_id").order("user_id"),
+        "event_id", list(correct),
+    )
+    pts_by_event: dict = {eid: {} for eid in correct}
+    old_new = []
+    for p in preds:
+        pv = (p.get("predicted_value") or "").strip()
+        if not pv or not p.get("user_id"):
+            continue
+        pts = PLACEMENT_POINTS if pv == correct[p["event_id"]] else 0
+        pts_by_event[p["event_id"]][p["user_id"]] = pts
+        old_new.append((p["user_id"], p.get("points_awarded"), pts))
+
+    per_event = {}
+    for eid, pts_by_user in pts_by_event.items():
+        write_requests += _write_placement_grouped(supabase, eid, pts_by_user, now_iso)
+        per_event[eid] = {
+            "updated": len(pts_by_user),
+            "correct": sum(1 for pts in pts_by_user.values() if pts == PLACEMENT_POINTS),
+        }
+
+    bump(supabase, "placement_events")
+    return {
+        "events": len(correct),
+        "updated": sum(e["updated"] for e in per_event.values()),
+        "correct": sum(e["correct"] for e in per_event.values()),
+        "deltas": point_deltas(old_new),
+        "per_event": per_event,
+        "write_requests": write_requests,
+        "elapsed_ms": (time.perf_counter() - t0) * 1000,
+    }
+
+
+def evaluate_placement_event(supabase, event_id, correct_value: str) -> dict:
+    """Jeden event – viz evaluate_placement_events."""
+    return evaluate_placement_events(supabase, {event_id: correct_value})
@@ -0,0 +1,88 @@
+# session_tokens.py
+"""
+JWT session uživatele ve Streamlitu – bez round tripu při běžném rerunu.
+
+- expirace access tokenu se čte lokálně z JWT (claim exp), nic se neověřuje proti serveru
+- refresh_session se volá jen tady (z get_supabase), když do expirace zbývá < REFRESH_MARGIN
+- na klienta se token jen přiloží jako Bearer (postgrest.auth) – žádné auth.set_session
+- vlastní auto-refresh gotrue je vypnutý (db_client.make_client), refresh řídí session
+"""
+import base64
+import json
+import time
+from contextlib import suppress
+
+import streamlit as st
+
+from auth_guard import forget_role
+
+EXPIRY_KEY = "_access_token_exp"
+REFRESH_MARGIN = 60  # s před expirací se token obnoví (rezerva na rozjeté hodiny a dlouhý rerun)
+
+
+def token_expiry(access_token: str) -> int | None:
+    """Claim exp z JWT (bez ověření podpisu – jen pro plánování refreshe)."""
+    try:
+        payload = access_token.split(".")[1]
+        data = json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+        return int(data["exp"])
+    except Exception:
+        return None
+
+
+def _expiry(access_token: str) -> int | None:
+    cached = st.session_state.get(EXPIRY_KEY)
+    if cached and cached[0] == access_token:
+        return cached[1]
+    exp = token_expiry(access_token)
+    st.session_state[EXPIRY_KEY] = (access_token, exp)
+    return exp
+
+
+def store_session(session) -> None:
+    """Tokeny z přihlášení / refreshe do session_state (sign_in, refresh_session)."""
+    st.session_state["access_token"] = session.access_token
+    st.session_state["refresh_token"] = session.refresh_token
+    st.session_state[EXPIRY_KEY] = (session.access_token, token_expiry(session.access_token))
+
+
+def drop_session() -> None:
+    """Neplatný refresh token: uživatel se musí přihlásit znovu."""
+    for k in ("access_token", "refresh_token", "user", EXPIRY_KEY):
+        st.session_state.pop(k, None)
+    forget_role()
+
+
+def ensure_fresh_tokens(client, margin: int = REFRESH_MARGIN) -> tuple[str, str] | None:
+    """(access, refresh) platné aspoň `margin` sekund; request na auth jen když je potřeba refresh."""
+    access_token = st.session_state.get("access_token")
+    refresh_token = st.session_state.get("refresh_token")
+    if not access_token or not refresh_token:
+        return None
+
+    exp = _expiry(access_token)
+    # token bez čitelného exp (ne-JWT) nerefreshujeme naslepo – platnost posoudí server
+    if exp is None or exp - time.time() > margin:
+        return access_token, refresh_token
+
+    try:
+        res = client.auth.refresh_session(refresh_token)
+    except Exception:
+        drop_session()
+        return None
+    if not getattr(res, "session", None):
+        drop_session()
+        return None
+    store_session(res.session)
+    return res.session.access_token, res.session.refresh_token
+
+
+def revoke_session(client) -> None:
+    """Odhlášení: zneplatní refresh tokeny na serveru (klient session nedrží – set_session se nevolá)."""
+    access_token = st.session_state.get("access_token")
+    admin = getattr(client.auth, "admin", None)
+    with suppress(Exception):
+        if access_token and admin is not None:
+            admin.sign_out(access_token)
+    with suppress(Exception):
+        client.auth.sign_out()
@@ -0,0 +1,17 @@
+-- sql/001_apply_points_deltas.sql
+-- Atomické přičtení změn bodů do profiles.points (volá points.apply_points_deltas).
+-- deltas: {"<user_id>": <změna>, ...}
+-- Bez této funkce appka spadne na update po jednom uživateli.
+
+create or replace function public.apply_points_deltas(deltas jsonb)
+returns void
+language sql
+security invoker
+as $$
+  update public.profiles p
+     set points = p.points + (d.value)::int
+    from jsonb_each_text(deltas) d
+   where p.user_id = (d.key)::uuid;
+$$;
+
+grant execute on function public.apply_points_deltas(jsonb) to authenticated;
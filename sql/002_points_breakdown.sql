@@ -0,0 +1,66 @@
+-- sql/002_points_breakdown.sql
+-- Udržovaný rozpad bodů po uživatelích (zápasy / umístění / manuální) pro Leaderboard.
+-- Plní ho points.py při každém vyhodnocení a manuální změně; plný přepočet (Sync bodů) ho opraví.
+
+create table if not exists public.points_breakdown (
+  user_id          uuid primary key references public.profiles(user_id) on delete cascade,
+  match_points     integer not null default 0,
+  placement_points integer not null default 0,
+  manual_points    integer not null default 0,
+  updated_at       timestamptz not null default now()
+);
+
+alter table public.points_breakdown enable row level security;
+
+drop policy if exists points_breakdown_read on public.points_breakdown;
+create policy points_breakdown_read on public.points_breakdown
+  for select to authenticated using (true);
+
+drop policy if exists points_breakdown_admin_write on public.points_breakdown;
+create policy points_breakdown_admin_write on public.points_breakdown
+  for all to authenticated
+  using (exists (select 1 from public.profiles p where p.user_id = auth.uid() and p.is_admin))
+  with check (exists (select 1 from public.profiles p where p.user_id = auth.uid() and p.is_admin));
+
+-- počáteční naplnění ze zdrojových tabulek
+insert into public.points_breakdown (user_id, match_points, placement_points, manual_points)
+select pr.user_id,
+       coalesce((select sum(points_awarded) from public.predictions x where x.user_id = pr.user_id), 0),
+       coalesce((select sum(points_awarded) from public.placement_predictions x where x.user_id = pr.user_id), 0),
+       coalesce((select sum(change_amount) from public.manual_points_log x where x.target_user_id = pr.user_id), 0)
+  from public.profiles pr
+on conflict (user_id) do update
+   set match_points = excluded.match_points,
+       placement_points = excluded.placement_points,
+       manual_points = excluded.manual_points,
+       updated_at = now();
+
+-- apply_points_deltas nově posouvá i rozpad (part = 'match' | 'placement' | 'manual')
+drop function if exists public.apply_points_deltas(jsonb);
+
+create or replace function public.apply_points_deltas(deltas jsonb, part text)
+returns void
+language plpgsql
+security invoker
+as $$
+begin
+  update public.profiles p
+     set points = p.points + (d.value)::int
+    from jsonb_each_text(deltas) d
+   where p.user_id = (d.key)::uuid;
+
+  insert into public.points_breakdown as b (user_id, match_points, placement_points, manual_points)
+  select (d.key)::uuid,
+         case when part = 'match' then (d.value)::int else 0 end,
+         case when part = 'placement' then (d.value)::int else 0 end,
+         case when part = 'manual' then (d.value)::int else 0 end
+    from jsonb_each_text(deltas) d
+  on conflict (user_id) do update
+     set match_points = b.match_points + excluded.match_points,
+         placement_points = b.placement_points + excluded.placement_points,
+         manual_points = b.manual_points + excluded.manual_points,
+         updated_at = now();
+end;
+$$;
+
+grant execute on function public.apply_points_deltas(jsonb, text) to authenticated;
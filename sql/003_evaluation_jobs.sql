@@ -0,0 +1,63 @@
+-- sql/003_evaluation_jobs.sql
+-- Fronta úloh pro worker.py (vyhodnocení zápasů / umístění, přepočet bodů mimo Streamlit).
+-- Admin stránky úlohy zakládají, worker (service role) je vyzvedává a hlásí průběh.
+
+create table if not exists public.evaluation_jobs (
+  id           bigserial primary key,
+  kind         text not null check (kind in ('evaluate_matches', 'evaluate_placement', 'recompute_totals')),
+  payload      jsonb not null default '{}'::jsonb,
+  status       text not null default 'queued' check (status in ('queued', 'running', 'done', 'failed')),
+  progress     integer not null default 0,
+  message      text,
+  result       jsonb,
+  requested_by uuid references public.profiles(user_id),
+  created_at   timestamptz not null default now(),
+  started_at   timestamptz,
+  finished_at  timestamptz
+);
+
+-- lease: worker během úlohy obnovuje heartbeat_at; running úloha bez heartbeatu (worker umřel)
+-- se po lease_seconds vyzvedne znovu, po max_attempts pokusech skončí jako failed
+alter table public.evaluation_jobs add column if not exists heartbeat_at timestamptz;
+alter table public.evaluation_jobs add column if not exists attempts integer not null default 0;
+
+create index if not exists evaluation_jobs_queued_idx on public.evaluation_jobs (id) where status = 'queued';
+
+alter table public.evaluation_jobs enable row level security;
+
+drop policy if exists evaluation_jobs_admin on public.evaluation_jobs;
+create policy evaluation_jobs_admin on public.evaluation_jobs
+  for all to authenticated
+  using (exists (select 1 from public.profiles p where p.user_id = auth.uid() and p.is_admin))
+  with check (exists (select 1 from public.profiles p where p.user_id = auth.uid() and p.is_admin));
+
+-- Atomické vyzvednutí další úlohy (víc workerů si úlohy nepřebere dvakrát).
+-- Bere queued úlohy i running úlohy s propadlým leasem; ty s vyčerpanými pokusy označí jako failed.
+drop function if exists public.claim_evaluation_job();
+
+create or replace function public.claim_evaluation_job(lease_seconds integer default 900, max_attempts integer default 3)
+returns setof public.evaluation_jobs
+language plpgsql
+as $$
+begin
+  update public.evaluation_jobs
+     set status = 'failed', message = 'Worker přestal odpovídat – vyčerpané pokusy', finished_at = now()
+   where status = 'running'
+     and coalesce(heartbeat_at, started_at) < now() - make_interval(secs => lease_seconds)
+     and attempts >= max_attempts;
+
+  return query
+  update public.evaluation_jobs j
+     set status = 'running', started_at = now(), heartbeat_at = now(), attempts = j.attempts + 1,
+         progress = 0, message = null
+   where j.id = (
+     select id from public.evaluation_jobs
+      where status = 'queued'
+         or (status = 'running' and coalesce(heartbeat_at, started_at) < now() - make_interval(secs => lease_seconds))
+      order by id
+      for update skip locked
+      limit 1
+   )
+  returning j.*;
+end;
+$$;
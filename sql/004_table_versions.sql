@@ -0,0 +1,98 @@
+-- sql/004_table_versions.sql
+-- Verze tabulek pro cache v appce (cache_bus.py): každý zápis do sledované tabulky zvýší její verzi.
+-- Appka si verze čte nejvýš jednou za pár sekund na proces a cache s jinou verzí zahodí,
+-- takže data se můžou cachovat bez TTL a přesto se změny (i z workeru / SQL konzole) projeví hned.
+
+create table if not exists public.table_versions (
+  table_name text primary key,
+  version    bigint not null default 0,
+  updated_at timestamptz not null default now()
+);
+
+alter table public.table_versions enable row level security;
+
+drop policy if exists table_versions_read on public.table_versions;
+create policy table_versions_read on public.table_versions
+  for select to authenticated
+  using (true);
+
+-- Zvýší verze daných tabulek a vrátí nové hodnoty (volá appka po vlastním zápisu).
+-- Jen sledované tabulky (cache_bus.TRACKED_TABLES) – jiné názvy se ignorují.
+create or replace function public.bump_table_versions(tables text[])
+returns setof public.table_versions
+language sql
+security definer
+set search_path = public
+as $$
+  insert into public.table_versions as v (table_name, version, updated_at)
+  select distinct t, 1, now()
+    from unnest(tables) as t
+   where t = any (array['matches', 'players', 'profiles', 'points_breakdown', 'placement_events'])
+  on conflict (table_name) do update
+     set version = v.version + 1, updated_at = now()
+  returning v.*;
+$$;
+
+revoke execute on function public.bump_table_versions(text[]) from public, anon;
+grant execute on function public.bump_table_versions(text[]) to authenticated, service_role;
+
+-- Trigger: jeden bump na příkaz (ne na řádek), i pro zápisy mimo appku.
+create or replace function public.bump_table_version_trigger()
+returns trigger
+language plpgsql
+security definer
+set search_path = public
+as $$
+begin
+  perform public.bump_table_versions(array[tg_table_name::text]);
+  return null;
+end;
+$$;
+
+-- Varianta pro insert s transition table: bump jen když se opravdu něco vložilo
+-- (upsert s "on conflict do nothing" při každém loginu statement trigger jinak spustí taky).
+create or replace function public.bump_table_version_if_rows()
+returns trigger
+language plpgsql
+security definer
+set search_path = public
+as $$
+begin
+  if exists (select 1 from new_rows) then
+    perform public.bump_table_versions(array[tg_table_name::text]);
+  end if;
+  return null;
+end;
+$$;
+
+do $$
+declare
+  t text;
+begin
+  foreach t in array array['matches', 'players', 'points_breakdown', 'placement_events'] loop
+    execute format('drop trigger if exists %I on public.%I', t || '_bump_version', t);
+    execute format(
+      'create trigger %I after insert or update or delete on public.%I
+         for each statement execute function public.bump_table_version_trigger()',
+      t || '_bump_version', t
+    );
+  end loop;
+end;
+$$;
+
+-- profiles: verze (a s ní snapshot leaderboardu) se mění jen se změnou bodů / e-mailu
+-- nebo s novým či smazaným profilem – ne při každém loginu (app.try_ensure_profile_row)
+drop trigger if exists profiles_bump_version on public.profiles;
+drop trigger if exists profiles_bump_version_ins on public.profiles;
+drop trigger if exists profiles_bump_version_upd on public.profiles;
+drop trigger if exists profiles_bump_version_del on public.profiles;
+
+create trigger profiles_bump_version_ins after insert on public.profiles
+  referencing new table as new_rows
+  for each statement execute function public.bump_table_version_if_rows();
+
+create trigger profiles_bump_version_upd after update of points, email on public.profiles
+  for each statement execute function public.bump_table_version_trigger();
+
+create trigger profiles_bump_version_del after delete on public.profiles
+  for each statement execute function public.bump_table_version_trigger();
@@ -0,0 +1,32 @@
+-- sql/005_leaderboard.sql
+-- Leaderboard po kouscích: top N + okno kolem přihlášeného uživatele, pořadí počítá DB.
+-- Stránka Leaderboard tak nestahuje všechny profily (leaderboard.py, fallback bez funkce = celý seznam).
+--
+-- rank = "competition ranking" (1, 2, 2, 4 …): stejné body = stejné místo.
+-- pos  = pořadí v tabulce (shoda bodů se řadí podle e-mailu) – podle něj se vybírá top N a okno.
+
+create index if not exists profiles_points_idx on public.profiles (points desc, email);
+
+create or replace function public.leaderboard_slice(top_n integer default 50, me uuid default null, radius integer default 5)
+returns table (user_id uuid, email text, points integer, rank bigint, pos bigint, total bigint)
+language sql
+stable
+as $$
+  with ranked as (
+    select p.user_id,
+           p.email,
+           coalesce(p.points, 0) as points,
+           rank() over (order by coalesce(p.points, 0) desc) as rank,
+           row_number() over (order by coalesce(p.points, 0) desc, p.email, p.user_id) as pos,
+           count(*) over () as total
+      from public.profiles p
+  ),
+  mine as (
+    select r.pos from ranked r where r.user_id = me
+  )
+  select r.user_id, r.email, r.points, r.rank, r.pos, r.total
+    from ranked r
+   where r.pos <= top_n
+      or r.pos between (select m.pos from mine m) - radius and (select m.pos from mine m) + radius
+   order by r.pos;
+$$;
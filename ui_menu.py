@@ -1,6 +1,9 @@
 # ui_menu.py
 import streamlit as st
 
+from auth_guard import forget_role, is_admin as resolve_is_admin
+from session_tokens import revoke_session
+
 
 def render_top_menu(user: dict | None, supabase=None, user_id: str | None = None, active: str | None = None):
     """
@@ -27,8 +30,11 @@ def render_top_menu(user: dict | None, supabase=None, user_id: str | None = None
             st.switch_page("pages/3_Leaderboard.py")
 
     with c4:
-        # Admin tlačítko jen pokud je session flag is_admin
-        is_admin = bool(st.session_state.get("is_admin", False))
+        # Admin tlačítko jen pro admina (role z cache session – auth_guard, bez dotazu při každém rerunu)
+        if supabase is not None:
+            is_admin = resolve_is_admin(supabase, user)
+        else:
+            is_admin = bool(st.session_state.get("is_admin", False))
         if is_admin:
             if st.button("🛠️ Admin", use_container_width=True, type="secondary"):
                 st.switch_page("pages/4_Admin_Vyhodnoceni.py")
@@ -41,11 +47,9 @@ def render_top_menu(user: dict | None, supabase=None, user_id: str | None = None
             st.caption(f"👤 {email}")
 
             if st.button("Odhlásit", use_container_width=True, type="primary"):
-                try:
-                    if supabase is not None:
-                        supabase.auth.sign_out()
-                except Exception:
-                    pass
+                if supabase is not None:
+                    revoke_session(supabase)
+                forget_role()
                 st.session_state.clear()
                 st.switch_page("app.py")
         else:
@@ -0,0 +1,289 @@
+# worker.py
+"""
+Worker pro vyhodnocování mimo Streamlit.
+
+Admin stránky jen založí úlohu do tabulky evaluation_jobs (sql/003_evaluation_jobs.sql),
+worker ji vyzvedne, spustí bodování / přepočet a průběžně zapisuje progress + message.
+Běžící úloha drží lease (heartbeat_at); když worker umře, úlohu po LEASE_SECONDS
+vyzvedne znovu jiný (nebo restartovaný) worker, po MAX_ATTEMPTS pokusech skončí jako failed.
+
+    python -m worker            # běží a každých pár sekund kouká do fronty
+    python -m worker --once     # zpracuje frontu a skončí (cron)
+
+Potřebuje SUPABASE_URL a SUPABASE_SERVICE_ROLE_KEY (service role – obchází RLS),
+s TIPOVACKA_BACKEND=sqlite jede nad lokální databází (local_db.py).
+"""
+import argparse
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from db_read import fetch_all
+from points import apply_points_deltas, recompute_profiles_points
+from scoring import evaluate_finished_matches, evaluate_placement_events
+
+log = logging.getLogger("worker")
+
+JOB_KINDS = ("evaluate_matches", "evaluate_placement", "recompute_totals")
+POLL_SECONDS = 5.0
+# lease: běžící úloha obnovuje heartbeat_at; bez něj ji po LEASE_SECONDS vyzvedne jiný worker
+LEASE_SECONDS = 900
+HEARTBEAT_SECONDS = 30.0
+MAX_ATTEMPTS = 3
+STALE_JOB_MESSAGE = "Worker přestal odpovídat – vyčerpané pokusy"
+CLAIM_BATCH = 20
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+# =====================
+# Fronta (volají i admin stránky)
+# =====================
+def enqueue_job(supabase, kind: str, payload: dict | None = None, requested_by: str | None = None) -> dict:
+    """Založí úlohu ve stavu queued a vrátí její řádek."""
+    if kind not in JOB_KINDS:
+        raise ValueError(f"Neznámý typ úlohy: {kind}")
+    row = {"kind": kind, "payload": payload or {}, "status": "queued", "requested_by": requested_by}
+    res = supabase.table("evaluation_jobs").insert(row).execute()
+    return (res.data or [row])[0]
+
+
+def recent_jobs(supabase, limit: int = 10) -> list[dict]:
+    return (
+        supabase.table("evaluation_jobs")
+        .select("id, kind, payload, status, progress, message, result, created_at, started_at, finished_at")
+        .order("id", desc=True)
+        .limit(limit)
+        .execute()
+        .data
+        or []
+    )
+
+
+def _is_stale(job: dict, cutoff: datetime) -> bool:
+    seen = job.get("heartbeat_at") or job.get("started_at")
+    if not seen:
+        return True
+    try:
+        return datetime.fromisoformat(str(seen).replace("Z", "+00:00")) < cutoff
+    except ValueError:
+        return False
+
+
+def claim_job(supabase, lease_seconds: int = LEASE_SECONDS) -> dict | None:
+    """Vyzvedne nejstarší queued úlohu (nebo running s propadlým leasem) a přepne ji na running."""
+    try:
+        rows = supabase.rpc(
+            "claim_evaluation_job", {"lease_seconds": lease_seconds, "max_attempts": MAX_ATTEMPTS}
+        ).execute().data or []
+        return rows[0] if rows else None
+    except Exception:
+        pass
+
+    # fallback bez DB funkce – podmíněný update (stav + heartbeat jako při čtení) brání dvojímu vyzvednutí;
+    # když úlohu přebere jiný worker, zkusí se další
+    last_ids = None
+    while True:
+        now = datetime.now(timezone.utc)
+        cutoff = now - timedelta(seconds=lease_seconds)
+        candidates = (
+            supabase.table("evaluation_jobs")
+            .select("id, status, started_at, heartbeat_at, attempts")
+            .in_("status", ["queued", "running"])
+            .order("id")
+            .limit(CLAIM_BATCH)
+            .execute()
+            .data
+            or []
+        )
+        candidates = [c for c in candidates if c["status"] == "queued" or _is_stale(c, cutoff)]
+        ids = [c["id"] for c in candidates]
+        if not candidates or ids == last_ids:
+            return None  # nic, nebo stejné úlohy pořád nejdou vyzvednout – zkusí se při dalším pollu
+        last_ids = ids
+
+        for c in candidates:
+            attempts = int(c.get("attempts") or 0)
+            if c["status"] == "running" and attempts >= MAX_ATTEMPTS:
+                fields = {"status": "failed", "message": STALE_JOB_MESSAGE, "finished_at": now.isoformat()}
+            else:
+                fields = {
+                    "status": "running",
+                    "started_at": now.isoformat(),
+                    "heartbeat_at": now.isoformat(),
+                    "attempts": attempts + 1,
+                    "progress": 0,
+                    "message": None,
+                }
+            q = supabase.table("evaluation_jobs").update(fields).eq("id", c["id"]).eq("status", c["status"])
+            if c["status"] == "running":
+                q = q.eq("heartbeat_at", c["heartbeat_at"]) if c.get("heartbeat_at") else q.is_("heartbeat_at", "null")
+            res = q.execute()
+            if res.data and fields["status"] == "running":
+                return res.data[0]
+
+
+class _Heartbeat:
+    """Během úlohy obnovuje heartbeat_at (lease), aby ji jiný worker nepovažoval za mrtvou."""
+
+    def __init__(self, supabase, job_id, interval: float = HEARTBEAT_SECONDS):
+        self._supabase = supabase
+        self._job_id = job_id
+        self._interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"heartbeat-{job_id}", daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self._interval):
+            _update_job(self._supabase, self._job_id, heartbeat_at=_now())
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+def _update_job(supabase, job_id, **fields) -> None:
+    try:
+        supabase.table("evaluation_jobs").update(fields).eq("id", job_id).execute()
+    except Exception as e:
+        log.warning("úloha %s: nejde zapsat stav (%s)", job_id, e)
+
+
+# =====================
+# Úlohy
+# =====================
+def _run_evaluate_matches(supabase, payload: dict, progress) -> dict:
+    res = evaluate_finished_matches(supabase, match_ids=payload.get("match_ids"), progress=progress)
+    progress(80, f"Upravuji body ({len(res['deltas'])} uživatelů)")
+    applied = apply_points_deltas(supabase, res["deltas"], part="match")
+    return {
+        "matches": res["matches"],
+        "predictions": res["predictions"],
+        "changed": res["changed"],
+        "updated": applied["updated"],
+        "recomputed": applied["recomputed"],
+        "errors": applied["errors"],
+    }
+
+
+def _run_evaluate_placement(supabase, payload: dict, progress) -> dict:
+    # jeden event ({event_id, correct_value}) nebo víc najednou ({events: [{event_id, correct_value}, ...]})
+    items = payload.get("events") or [payload]
+    correct_by_event = {it.get("event_id"): (it.get("correct_value") or "").strip() for it in items}
+    if not correct_by_event or not all(eid and cv for eid, cv in correct_by_event.items()):
+        raise ValueError("evaluate_placement potřebuje event_id a correct_value")
+    progress(10, f"Hodnotím tipy na umístění ({len(correct_by_event)} eventů)")
+    res = evaluate_placement_events(supabase, correct_by_event)
+    progress(80, f"Upravuji body ({len(res['deltas'])} uživatelů)")
+    applied = apply_points_deltas(supabase, res["deltas"], part="placement")
+    return {"events": res["events"], "predictions": res["updated"], "write_requests": res["write_requests"], **applied}
+
+
+def _run_recompute_totals(supabase, payload: dict, progress) -> dict:
+    user_ids = payload.get("user_ids")
+    if not user_ids:
+        progress(5, "Načítám uživatele")
+        user_ids = [r["user_id"] for r in fetch_all(lambda: supabase.table("profiles").select("user_id"), key="user_id")]
+    progress(20, f"Přepočítávám body ({len(user_ids)} uživatelů)")
+    errors = recompute_profiles_points(supabase, user_ids)
+    return {"users": len(user_ids), "errors": errors}
+
+
+RUNNERS = {
+    "evaluate_matches": _run_evaluate_matches,
+    "evaluate_placement": _run_evaluate_placement,
+    "recompute_totals": _run_recompute_totals,
+}
+
+
+def run_job(supabase, job: dict) -> dict:
+    job_id = job["id"]
+    kind = job.get("kind")
+    log.info("úloha %s (%s) start", job_id, kind)
+    t0 = time.perf_counter()
+
+    def progress(pct: int, message: str) -> None:
+        log.info("úloha %s: %3d %% %s", job_id, pct, message)
+        _update_job(supabase, job_id, progress=int(pct), message=message, heartbeat_at=_now())
+
+    try:
+        runner = RUNNERS.get(kind)
+        if runner is None:
+            raise ValueError(f"Neznámý typ úlohy: {kind}")
+        with _Heartbeat(supabase, job_id):
+            result = runner(supabase, job.get("payload") or {}, progress)
+        result["seconds"] = round(time.perf_counter() - t0, 2)
+        _update_job(supabase, job_id, status="done", progress=100, message="Hotovo", result=result, finished_at=_now())
+        log.info("úloha %s hotovo za %.2f s", job_id, result["seconds"])
+        return result
+    except Exception as e:
+        log.exception("úloha %s selhala", job_id)
+        _update_job(supabase, job_id, status="failed", message=str(e)[:500], finished_at=_now())
+        return {"error": str(e)}
+
+
+def run_pending(supabase) -> int:
+    """Zpracuje všechny úlohy ve frontě, vrátí jejich počet."""
+    done = 0
+    while (job := claim_job(supabase)) is not None:
+        run_job(supabase, job)
+        done += 1
+    return done
+
+
+# =====================
+# CLI
+# =====================
+def _service_client():
+    from dotenv import load_dotenv
+
+    from db_client import make_client, new_http_pool, use_local_backend
+
+    load_dotenv()
+    if use_local_backend():
+        from local_db import connect
+
+        return connect()
+
+    url = os.getenv("SUPABASE_URL")
+    key = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
+    if not url or not key:
+        raise SystemExit("Chybí SUPABASE_URL nebo SUPABASE_SERVICE_ROLE_KEY v .env")
+    return make_client(url, key, new_http_pool())
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--once", action="store_true", help="zpracuje frontu a skončí")
+    ap.add_argument("--poll", type=float, default=POLL_SECONDS, help="interval dotazu na frontu [s]")
+    args = ap.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    supabase = _service_client()
+
+    if args.once:
+        log.info("zpracováno úloh: %d", run_pending(supabase))
+        return
+
+    log.info("worker běží (interval %.1f s)", args.poll)
+    while True:
+        try:
+            if not run_pending(supabase):
+                time.sleep(args.poll)
+        except KeyboardInterrupt:
+            break
+        except Exception:
+            log.exception("chyba při čtení fronty")
+            time.sleep(args.poll)
+
+
+if __name__ == "__main__":
+    main()